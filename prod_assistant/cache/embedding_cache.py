@@ -0,0 +1,208 @@
+import asyncio
+import hashlib
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from prod_assistant.cache.sqlite_store import SQLiteStore
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+# Hit rate: lookups with tier != "miss" over all lookups
+EMBEDDING_CACHE_LOOKUPS = METRICS.counter(
+    "embedding_cache_lookups_total", "Embedding cache lookups by kind (query, document) and the tier that answered "
+    "(memory, disk, miss).", ["kind", "tier"]
+)
+
+QUERY, DOCUMENT = "query", "document"
+
+# One store per database file, shared by every ModelLoader in the process
+_STORES: Dict[str, SQLiteStore] = {}
+
+
+def _cache_text(text: str) -> str:
+    """Unicode NFKC with collapsed whitespace: the same words embed to the same vector."""
+    return " ".join(unicodedata.normalize("NFKC", text or "").split())
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings client wrapper with an in-memory LRU tier and an optional
+    persistent SQLite tier.
+
+    Keys hash the model name, the kind of embedding (query and document
+    embeddings differ for retrieval models) and the normalised text. A batch
+    looks every text up first and sends only the misses to the wrapped client,
+    in one `embed_documents` call. The async methods answer memory hits
+    inline and run the SQLite tier in a worker thread.
+    """
+
+    def __init__(self, underlying: Embeddings, model_name: str, store: Optional[SQLiteStore] = None,
+                 max_memory_entries: int = 10000, ttl_seconds: Optional[float] = None):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.store = store
+        self.max_memory_entries = max_memory_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # Client attributes (model, task_type, ...) stay reachable through the wrapper
+        if name == "underlying":
+            raise AttributeError(name)
+        return getattr(self.underlying, name)
+
+    def _key(self, kind: str, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\x00{kind}\x00{_cache_text(text)}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: List[float]):
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _lookup(self, kind: str, key: str) -> Optional[List[float]]:
+        vector = self._lookup_memory(kind, key)
+        return vector if vector is not None else self._lookup_disk(kind, key)
+
+    async def _alookup(self, kind: str, key: str) -> Optional[List[float]]:
+        vector = self._lookup_memory(kind, key)
+        if vector is not None:
+            return vector
+        if self.store is None:
+            return self._lookup_disk(kind, key)  # counts the miss
+        return await asyncio.to_thread(self._lookup_disk, kind, key)
+
+    def _lookup_memory(self, kind: str, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+        if vector is not None:
+            EMBEDDING_CACHE_LOOKUPS.inc(kind=kind, tier="memory")
+        return vector
+
+    def _lookup_disk(self, kind: str, key: str) -> Optional[List[float]]:
+        if self.store is not None:
+            value = self.store.get(key)
+            if value is not None:
+                vector = np.frombuffer(value, dtype=np.float32).tolist()
+                self._remember(key, vector)
+                EMBEDDING_CACHE_LOOKUPS.inc(kind=kind, tier="disk")
+                return vector
+        EMBEDDING_CACHE_LOOKUPS.inc(kind=kind, tier="miss")
+        return None
+
+    def _save(self, key: str, vector: List[float]):
+        self._remember(key, vector)
+        if self.store is not None:
+            self.store.set(key, np.asarray(vector, dtype=np.float32).tobytes(), self.ttl_seconds)
+
+    def _split(self, kind: str, texts: List[str]) -> Tuple[List[Optional[List[float]]], Dict[str, List[int]]]:
+        """Cached vectors (None for misses) and the positions of each distinct missing key."""
+        vectors: List[Optional[List[float]]] = []
+        missing: Dict[str, List[int]] = {}
+        for i, key in enumerate(self._key(kind, t) for t in texts):
+            if key in missing:  # repeated within the batch: embed it once
+                missing[key].append(i)
+                vectors.append(None)
+                continue
+            vectors.append(self._lookup(kind, key))
+            if vectors[-1] is None:
+                missing[key] = [i]
+        return vectors, missing
+
+    async def _asave(self, key: str, vector: List[float]):
+        if self.store is None:
+            self._save(key, vector)
+        else:
+            await asyncio.to_thread(self._save, key, vector)
+
+    def _fill(self, vectors, missing: Dict[str, List[int]], embedded: List[List[float]]):
+        for (key, positions), vector in zip(missing.items(), embedded):
+            self._save(key, vector)
+            for i in positions:
+                vectors[i] = vector
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors, missing = self._split(DOCUMENT, texts)
+        if missing:
+            embedded = self.underlying.embed_documents([texts[p[0]] for p in missing.values()])
+            self._fill(vectors, missing, embedded)
+        return vectors
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        # A batch touches the SQLite tier once per text: the whole lookup / fill runs in a worker thread
+        if self.store is None:
+            vectors, missing = self._split(DOCUMENT, texts)
+        else:
+            vectors, missing = await asyncio.to_thread(self._split, DOCUMENT, texts)
+        if missing:
+            embedded = await self.underlying.aembed_documents([texts[p[0]] for p in missing.values()])
+            if self.store is None:
+                self._fill(vectors, missing, embedded)
+            else:
+                await asyncio.to_thread(self._fill, vectors, missing, embedded)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(QUERY, text)
+        vector = self._lookup(QUERY, key)
+        if vector is None:
+            vector = self.underlying.embed_query(text)
+            self._save(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self._key(QUERY, text)
+        vector = await self._alookup(QUERY, key)
+        if vector is None:
+            vector = await self.underlying.aembed_query(text)
+            await self._asave(key, vector)
+        return vector
+
+
+async def aembed_queries(embeddings: Embeddings, texts: List[str]) -> List:
+    """
+    Query embeddings of many texts, through concurrent `aembed_query` calls so
+    they match single-query vectors (and their cache entries): `aembed_documents`
+    embeds with the document task type, another space on retrieval models.
+    A text whose embedding failed gets its exception in place of the vector.
+    """
+    return list(await asyncio.gather(*(embeddings.aembed_query(t) for t in texts), return_exceptions=True))
+
+
+def cached_embeddings(config: dict, underlying: Embeddings, model_name: str) -> Embeddings:
+    """
+    `underlying` behind the configured embedding cache, or unchanged when
+    `embedding_cache.enabled` is false or EMBEDDING_CACHE_BYPASS is set.
+    """
+    cache_cfg = config.get("embedding_cache", {})
+    if not cache_cfg.get("enabled", False):
+        return underlying
+    if os.getenv("EMBEDDING_CACHE_BYPASS", "").lower() in ("1", "true", "yes"):
+        log.info("Embedding cache bypassed through EMBEDDING_CACHE_BYPASS")
+        return underlying
+
+    store = None
+    path = cache_cfg.get("path", "data/embedding_cache.sqlite")
+    if cache_cfg.get("persistent", True):
+        if path not in _STORES:
+            _STORES[path] = SQLiteStore(path, table="embeddings", max_entries=cache_cfg.get("max_entries", 200000))
+            log.info("Persistent embedding cache enabled", path=path)
+        store = _STORES[path]
+    return CachedEmbeddings(
+        underlying,
+        model_name,
+        store=store,
+        max_memory_entries=cache_cfg.get("max_memory_entries", 10000),
+        ttl_seconds=cache_cfg.get("ttl_seconds") or None,
+    )
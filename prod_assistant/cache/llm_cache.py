@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+import os
+from typing import Dict, Optional
+
+from langchain_core._api.beta_decorator import suppress_langchain_beta_warning
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from prod_assistant.cache.sqlite_store import SQLiteStore
+from prod_assistant.prompt_library.prompts import prompt_type_of
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+LLM_CACHE_LOOKUPS = METRICS.counter(
+    "llm_cache_lookups_total", "Persistent LLM response cache lookups by prompt type and result.", ["prompt", "result"]
+)
+
+# One store per database file, shared by every ModelLoader in the process
+_CACHES: Dict[str, "PersistentLLMCache"] = {}
+
+
+class PersistentLLMCache(BaseCache):
+    """
+    LangChain LLM cache on a local SQLite file, shared across restarts.
+
+    The key hashes the serialized prompt together with LangChain's llm_string
+    (provider, model and call parameters such as temperature), so any change
+    to either is a miss. The TTL depends on the prompt type recognised in the
+    prompt (see prompt_library.prompts.prompt_type_of); a TTL of 0 disables
+    caching for that type.
+    """
+
+    def __init__(self, store: SQLiteStore, ttl_seconds: Optional[Dict[str, float]] = None,
+                 default_ttl_seconds: float = 86400):
+        self.store = store
+        self.ttl_seconds = ttl_seconds or {}
+        self.default_ttl_seconds = default_ttl_seconds
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def _ttl(self, prompt_type: str) -> float:
+        return self.ttl_seconds.get(prompt_type, self.default_ttl_seconds)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        prompt_type = prompt_type_of(prompt)
+        if not self._ttl(prompt_type):
+            return None
+        value = self.store.get(self._key(prompt, llm_string))
+        LLM_CACHE_LOOKUPS.inc(prompt=prompt_type, result="miss" if value is None else "hit")
+        if value is None:
+            return None
+        try:
+            with suppress_langchain_beta_warning():
+                return loads(value)
+        except Exception as e:
+            log.warning("Unreadable LLM cache entry, ignoring it", error=str(e))
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        ttl = self._ttl(prompt_type_of(prompt))
+        if ttl:
+            self.store.set(self._key(prompt, llm_string), dumps(return_val), ttl)
+
+    def clear(self, **kwargs) -> None:
+        self.store.clear()
+
+    # SQLite reads, writes (with their periodic prune) and deserialisation run in a
+    # worker thread: under a busy or slow disk they would otherwise stall the event loop
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        return await asyncio.to_thread(self.lookup, prompt, llm_string)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        await asyncio.to_thread(self.update, prompt, llm_string, return_val)
+
+    async def aclear(self, **kwargs) -> None:
+        await asyncio.to_thread(self.clear)
+
+
+def get_llm_cache(config: dict) -> Optional[PersistentLLMCache]:
+    """
+    The configured LLM cache, or None when `llm_cache.enabled` is false or
+    the LLM_CACHE_BYPASS environment variable is set.
+    """
+    cache_cfg = config.get("llm_cache", {})
+    if not cache_cfg.get("enabled", False):
+        return None
+    if os.getenv("LLM_CACHE_BYPASS", "").lower() in ("1", "true", "yes"):
+        log.info("LLM cache bypassed through LLM_CACHE_BYPASS")
+        return None
+
+    path = cache_cfg.get("path", "data/llm_cache.sqlite")
+    if path not in _CACHES:
+        store = SQLiteStore(path, table="llm_responses", max_entries=cache_cfg.get("max_entries", 20000))
+        _CACHES[path] = PersistentLLMCache(
+            store,
+            ttl_seconds=cache_cfg.get("ttl_seconds", {}),
+            default_ttl_seconds=cache_cfg.get("default_ttl_seconds", 86400),
+        )
+        log.info("Persistent LLM cache enabled", path=path)
+    return _CACHES[path]
@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.utils.text_utils import normalize_query
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+RETRIEVAL_CACHE_LOOKUPS = METRICS.counter(
+    "retrieval_cache_lookups_total", "Retriever result cache lookups by result.", ["result"]
+)
+RETRIEVAL_CACHE_EVICTIONS = METRICS.counter(
+    "retrieval_cache_evictions_total", "Retriever result cache evictions by reason.", ["reason"]
+)
+
+
+class RetrievalCache:
+    """
+    Retrieved documents keyed by normalized query and search parameters.
+
+    Entries expire after `ttl_seconds`, the least recently used entry is
+    evicted beyond `max_entries`, and everything is dropped when
+    `version_provider()` changes (DataIngestion bumped the collection
+    version), so a re-ingested catalog is never served from stale results.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 600,
+                 version_provider: Optional[Callable[[], int]] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version_provider = version_provider
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = version_provider() if version_provider else None
+
+    @staticmethod
+    def key(query: str, *params: Hashable) -> Tuple:
+        return (normalize_query(query),) + params
+
+    def _check_version(self):
+        if not self.version_provider:
+            return
+        version = self.version_provider()
+        if version != self._version:
+            if self._entries:
+                log.info("Collection re-ingested, clearing retrieval cache",
+                         old_version=self._version, new_version=version, entries=len(self._entries))
+                RETRIEVAL_CACHE_EVICTIONS.inc(len(self._entries), reason="invalidated")
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key: Tuple):
+        """Cached results for the key, or None."""
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                RETRIEVAL_CACHE_EVICTIONS.inc(reason="ttl")
+                entry = None
+            if entry is None:
+                RETRIEVAL_CACHE_LOOKUPS.inc(result="miss")
+                return None
+            self._entries.move_to_end(key)
+        RETRIEVAL_CACHE_LOOKUPS.inc(result="hit")
+        # A fresh list, so callers can reorder or trim it without touching the cache
+        return list(entry[1])
+
+    def set(self, key: Tuple, results):
+        with self._lock:
+            self._check_version()
+            self._entries[key] = (time.time(), list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                RETRIEVAL_CACHE_EVICTIONS.inc(reason="lru")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @classmethod
+    def from_config(cls, config: dict, version_provider: Optional[Callable[[], int]] = None) -> Optional["RetrievalCache"]:
+        """The configured cache, or None when `retriever.result_cache.enabled` is false."""
+        cache_cfg = config.get("retriever", {}).get("result_cache", {})
+        if not cache_cfg.get("enabled", False):
+            return None
+        return cls(
+            max_entries=cache_cfg.get("max_entries", 1000),
+            ttl_seconds=cache_cfg.get("ttl_seconds", 600),
+            version_provider=version_provider,
+        )
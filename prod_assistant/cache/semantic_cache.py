@@ -0,0 +1,146 @@
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable, List, Optional
+
+import numpy as np
+
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+CACHE_LOOKUPS = METRICS.counter(
+    "semantic_cache_lookups_total", "Semantic answer cache lookups by result.", ["result"]
+)
+CACHE_EVICTIONS = METRICS.counter(
+    "semantic_cache_evictions_total", "Semantic answer cache evictions by reason.", ["reason"]
+)
+CACHE_SIZE = METRICS.gauge("semantic_cache_entries", "Entries currently held in the semantic answer cache.")
+
+
+@dataclass
+class _CacheEntry:
+    query: str
+    vector: np.ndarray
+    answer: str
+    created_at: float
+    key: Hashable = None
+
+
+class SemanticCache:
+    """
+    Answer cache keyed on the query embedding.
+
+    A lookup is a hit when the cosine similarity between the new query and a
+    cached query is at or above `similarity_threshold`. Entries expire after
+    `ttl_seconds`, the least recently used entry is evicted beyond
+    `max_entries`, and everything is dropped when `version_provider()` changes
+    (i.e. the collection was re-ingested).
+
+    `key_fn(query)` adds an exact-match part to the key: embeddings barely
+    separate "phones under 30000" from "phones under 50000", so an entry only
+    answers queries whose key (e.g. their price and rating bounds) is equal.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        ttl_seconds: float = 3600,
+        max_entries: int = 2000,
+        version_provider: Optional[Callable[[], int]] = None,
+        key_fn: Optional[Callable[[str], Hashable]] = None,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.version_provider = version_provider
+        self.key_fn = key_fn
+        self._entries: "OrderedDict[int, _CacheEntry]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        # Stacked unit vectors of all entries, rebuilt lazily after inserts/evictions
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_ids: List[int] = []
+        self._version = version_provider() if version_provider else None
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def _check_version(self):
+        if not self.version_provider:
+            return
+        version = self.version_provider()
+        if version != self._version:
+            if self._entries:
+                log.info("Collection re-ingested, clearing semantic cache",
+                         old_version=self._version, new_version=version, entries=len(self._entries))
+                CACHE_EVICTIONS.inc(len(self._entries), reason="invalidated")
+            self._entries.clear()
+            self._matrix = None
+            self._version = version
+
+    def _evict_expired(self, now: float):
+        expired = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            CACHE_EVICTIONS.inc(len(expired), reason="ttl")
+            self._matrix = None
+
+    def _similarity_matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix_ids = list(self._entries.keys())
+            self._matrix = np.stack([self._entries[key].vector for key in self._matrix_ids])
+        return self._matrix
+
+    def _key(self, query: Optional[str]) -> Hashable:
+        return self.key_fn(query) if self.key_fn and query is not None else None
+
+    def lookup(self, vector, query: Optional[str] = None) -> Optional[str]:
+        """Return the cached answer for the most similar query above the threshold with an equal key, if any."""
+        key = self._key(query)
+        with self._lock:
+            self._check_version()
+            self._evict_expired(time.time())
+            if not self._entries:
+                CACHE_LOOKUPS.inc(result="miss")
+                CACHE_SIZE.set(0)
+                return None
+
+            scores = self._similarity_matrix() @ self._normalize(vector)
+            for best in np.argsort(-scores):
+                if scores[best] < self.similarity_threshold:
+                    break
+                entry_id = self._matrix_ids[best]
+                if self._entries[entry_id].key != key:
+                    continue
+                self._entries.move_to_end(entry_id)
+                CACHE_LOOKUPS.inc(result="hit")
+                log.info("Semantic cache hit", cached_query=self._entries[entry_id].query,
+                         similarity=round(float(scores[best]), 4))
+                return self._entries[entry_id].answer
+
+            CACHE_LOOKUPS.inc(result="miss")
+            return None
+
+    def store(self, query: str, vector, answer: str):
+        """Cache an answer, evicting the least recently used entry when full."""
+        with self._lock:
+            self._check_version()
+            self._entries[self._next_id] = _CacheEntry(query, self._normalize(vector), answer, time.time(),
+                                                       self._key(query))
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                CACHE_EVICTIONS.inc(reason="lru")
+            self._matrix = None
+            CACHE_SIZE.set(len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            CACHE_SIZE.set(0)
@@ -3,9 +3,12 @@ import pandas as pd
 from dotenv import load_dotenv
 from typing import List, Dict
 from langchain_core.documents import Document
-from langchain_astradb import AstraDBVectorStore
 from prod_assistant.utils.model_loader import ModelLoader
 from prod_assistant.utils.config_loader import load_config
+from prod_assistant.utils.collection_version import CollectionVersion
+from prod_assistant.utils.text_utils import parse_price_inr
+from prod_assistant.retriever.vector_store import load_vector_store, required_env_vars
+from prod_assistant.retriever.lexical_index import LexicalIndex
 
 
 class DataIngestion:
@@ -16,17 +19,17 @@ class DataIngestion:
         """Initialize the DataIngestion class by loading environment variables, configuration, and models."""
         print("Initializing DataIngestion pipeline...")
         self.model_loader=ModelLoader()
+        self.config=load_config()
         self._load_env_variables()
         self.csv_path = self._get_csv_path()
         self.product_data = self._load_csv()
-        self.config=load_config()
 
 
     def _load_env_variables(self):
         """Load environment variables from a .env file."""
         load_dotenv()
         
-        required_vars = ["GOOGLE_API_KEY", "ASTRA_DB_API_ENDPOINT", "ASTRA_DB_APPLICATION_TOKEN", "ASTRA_DB_KEYSPACE"]
+        required_vars = ["GOOGLE_API_KEY"] + required_env_vars(self.config)
         
         missing_vars = [var for var in required_vars if os.getenv(var) is None]
         if missing_vars:
@@ -58,6 +61,15 @@ class DataIngestion:
 
         return df
     
+    @staticmethod
+    def _to_number(value, cast):
+        """`cast(value)`, or None for empty / non-numeric CSV cells (NaN, "N/A")."""
+        try:
+            number = cast(float(str(value).replace(",", "")))
+        except (TypeError, ValueError):
+            return None
+        return None if pd.isna(number) else number
+
     def transform_data(self):
         """
         Transform product data into list of LangChain Document objects.
@@ -77,12 +89,15 @@ class DataIngestion:
 
         documents = []
         for entry in product_list:
+            # Numeric fields back the price / rating filters pushed into vector search;
+            # "price" keeps the display string ("₹74,999")
             metadata = {
                     "product_id": entry["product_id"],
                     "product_title": entry["product_title"],
-                    "rating": entry["rating"],
-                    "total_reviews": entry["total_reviews"],
-                    "price": entry["price"]
+                    "rating": self._to_number(entry["rating"], float),
+                    "total_reviews": self._to_number(entry["total_reviews"], int),
+                    "price": entry["price"],
+                    "price_inr": parse_price_inr(entry["price"]),
             }
             # document object with review text and metadata
             doc = Document(page_content=entry["top_reviews"], metadata=metadata)
@@ -92,20 +107,37 @@ class DataIngestion:
         return documents
 
     def store_in_vector_db(self, documents: List[Document]):
-        """Store the given documents in Astra DB vector store."""
+        """Store the given documents in the configured vector store (Astra DB or the local index)."""
         collection_name=self.config["astra_db"]["collection_name"]
-        vstore = AstraDBVectorStore(
-            embedding= self.model_loader.load_embeddings(),
-            collection_name=collection_name,
-            api_endpoint=self.db_api_endpoint,
-            token=self.db_application_token,
-            namespace=self.db_keyspace,
-        )
+        vstore = load_vector_store(self.config, self.model_loader.load_embeddings())
 
         inserted_ids = vstore.add_documents(documents)
-        print(f"Successfully inserted {len(inserted_ids)} documents into AstraDB.")
+        print(f"Successfully inserted {len(inserted_ids)} documents into {type(vstore).__name__}.")
+
+        self.build_lexical_index(documents)
+
+        # Invalidate answer caches built on the previous contents of the collection
+        CollectionVersion(collection_name).bump()
         return vstore, inserted_ids
 
+    def build_lexical_index(self, documents: List[Document]):
+        """
+        Write the BM25 index over titles and reviews used by the Retriever's hybrid mode.
+        The vector store keeps earlier ingestions, so the batch is merged into the
+        existing index (re-ingested products replace their old entry).
+        """
+        path = LexicalIndex.path_from_config(self.config)
+        hybrid_cfg = self.config.get("retriever", {}).get("hybrid", {})
+        title_weight = hybrid_cfg.get("title_weight", 3.0)
+        existing = LexicalIndex.load(path)
+        if existing is None:
+            index = LexicalIndex.build(documents, title_weight=title_weight)
+        else:
+            index = existing.merged(documents, title_weight=title_weight)
+        index.save(path)
+        print(f"Lexical index of {len(index)} documents written to {path}.")
+        return index
+
     def run_pipeline(self):
         """Run the complete data ingestion pipeline."""
         documents = self.transform_data()
@@ -1,6 +1,9 @@
-from typing import Any
+import asyncio
+from typing import Any, Optional
 from mcp.server.fastmcp import FastMCP
 from prod_assistant.retriever.retrieval import Retriever  
+from prod_assistant.retriever.context_packer import ContextPacker
+from prod_assistant.utils.config_loader import load_config
 from langchain_community.tools import DuckDuckGoSearchRun
 
 # Initialize MCP server
@@ -10,6 +13,15 @@ mcp = FastMCP("hybrid_search")
 retriever_obj = Retriever()
 retriever = retriever_obj.load_retriever()
 
+# Token-budgeted formatting of the retrieved reviews (None: paste them whole)
+config = load_config()
+packer = ContextPacker.from_config(config) if config.get("context_packer", {}).get("enabled", False) else None
+
+# Upper bounds for each tool call; the agent passes its remaining request budget as timeout_seconds
+server_cfg = config.get("mcp_server", {})
+RETRIEVER_TIMEOUT = server_cfg.get("retriever_timeout_seconds", 10)
+WEB_SEARCH_TIMEOUT = server_cfg.get("web_search_timeout_seconds", 8)
+
 # LangChain DuckDuckGo tool
 duckduckgo = DuckDuckGoSearchRun()
 
@@ -20,36 +32,60 @@ def format_docs(docs) -> str:
         return ""
     formatted_chunks = []
     for d in docs:
+        score = None
         if isinstance(d, tuple):
-            d = d[0]
+            d, score = d
         meta = d.metadata or {}
         formatted = (
             f"Title: {meta.get('product_title', 'N/A')}\n"
             f"Price: {meta.get('price', 'N/A')}\n"
             f"Rating: {meta.get('rating', 'N/A')}\n"
-            f"Reviews:\n{d.page_content.strip()}"
+            + (f"Similarity: {score:.3f}\n" if score is not None else "")
+            + f"Reviews:\n{d.page_content.strip()}"
         )
         formatted_chunks.append(formatted)
     return "\n\n---\n\n".join(formatted_chunks)
 
+def _timeout(requested: Optional[float], limit: float) -> float:
+    """The caller's remaining budget capped at the server limit; <= 0 once the caller's budget is spent."""
+    return min(requested, limit) if requested is not None else limit
+
 # ---------- MCP Tools ----------
 @mcp.tool()
-async def get_product_info(query: str) -> str:
+async def get_product_info(query: str, timeout_seconds: Optional[float] = None,
+                           lambda_mult: Optional[float] = None) -> str:
     """Retrieve product information for a given query from local retriever."""
+    timeout = _timeout(timeout_seconds, RETRIEVER_TIMEOUT)
+    if timeout <= 0:
+        # The caller has given up already; a worker thread could not be stopped once started
+        return "No local results found (retrieval timed out)."
     try:
-        docs = retriever.invoke(query)
-        context = format_docs(docs)
+        # (doc, similarity) pairs: the score lets the agent's relevance gate skip the LLM grader.
+        # The vector store client blocks, so it runs off the event loop under the caller's budget.
+        # lambda_mult overrides the configured MMR relevance / diversity trade-off for this query
+        docs = await asyncio.wait_for(
+            asyncio.to_thread(retriever_obj.call_retriever_with_scores, query, lambda_mult=lambda_mult),
+            timeout=timeout,
+        )
+        context = packer.pack(query, docs) if packer else format_docs(docs)
         if not context.strip():
             return "No local results found."
         return context
+    except asyncio.TimeoutError:
+        return "No local results found (retrieval timed out)."
     except Exception as e:
         return f"Error retrieving product info: {str(e)}"
 
 @mcp.tool()
-async def web_search(query: str) -> str:
+async def web_search(query: str, timeout_seconds: Optional[float] = None) -> str:
     """Search the web using DuckDuckGo if retriever has no results."""
+    timeout = _timeout(timeout_seconds, WEB_SEARCH_TIMEOUT)
+    if timeout <= 0:
+        return "Web search timed out."
     try:
-        return duckduckgo.run(query)
+        return await asyncio.wait_for(asyncio.to_thread(duckduckgo.run, query), timeout=timeout)
+    except asyncio.TimeoutError:
+        return "Web search timed out."
     except Exception as e:
         return f"Error during web search: {str(e)}"
 
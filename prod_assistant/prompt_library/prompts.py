@@ -1,12 +1,31 @@
 from enum import Enum
-from typing import Dict
+from typing import Dict, Tuple
 import string
 
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable, RunnableLambda, RunnableParallel, RunnablePassthrough
+
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.utils.text_utils import TokenCounter
+
+PROMPT_TOKENS = METRICS.counter(
+    "llm_prompt_tokens_total", "LLM tokens per prompt type (provider-reported, estimated otherwise).",
+    ["prompt", "direction"]
+)
+PROMPT_CALLS = METRICS.counter("llm_prompt_calls_total", "LLM calls per prompt type.", ["prompt"])
+PREFIX_TOKENS = METRICS.gauge(
+    "prompt_static_prefix_tokens", "Tokens of the byte-stable prompt prefix before the first placeholder.", ["prompt"]
+)
+
 
 class PromptType(str, Enum):
     PRODUCT_BOT = "product_bot"
     REVIEW_BOT = "review_bot"
     COMPARISON_BOT = "comparison_bot"
+    GRADER = "grader"
+    REWRITER = "rewriter"
+    ASSISTANT = "assistant"
 
 
 class PromptTemplate:
@@ -27,6 +46,12 @@ class PromptTemplate:
     def required_placeholders(self):
         return [field_name for _, field_name, _, _ in string.Formatter().parse(self.template) if field_name]
 
+    def static_prefix(self) -> str:
+        """Template text before the first placeholder, identical on every call."""
+        for literal, _, _, _ in string.Formatter().parse(self.template):
+            return literal
+        return ""
+
 
 # Central Registry
 PROMPT_REGISTRY: Dict[PromptType, PromptTemplate] = {
@@ -44,5 +69,102 @@ PROMPT_REGISTRY: Dict[PromptType, PromptTemplate] = {
         YOUR ANSWER:
         """,
         description="Handles ecommerce QnA & product recommendation flows"
-    )
-}
\ No newline at end of file
+    ),
+    # Static instructions come before the placeholders so the prefix is byte-stable
+    PromptType.GRADER: PromptTemplate(
+        "You are a grader. Decide whether the docs are relevant to the question. "
+        "Answer yes or no.\n\nQuestion: {question}\nDocs: {docs}",
+        description="Relevance of retrieved product context to the user question"
+    ),
+    PromptType.REWRITER: PromptTemplate(
+        "Rewrite this user query to make it more clear and specific for a search engine. "
+        "Do NOT answer the query. Only rewrite it.\n\nQuery: {question}\nRewritten Query:",
+        description="Search-engine rewrite of a query the catalogue could not answer"
+    ),
+    PromptType.ASSISTANT: PromptTemplate(
+        "You are a helpful assistant. Answer the user directly.\n\nQuestion: {question}\nAnswer:",
+        description="Direct answer for queries that need no product lookup"
+    ),
+}
+
+
+def prompt_type_of(text: str) -> str:
+    """
+    Value of the registered PromptType whose static prefix opens a prompt found in
+    `text` (e.g. the serialized messages an LLM cache sees), or "other".
+    """
+    for prompt_type, prompt in PROMPT_REGISTRY.items():
+        # First line only: newlines and quotes are escaped differently once serialized
+        fingerprint = prompt.static_prefix().strip().split("\n", 1)[0][:80]
+        if fingerprint and fingerprint in text:
+            return prompt_type.value
+    return "other"
+
+
+class TokenUsageRecorder:
+    """
+    Chain step between the LLM and the output parser that counts the call's
+    input / output tokens for one prompt type (provider-reported usage when the
+    message carries it, estimated otherwise) and passes the message on.
+    """
+
+    def __init__(self, prompt: str, count_tokens: TokenCounter):
+        self.prompt = prompt
+        self.count_tokens = count_tokens
+
+    def __call__(self, step: dict):
+        message = step["message"]
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            input_tokens, output_tokens = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+        else:
+            input_tokens = self.count_tokens(step["prompt"].to_string())
+            output_tokens = self.count_tokens(str(message.content))
+        PROMPT_CALLS.inc(prompt=self.prompt)
+        PROMPT_TOKENS.inc(input_tokens, prompt=self.prompt, direction="input")
+        PROMPT_TOKENS.inc(output_tokens, prompt=self.prompt, direction="output")
+        return message
+
+
+class PromptChainRegistry:
+    """
+    `prompt | llm | StrOutputParser()` chains compiled once per (PromptType, LLM)
+    instead of on every node call. Each chain is named after its prompt type
+    and reports its token usage to the llm_prompt_tokens_total metric.
+    """
+
+    def __init__(self, prompts: Dict[PromptType, PromptTemplate] = PROMPT_REGISTRY):
+        self.prompts = prompts
+        self._chains: Dict[Tuple[PromptType, int], Tuple[object, Runnable]] = {}
+        self._count_tokens = None
+
+    @property
+    def count_tokens(self) -> TokenCounter:
+        if self._count_tokens is None:
+            self._count_tokens = TokenCounter()
+        return self._count_tokens
+
+    def chain(self, prompt_type: PromptType, llm) -> Runnable:
+        # Keyed on the LLM's identity; the entry keeps the LLM alive so its id is never reused
+        key = (prompt_type, id(llm))
+        entry = self._chains.get(key)
+        if entry is None:
+            prompt = self.prompts[prompt_type]
+            # Token accounting is a chain step rather than a callback handler: handlers bound
+            # with with_config() would replace the caller's callbacks (and with them streaming events)
+            recorder = TokenUsageRecorder(prompt_type.value, self.count_tokens)
+            runnable = (
+                ChatPromptTemplate.from_template(prompt.template)
+                | RunnableParallel(prompt=RunnablePassthrough(), message=llm)
+                | RunnableLambda(recorder, name="token_usage")
+                | StrOutputParser()
+            ).with_config(run_name=prompt_type.value)
+            entry = self._chains[key] = (llm, runnable)
+            PREFIX_TOKENS.set(self.static_prefix_tokens(prompt_type), prompt=prompt_type.value)
+        return entry[1]
+
+    def static_prefix_tokens(self, prompt_type: PromptType) -> int:
+        return self.count_tokens(self.prompts[prompt_type].static_prefix())
+
+
+CHAIN_REGISTRY = PromptChainRegistry()
\ No newline at end of file
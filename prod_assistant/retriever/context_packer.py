@@ -0,0 +1,141 @@
+import math
+import re
+from typing import List, Optional
+
+from langchain_core.documents import Document
+
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.utils.text_utils import TokenCounter, content_tokens
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+CONTEXT_TOKENS = METRICS.counter(
+    "context_packer_tokens_total", "Retrieved context tokens before and after packing.", ["stage"]
+)
+
+REVIEW_SEPARATOR = "||"
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class _Product:
+    def __init__(self, doc: Document, score: Optional[float], header: str, sentences: List[str], same_as: str):
+        self.doc = doc
+        self.score = score
+        self.header = header
+        self.sentences = sentences  # candidate review sentences, best first
+        self.same_as = same_as  # title of an earlier variant with the same reviews
+        self.chosen: List[int] = []
+
+
+class ContextPacker:
+    """
+    Packs retrieved products into a token budget for the grader / generator prompts.
+
+    - Reviews (`||`-separated in `top_reviews`) already emitted for an earlier
+      product are dropped, so colour / storage variants share one copy.
+    - Review sentences are ranked by word overlap with the query, not by
+      embedding similarity. Embedding them would cost an embeddings API call
+      per retrieved sentence on every request, more than the packing saves;
+      the tradeoff is that paraphrases ("lasts all day" for "battery life")
+      rank no higher than unrelated sentences and keep their review order.
+    - Every product keeps its header (title, price, rating); sentences are then
+      added round-robin, best first, across products in retrieval order until
+      `max_tokens` is reached or each product has `max_sentences_per_product`.
+
+    The output keeps the Title / Price / Rating / Similarity / Reviews layout
+    of product_search_server.format_docs.
+    """
+
+    def __init__(self, max_tokens: int = 1500, max_sentences_per_product: int = 6,
+                 encoding: str = "cl100k_base"):
+        self.max_tokens = max_tokens
+        self.max_sentences_per_product = max_sentences_per_product
+        self.count_tokens = TokenCounter(encoding)
+
+    @staticmethod
+    def _header(doc: Document, score: Optional[float]) -> str:
+        meta = doc.metadata or {}
+        return (
+            f"Title: {meta.get('product_title', 'N/A')}\n"
+            f"Price: {meta.get('price', 'N/A')}\n"
+            f"Rating: {meta.get('rating', 'N/A')}\n"
+            + (f"Similarity: {score:.3f}\n" if score is not None else "")
+        )
+
+    @staticmethod
+    def _rank(query_tokens: set, sentences: List[str]) -> List[str]:
+        """Sentences by query word overlap (length-normalised); ties keep review order."""
+        def overlap(indexed):
+            position, sentence = indexed
+            tokens = content_tokens(sentence)
+            hits = len(query_tokens & tokens)
+            return (-hits / math.sqrt(len(tokens) or 1), position)
+        return [s for _, s in sorted(enumerate(sentences), key=overlap)]
+
+    def _products(self, query: str, docs) -> List[_Product]:
+        query_tokens = content_tokens(query)
+        seen_reviews = {}
+        products = []
+        for d in docs:
+            score = None
+            if isinstance(d, tuple):
+                d, score = d
+            title = (d.metadata or {}).get("product_title", "N/A")
+            sentences, duplicate_of = [], ""
+            for review in d.page_content.split(REVIEW_SEPARATOR):
+                key = _WHITESPACE.sub(" ", review).strip().lower()
+                if not key:
+                    continue
+                if key in seen_reviews:
+                    duplicate_of = duplicate_of or seen_reviews[key]
+                    continue
+                seen_reviews[key] = title
+                sentences.extend(s.strip() for s in _SENTENCE_END.split(review.strip()) if s.strip())
+            same_as = duplicate_of if not sentences else ""
+            products.append(_Product(d, score, self._header(d, score), self._rank(query_tokens, sentences), same_as))
+        return products
+
+    @staticmethod
+    def _render(product: _Product) -> str:
+        if product.same_as:
+            return f"{product.header}Reviews: same as {product.same_as}"
+        chosen = sorted(product.chosen)
+        return product.header + "Reviews:\n" + "\n".join(f"- {product.sentences[i]}" for i in chosen)
+
+    def pack(self, query: str, docs) -> str:
+        """Format `docs` (Documents or (Document, similarity) pairs) within the token budget."""
+        products = self._products(query, docs)
+        if not products:
+            return ""
+
+        used = sum(self.count_tokens(self._render(p)) for p in products)
+        added = True
+        while added:
+            added = False
+            for product in products:
+                rank = len(product.chosen)
+                if rank >= min(len(product.sentences), self.max_sentences_per_product):
+                    continue
+                cost = self.count_tokens(product.sentences[rank]) + 2  # "- " bullet and newline
+                if used + cost > self.max_tokens:
+                    continue
+                product.chosen.append(rank)
+                used += cost
+                added = True
+
+        packed = "\n\n---\n\n".join(self._render(p) for p in products)
+        raw_tokens = sum(self.count_tokens(self._header(p.doc, p.score) + p.doc.page_content) for p in products)
+        packed_tokens = self.count_tokens(packed)
+        CONTEXT_TOKENS.inc(raw_tokens, stage="raw")
+        CONTEXT_TOKENS.inc(packed_tokens, stage="packed")
+        log.info("Packed retrieved context", products=len(products), raw_tokens=raw_tokens, packed_tokens=packed_tokens)
+        return packed
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ContextPacker":
+        packer_cfg = config.get("context_packer", {})
+        return cls(
+            max_tokens=packer_cfg.get("max_tokens", 1500),
+            max_sentences_per_product=packer_cfg.get("max_sentences_per_product", 6),
+            encoding=packer_cfg.get("encoding", "cl100k_base"),
+        )
@@ -0,0 +1,343 @@
+import json
+import os
+import threading
+import uuid
+from typing import Any, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from prod_assistant.retriever.mmr import MMRCandidates
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+_VECTORS_FILE = "vectors.npz"
+_DOCS_FILE = "documents.json"
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+class _Rows(NamedTuple):
+    """The store's rows as of one moment; search hits index into these, not into the live store."""
+    vectors: np.ndarray
+    ids: List[str]
+    texts: List[str]
+    metadatas: List[dict]
+
+    def document(self, row: int) -> Document:
+        return Document(id=self.ids[row], page_content=self.texts[row], metadata=dict(self.metadatas[row]))
+
+
+def matches_filter(metadata: dict, condition: Optional[dict]) -> bool:
+    """
+    Evaluate a metadata filter in the Astra DB Data API form used by the
+    Retriever: {"field": value}, {"field": {"$gte"|"$gt"|"$lte"|"$lt"|"$eq"|"$ne"|"$in": ...}},
+    "$and" / "$or" lists.
+    """
+    if not condition:
+        return True
+    for key, expected in condition.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, c) for c in expected):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, c) for c in expected):
+                return False
+        elif isinstance(expected, dict):
+            value = metadata.get(key)
+            for op, operand in expected.items():
+                if op == "$eq" and value != operand:
+                    return False
+                if op == "$ne" and value == operand:
+                    return False
+                if op == "$in" and value not in operand:
+                    return False
+                if op in ("$gt", "$gte", "$lt", "$lte"):
+                    if value is None:
+                        return False
+                    if op == "$gt" and not value > operand:
+                        return False
+                    if op == "$gte" and not value >= operand:
+                        return False
+                    if op == "$lt" and not value < operand:
+                        return False
+                    if op == "$lte" and not value <= operand:
+                        return False
+        elif metadata.get(key) != expected:
+            return False
+    return True
+
+
+class IVFVectorStore(VectorStore):
+    """
+    In-process inverted-file (IVF) vector index, persisted to a directory.
+
+    Vectors are L2-normalised, so inner product is cosine similarity. Once the
+    store holds `min_train_size` vectors, spherical k-means splits them into
+    `nlist` lists (about sqrt(n) by default); a search scans only the `nprobe`
+    lists whose centroids are closest to the query. Smaller stores, or
+    `nprobe >= nlist`, are searched exhaustively. Vectors added after training
+    join their nearest list; the lists are retrained once the store has grown
+    by `retrain_growth`.
+
+    Search results follow AstraDBVectorStore: scores are (1 + cosine) / 2,
+    `similarity_search_with_embedding` returns the candidates' vectors for
+    client-side MMR, and `filter` takes the same Data API style conditions.
+    """
+
+    def __init__(self, embedding: Embeddings, path: Optional[str] = None, nlist: int = 0, nprobe: int = 8,
+                 min_train_size: int = 1024, retrain_growth: float = 2.0, seed: int = 0):
+        self.embedding = embedding
+        self.path = path
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.retrain_growth = retrain_growth
+        self.seed = seed
+
+        self._lock = threading.RLock()
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[dict] = []
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._trained_size = 0
+
+        if path and os.path.exists(os.path.join(path, _VECTORS_FILE)):
+            self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    # ---------- Index maintenance ----------
+    def _kmeans(self, vectors: np.ndarray, nlist: int, iterations: int = 20) -> np.ndarray:
+        """Spherical k-means on (a sample of) the vectors; returns normalised centroids."""
+        rng = np.random.default_rng(self.seed)
+        sample = vectors
+        if len(vectors) > nlist * 256:
+            sample = vectors[rng.choice(len(vectors), nlist * 256, replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=nlist)
+            empty = counts == 0
+            # Re-seed empty lists with random points so every list stays in use
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = _normalize(sums)
+        return centroids.astype(np.float32)
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self._centroids.T, axis=1)
+
+    def _rebuild_lists(self, assignment: np.ndarray):
+        order = np.argsort(assignment, kind="stable")
+        bounds = np.searchsorted(assignment[order], np.arange(len(self._centroids) + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(self._centroids))]
+
+    def train(self):
+        """(Re)build the coarse quantizer over every stored vector."""
+        with self._lock:
+            n = len(self._ids)
+            nlist = self.nlist or max(1, int(np.sqrt(n)))
+            if n < max(self.min_train_size, nlist):
+                self._centroids, self._lists, self._trained_size = None, [], 0
+                return
+            self._centroids = self._kmeans(self._vectors, nlist)
+            self._rebuild_lists(self._assign(self._vectors))
+            self._trained_size = n
+            log.info("IVF index trained", vectors=n, nlist=nlist)
+
+    def _maybe_train(self):
+        n = len(self._ids)
+        if self._centroids is None:
+            if n >= self.min_train_size:
+                self.train()
+        elif n >= self._trained_size * self.retrain_growth:
+            self.train()
+        else:
+            self._rebuild_lists(self._assign(self._vectors))
+
+    # ---------- Persistence ----------
+    def save(self):
+        """Write the index to `path` (vectors and centroids as .npz, documents as JSON), atomically per file."""
+        if not self.path:
+            return
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            arrays = {"vectors": self._vectors}
+            if self._centroids is not None:
+                arrays["centroids"] = self._centroids
+            tmp = os.path.join(self.path, _VECTORS_FILE + ".tmp")
+            with open(tmp, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, os.path.join(self.path, _VECTORS_FILE))
+
+            docs = {"ids": self._ids, "texts": self._texts, "metadatas": self._metadatas,
+                    "trained_size": self._trained_size}
+            tmp = os.path.join(self.path, _DOCS_FILE + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(docs, f, ensure_ascii=False)
+            os.replace(tmp, os.path.join(self.path, _DOCS_FILE))
+
+    def _load(self):
+        with np.load(os.path.join(self.path, _VECTORS_FILE)) as arrays:
+            self._vectors = arrays["vectors"].astype(np.float32)
+            self._centroids = arrays["centroids"] if "centroids" in arrays else None
+        with open(os.path.join(self.path, _DOCS_FILE), encoding="utf-8") as f:
+            docs = json.load(f)
+        self._ids, self._texts, self._metadatas = docs["ids"], docs["texts"], docs["metadatas"]
+        self._trained_size = docs.get("trained_size", 0)
+        if self._centroids is not None:
+            self._rebuild_lists(self._assign(self._vectors))
+        log.info("IVF index loaded", path=self.path, vectors=len(self._ids), trained=self.trained)
+
+    # ---------- VectorStore API ----------
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, *,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        return self.add_embeddings(texts, self.embedding.embed_documents(texts), metadatas, ids=ids)
+
+    async def aadd_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, *,
+                         ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        return self.add_embeddings(texts, await self.embedding.aembed_documents(texts), metadatas, ids=ids)
+
+    def add_embeddings(self, texts: List[str], embeddings, metadatas: Optional[List[dict]] = None, *,
+                       ids: Optional[List[str]] = None) -> List[str]:
+        """Add documents whose vectors are already computed."""
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        ids = list(ids) if ids else [uuid.uuid4().hex for _ in texts]
+        metadatas = list(metadatas) if metadatas else [{} for _ in texts]
+        with self._lock:
+            # Re-adding an id replaces the stored document, as an upsert would
+            replaced = set(ids) & set(self._ids)
+            if replaced:
+                self._delete(replaced)
+            # New lists rather than in-place appends, so snapshots taken by searches stay as they were
+            self._vectors = vectors if not len(self._ids) else np.vstack([self._vectors, vectors])
+            self._ids = self._ids + ids
+            self._texts = self._texts + texts
+            self._metadatas = self._metadatas + [dict(m) for m in metadatas]
+            self._maybe_train()
+            self.save()
+        return ids
+
+    def _delete(self, ids: set):
+        keep = [i for i, doc_id in enumerate(self._ids) if doc_id not in ids]
+        self._vectors = self._vectors[keep]
+        self._ids = [self._ids[i] for i in keep]
+        self._texts = [self._texts[i] for i in keep]
+        self._metadatas = [self._metadatas[i] for i in keep]
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        with self._lock:
+            if ids is None:
+                self._vectors = np.zeros((0, 0), dtype=np.float32)
+                self._ids, self._texts, self._metadatas = [], [], []
+                self._centroids, self._lists, self._trained_size = None, [], 0
+            else:
+                self._delete(set(ids))
+                if self._centroids is not None:
+                    self._rebuild_lists(self._assign(self._vectors))
+            self.save()
+        return True
+
+    def _candidates(self, query: np.ndarray, nprobe: int) -> Optional[np.ndarray]:
+        """Row indices in the `nprobe` lists closest to the query; None means every row."""
+        if self._centroids is None or nprobe >= len(self._centroids):
+            return None
+        probe = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self._lists[i] for i in probe])
+
+    def search_by_vector(self, vector, k: int = 4, filter: Optional[dict] = None,
+                         nprobe: Optional[int] = None) -> List[Tuple[int, float]]:
+        """(row, cosine similarity) of the k best matches, best first."""
+        return self._search(vector, k, filter, nprobe)[0]
+
+    def _search(self, vector, k: int, filter: Optional[dict],
+                nprobe: Optional[int]) -> Tuple[List[Tuple[int, float]], _Rows]:
+        """search_by_vector() hits together with the rows they index, taken under the lock in one go."""
+        query = _normalize(np.asarray(vector, dtype=np.float32))
+        with self._lock:
+            snapshot = _Rows(self._vectors, self._ids, self._texts, self._metadatas)
+            candidates = self._candidates(query, nprobe or self.nprobe)
+        vectors = snapshot.vectors
+        if not len(vectors):
+            return [], snapshot
+        rows = np.arange(len(vectors)) if candidates is None else candidates
+        if filter:
+            rows = rows[[matches_filter(snapshot.metadatas[r], filter) for r in rows]] if len(rows) else rows
+        if not len(rows):
+            return [], snapshot
+        # An exhaustive unfiltered scan reads the matrix in place instead of gathering a copy
+        scores = (vectors if len(rows) == len(vectors) else vectors[rows]) @ query
+        top = np.argpartition(-scores, min(k, len(rows)) - 1)[:k] if len(rows) > k else np.arange(len(rows))
+        top = top[np.argsort(-scores[top])]
+        return [(int(rows[i]), float(scores[i])) for i in top], snapshot
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4,
+                                               filter: Optional[dict] = None, **kwargs: Any) -> List[Tuple[Document, float]]:
+        hits, snapshot = self._search(embedding, k, filter, kwargs.get("nprobe"))
+        return [(snapshot.document(row), (1.0 + score) / 2.0) for row, score in hits]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, filter: Optional[dict] = None,
+                                    **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter, **kwargs)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Optional[dict] = None,
+                                     **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, filter, **kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter, **kwargs)]
+
+    def similarity_search_with_embedding(self, query: str, k: int = 4, filter: Optional[dict] = None):
+        """(query vector, [(document, stored vector)]) as AstraDBVectorStore returns them."""
+        query_vector = self.embedding.embed_query(query)
+        hits, snapshot = self._search(query_vector, k, filter, None)
+        return query_vector, [(snapshot.document(row), snapshot.vectors[row].tolist()) for row, _ in hits]
+
+    def _select_relevance_score_fn(self):
+        # Scores are already (1 + cosine) / 2 in [0, 1]
+        return lambda score: score
+
+    def max_marginal_relevance_search_by_vector(self, embedding: List[float], k: int = 4, fetch_k: int = 20,
+                                                lambda_mult: float = 0.5, filter: Optional[dict] = None,
+                                                **kwargs: Any) -> List[Document]:
+        hits, snapshot = self._search(embedding, fetch_k, filter, kwargs.get("nprobe"))
+        if not hits:
+            return []
+        candidates = MMRCandidates(embedding, snapshot.vectors[[row for row, _ in hits]])
+        return [snapshot.document(hits[i][0]) for i in candidates.select(k, lambda_mult)]
+
+    def max_marginal_relevance_search(self, query: str, k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5,
+                                      filter: Optional[dict] = None, **kwargs: Any) -> List[Document]:
+        return self.max_marginal_relevance_search_by_vector(
+            self.embedding.embed_query(query), k, fetch_k, lambda_mult, filter, **kwargs
+        )
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, *,
+                   ids: Optional[List[str]] = None, **kwargs: Any) -> "IVFVectorStore":
+        store = cls(embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from prod_assistant.retriever.ivf_index import matches_filter
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+_POSTINGS_FILE = "postings.npz"
+_DOCS_FILE = "documents.json"
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+# "s25+" -> "s25 plus", as in the catalog titles
+_PLUS = re.compile(r"(?<=[a-z0-9])\+")
+# "128gb" -> "128 gb", as titles write "(Navy, 128 GB)"
+_NUMBER_UNIT = re.compile(r"\b(\d+)(gb|tb|mp|mah|hz|w)\b")
+
+TITLE, BODY = "title", "body"
+FIELDS = (TITLE, BODY)
+
+
+def document_key(doc: Document) -> str:
+    """Identity of a catalog document across the dense and lexical indexes and across ingestions."""
+    meta = doc.metadata or {}
+    if meta.get("product_id"):
+        # Colour / storage variants share a product_id; the title tells them apart
+        return f"{meta['product_id']}|{meta.get('product_title', '')}"
+    return doc.id or hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+
+
+def lexical_tokens(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = _NUMBER_UNIT.sub(r"\1 \2", _PLUS.sub(" plus", text))
+    return _TOKEN.findall(text)
+
+
+class _FieldPostings:
+    """Term -> (document rows, term frequencies) of one field in CSR layout, with document lengths."""
+
+    def __init__(self, indptr: np.ndarray, rows: np.ndarray, tfs: np.ndarray, lengths: np.ndarray):
+        self.indptr = indptr
+        self.rows = rows
+        self.tfs = tfs
+        self.lengths = lengths
+        self.avg_length = float(lengths.mean()) if len(lengths) and lengths.mean() > 0 else 1.0
+
+    @classmethod
+    def build(cls, token_lists: Sequence[List[str]], vocabulary: Dict[str, int]) -> "_FieldPostings":
+        per_term: List[List[Tuple[int, int]]] = [[] for _ in vocabulary]
+        for row, tokens in enumerate(token_lists):
+            for term, tf in Counter(tokens).items():
+                per_term[vocabulary[term]].append((row, tf))
+        indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(p) for p in per_term])
+        flat = [entry for postings in per_term for entry in postings]
+        rows = np.asarray([r for r, _ in flat], dtype=np.int32)
+        tfs = np.asarray([min(tf, 65535) for _, tf in flat], dtype=np.uint16)
+        lengths = np.asarray([len(t) for t in token_lists], dtype=np.int32)
+        return cls(indptr, rows, tfs, lengths)
+
+    def postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self.indptr[term_id], self.indptr[term_id + 1]
+        return self.rows[start:end], self.tfs[start:end]
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over product titles and review text.
+
+    Each field is scored with its own BM25 statistics and the title score is
+    weighted by `title_weight`, so a query naming an exact model ("iPhone 16
+    Plus 128 GB") ranks that product above reviews that merely mention it.
+    Postings are stored compactly as CSR arrays (int32 rows, uint16 term
+    frequencies) in an .npz file next to the documents' JSON.
+    """
+
+    def __init__(self, vocabulary: Dict[str, int], fields: Dict[str, _FieldPostings], documents: List[Document],
+                 title_weight: float = 3.0, k1: float = 1.2, b: float = 0.75):
+        self.vocabulary = vocabulary
+        self.fields = fields
+        self.documents = documents
+        self.title_weight = title_weight
+        self.k1 = k1
+        self.b = b
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @classmethod
+    def build(cls, documents: Sequence[Document], title_field: str = "product_title", **kwargs) -> "LexicalIndex":
+        documents = list(documents)
+        tokens = {
+            TITLE: [lexical_tokens(str(d.metadata.get(title_field, ""))) for d in documents],
+            BODY: [lexical_tokens(d.page_content) for d in documents],
+        }
+        vocabulary: Dict[str, int] = {}
+        for token_lists in tokens.values():
+            for token_list in token_lists:
+                for term in token_list:
+                    vocabulary.setdefault(term, len(vocabulary))
+        fields = {field: _FieldPostings.build(tokens[field], vocabulary) for field in FIELDS}
+        return cls(vocabulary, fields, documents, **kwargs)
+
+    def merged(self, documents: Sequence[Document], **kwargs) -> "LexicalIndex":
+        """
+        A new index over this index's documents and `documents`, as a re-ingestion
+        leaves the collection: a document with the same key (document_key) replaces
+        the indexed one, the others are kept.
+        """
+        combined = {document_key(d): d for d in self.documents}
+        combined.update((document_key(d), d) for d in documents)
+        params = {"title_weight": self.title_weight, "k1": self.k1, "b": self.b, **kwargs}
+        return self.build(list(combined.values()), **params)
+
+    def _idf(self, df: int) -> float:
+        n = len(self.documents)
+        return float(np.log1p((n - df + 0.5) / (df + 0.5)))
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for the query."""
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        term_ids = {self.vocabulary[t] for t in lexical_tokens(query) if t in self.vocabulary}
+        for field, postings in self.fields.items():
+            weight = self.title_weight if field == TITLE else 1.0
+            norms = self.k1 * (1 - self.b + self.b * postings.lengths / postings.avg_length)
+            for term_id in term_ids:
+                rows, tfs = postings.postings(term_id)
+                if not len(rows):
+                    continue
+                tfs = tfs.astype(np.float32)
+                # Rows are unique within a posting list, so plain fancy-index addition is safe
+                scores[rows] += weight * self._idf(len(rows)) * tfs * (self.k1 + 1) / (tfs + norms[rows])
+        return scores
+
+    def search(self, query: str, k: int = 20, filter: Optional[dict] = None) -> List[Tuple[Document, float]]:
+        """(document, BM25 score) of the k best matches with a positive score, best first."""
+        scores = self.scores(query)
+        rows = np.flatnonzero(scores > 0)
+        if filter:
+            rows = rows[[matches_filter(self.documents[r].metadata, filter) for r in rows]] if len(rows) else rows
+        if not len(rows):
+            return []
+        top = rows[np.argsort(-scores[rows], kind="stable")[:k]]
+        return [(self.documents[r], float(scores[r])) for r in top]
+
+    # ---------- Persistence ----------
+    def save(self, path: str):
+        """Write postings (.npz) and documents (JSON) under `path`, each file swapped in atomically."""
+        os.makedirs(path, exist_ok=True)
+        arrays = {}
+        for field, postings in self.fields.items():
+            arrays.update({f"{field}_indptr": postings.indptr, f"{field}_rows": postings.rows,
+                           f"{field}_tfs": postings.tfs, f"{field}_lengths": postings.lengths})
+        tmp = os.path.join(path, _POSTINGS_FILE + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp, os.path.join(path, _POSTINGS_FILE))
+
+        docs = {
+            "vocabulary": sorted(self.vocabulary, key=self.vocabulary.get),
+            "documents": [{"id": d.id, "page_content": d.page_content, "metadata": d.metadata} for d in self.documents],
+        }
+        tmp = os.path.join(path, _DOCS_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(docs, f, ensure_ascii=False, default=str)
+        os.replace(tmp, os.path.join(path, _DOCS_FILE))
+        log.info("Lexical index saved", path=path, documents=len(self.documents), terms=len(self.vocabulary))
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> Optional["LexicalIndex"]:
+        """The index saved under `path`, or None when there is none."""
+        if not os.path.exists(os.path.join(path, _DOCS_FILE)):
+            return None
+        with open(os.path.join(path, _DOCS_FILE), encoding="utf-8") as f:
+            docs = json.load(f)
+        with np.load(os.path.join(path, _POSTINGS_FILE)) as arrays:
+            fields = {
+                field: _FieldPostings(arrays[f"{field}_indptr"], arrays[f"{field}_rows"],
+                                      arrays[f"{field}_tfs"], arrays[f"{field}_lengths"])
+                for field in FIELDS
+            }
+        vocabulary = {term: i for i, term in enumerate(docs["vocabulary"])}
+        documents = [Document(**d) for d in docs["documents"]]
+        return cls(vocabulary, fields, documents, **kwargs)
+
+    @staticmethod
+    def path_from_config(config: dict) -> str:
+        hybrid_cfg = config.get("retriever", {}).get("hybrid", {})
+        return os.path.join(os.getcwd(), hybrid_cfg.get("lexical_index_path", "data/lexical_index"),
+                            config["astra_db"]["collection_name"])
+
+    @classmethod
+    def from_config(cls, config: dict) -> Optional["LexicalIndex"]:
+        hybrid_cfg = config.get("retriever", {}).get("hybrid", {})
+        return cls.load(cls.path_from_config(config), title_weight=hybrid_cfg.get("title_weight", 3.0))
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60,
+                           weights: Optional[Sequence[float]] = None) -> List[Tuple[str, float]]:
+    """Fuse ranked key lists: each key scores sum(weight / (k + rank)); returns (key, score), best first."""
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, key in enumerate(ranking, start=1):
+            fused[key] = fused.get(key, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,88 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+class MMRCandidates:
+    """
+    Candidate pool of one search (documents with their embeddings) for
+    maximal marginal relevance selection in process.
+
+    Query relevance and the candidate-to-candidate similarity matrix are
+    computed once with matrix products; each `select` is then k vector
+    updates, so the pool can be re-ranked with another k or lambda_mult
+    (e.g. per intent) without going back to the vector store.
+    """
+
+    def __init__(self, query_vector, embeddings, documents: Optional[Sequence[Document]] = None):
+        self.documents = list(documents) if documents is not None else []
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        self._embeddings = _normalize(embeddings.reshape(len(embeddings), -1)) if len(embeddings) else embeddings
+        self._query = _normalize(np.asarray(query_vector, dtype=np.float32).ravel())
+        self._relevance: Optional[np.ndarray] = None
+        self._pairwise: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._embeddings)
+
+    @property
+    def relevance(self) -> np.ndarray:
+        """Cosine similarity of each candidate to the query."""
+        if self._relevance is None:
+            self._relevance = self._embeddings @ self._query if len(self) else np.zeros(0, dtype=np.float32)
+        return self._relevance
+
+    @property
+    def pairwise(self) -> np.ndarray:
+        """Cosine similarity between candidates."""
+        if self._pairwise is None:
+            self._pairwise = self._embeddings @ self._embeddings.T
+        return self._pairwise
+
+    def query_similarity(self, embeddings) -> np.ndarray:
+        """Cosine similarity of other vectors (e.g. documents outside the pool) to the same query."""
+        embeddings = _normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1))
+        return embeddings @ self._query
+
+    def select(self, k: int = 4, lambda_mult: float = 0.5) -> List[int]:
+        """
+        Indices of the MMR selection, in pick order: the most relevant
+        candidate first, then greedily the one maximising
+        lambda_mult * relevance - (1 - lambda_mult) * max similarity to the picks.
+        Same picks as langchain_core's maximal_marginal_relevance.
+        """
+        n = len(self)
+        if k <= 0 or n == 0:
+            return []
+        relevance = self.relevance
+        first = int(np.argmax(relevance))
+        selected = [first]
+        if min(k, n) == 1:
+            return selected
+        pairwise = self.pairwise
+        redundancy = pairwise[first].copy()
+        available = np.ones(n, dtype=bool)
+        available[first] = False
+        weighted_relevance = lambda_mult * relevance
+        for _ in range(min(k, n) - 1):
+            scores = np.where(available, weighted_relevance - (1 - lambda_mult) * redundancy, -np.inf)
+            pick = int(np.argmax(scores))
+            selected.append(pick)
+            available[pick] = False
+            np.maximum(redundancy, pairwise[pick], out=redundancy)
+        return selected
+
+    def rerank(self, k: int = 4, lambda_mult: float = 0.5) -> List[Tuple[Document, float]]:
+        """(document, cosine similarity to the query) of the MMR selection, in candidate (search) order."""
+        return [(self.documents[i], float(self.relevance[i])) for i in sorted(self.select(k, lambda_mult))]
+
+
+def mmr_select(query_vector, embeddings, k: int = 4, lambda_mult: float = 0.5) -> List[int]:
+    """Vectorised drop-in for langchain_core's maximal_marginal_relevance."""
+    return MMRCandidates(query_vector, embeddings).select(k, lambda_mult)
@@ -0,0 +1,106 @@
+import re
+from typing import Optional
+
+from prod_assistant.utils.text_utils import normalize_amounts, normalize_query
+
+_INR = r"(\d+) inr"
+_PRICE_BETWEEN = re.compile(r"between " + _INR + r" and " + _INR + r"|" + _INR + r" ?(?:to|-) ?" + _INR)
+_PRICE_MAX = re.compile(
+    r"\b(?:under|below|less than|within|upto|up to|cheaper than|at most|not more than|max(?:imum)?|budget(?: of)?) "
+    + _INR
+)
+_PRICE_MIN = re.compile(r"\b(?:above|over|more than|at least|starting (?:from|at)|from|min(?:imum)?) " + _INR)
+_PRICE_AROUND = re.compile(r"\b(?:around|about|approx(?:imately)?|near|close to|roughly) " + _INR)
+
+_STARS = r"(\d(?:\.\d+)?)"
+_COMPARATOR = r"(?:above|over|at least|more than|greater than|min(?:imum)?|>=?)"
+_RATING_PATTERNS = (
+    # "rating above 4", "rated at least 4.5"
+    re.compile(r"\b(?:rating|rated|stars?) (?:of )?" + _COMPARATOR + r" ?" + _STARS),
+    # "at least 4 stars", "4+ rating", "4.5 star phones"
+    re.compile(r"(?:" + _COMPARATOR + r" )?\b" + _STARS + r" ?\+? ?(?:stars?|star rating|rating|rated)\b"),
+    # "rating 4+", "rated 4 and above"
+    re.compile(r"\b(?:rating|rated) (?:of )?" + _STARS + r" ?(?:\+|and above|and up|or more|or above)"),
+)
+
+
+class QueryConstraints:
+    """
+    Price and rating bounds stated in a shopping query ("under 50000",
+    "between 20k and 30k", "around 1 lakh", "4+ rating"), expressed as a
+    metadata filter on the numeric `price_inr` / `rating` fields written at
+    ingestion.
+    """
+
+    def __init__(self, price_min: Optional[int] = None, price_max: Optional[int] = None,
+                 rating_min: Optional[float] = None):
+        self.price_min = price_min
+        self.price_max = price_max
+        self.rating_min = rating_min
+
+    def __bool__(self) -> bool:
+        return any(v is not None for v in (self.price_min, self.price_max, self.rating_min))
+
+    def __repr__(self) -> str:
+        return f"QueryConstraints(price_min={self.price_min}, price_max={self.price_max}, rating_min={self.rating_min})"
+
+    @property
+    def key(self) -> tuple:
+        """The bounds as a hashable value; queries with equal keys ask for the same range."""
+        return self.price_min, self.price_max, self.rating_min
+
+    @property
+    def kinds(self):
+        """Names of the bounds that are set (metric labels)."""
+        return [name for name in ("price_min", "price_max", "rating_min") if getattr(self, name) is not None]
+
+    @classmethod
+    def extract(cls, query: str, around_tolerance: float = 0.1) -> "QueryConstraints":
+        text = normalize_amounts(normalize_query(query))
+        price_min = price_max = rating_min = None
+
+        between = _PRICE_BETWEEN.search(text)
+        around = _PRICE_AROUND.search(text)
+        if between:
+            low, high = sorted(int(g) for g in between.groups() if g)
+            price_min, price_max = low, high
+        elif around:
+            amount = int(around.group(1))
+            price_min, price_max = int(amount * (1 - around_tolerance)), int(amount * (1 + around_tolerance))
+        else:
+            upper = _PRICE_MAX.search(text)
+            lower = _PRICE_MIN.search(text)
+            price_max = int(upper.group(1)) if upper else None
+            price_min = int(lower.group(1)) if lower else None
+
+        for pattern in _RATING_PATTERNS:
+            match = pattern.search(text)
+            if match and float(match.group(1)) <= 5:
+                rating_min = float(match.group(1))
+                break
+
+        return cls(price_min, price_max, rating_min)
+
+    def to_filter(self) -> Optional[dict]:
+        """Vector store metadata filter (Astra DB Data API operators), or None without bounds."""
+        clauses = []
+        if self.price_min is not None:
+            clauses.append({"price_inr": {"$gte": self.price_min}})
+        if self.price_max is not None:
+            clauses.append({"price_inr": {"$lte": self.price_max}})
+        if self.rating_min is not None:
+            clauses.append({"rating": {"$gte": self.rating_min}})
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    def matches(self, metadata: dict) -> bool:
+        """The same filter as a predicate, for stores without metadata query support."""
+        price, rating = metadata.get("price_inr"), metadata.get("rating")
+        if self.price_min is not None and (price is None or price < self.price_min):
+            return False
+        if self.price_max is not None and (price is None or price > self.price_max):
+            return False
+        if self.rating_min is not None and (rating is None or rating < self.rating_min):
+            return False
+        return True
@@ -1,9 +1,18 @@
 import os 
-from langchain_astradb import AstraDBVectorStore
-from typing import List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 from langchain_core.documents import Document
 from prod_assistant.utils.config_loader import load_config
 from prod_assistant.utils.model_loader import ModelLoader
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.logger import GLOBAL_LOGGER as log
+from prod_assistant.retriever.query_constraints import QueryConstraints
+from prod_assistant.retriever.mmr import MMRCandidates
+from prod_assistant.retriever.lexical_index import LexicalIndex, document_key, reciprocal_rank_fusion
+from prod_assistant.utils.collection_version import CollectionVersion
+from prod_assistant.cache.retrieval_cache import RetrievalCache
+from prod_assistant.retriever.vector_store import LOCAL, load_vector_store, required_env_vars, vector_store_backend
 from dotenv import load_dotenv  
 import sys
 from pathlib import Path
@@ -16,10 +25,18 @@ from prod_assistant.evaluation.ragas_eval import evaluate_context_precision, eva
 # sys.path.insert(0, str(project_root))
 
 
+RETRIEVER_FILTERS = METRICS.counter(
+    "retriever_filters_total", "Query price / rating bounds pushed into the vector search, by bound.", ["bound"]
+)
+HYBRID_RESULTS = METRICS.counter(
+    "retriever_hybrid_results_total", "Hybrid retrieval results by the search that found them (dense, lexical, both).",
+    ["source"]
+)
+
 
 class Retriever:
     """
-    Class to handle retrieval of relevant documents from Astra DB using LangChain.
+    Class to handle retrieval of relevant documents from the vector store (Astra DB or the local index) using LangChain.
     """
     def __init__(self):
         """Initialize the Retrieval class by loading environment variables, configuration, and models."""
@@ -29,6 +46,20 @@ class Retriever:
         self._load_env_variables()
         self.vstore = None
         self.retriever = None
+        # get_product_info calls load_retriever from concurrent worker threads: build once
+        self._init_lock = threading.Lock()
+        # The local index is a snapshot of files DataIngestion rewrites: reload it on a version bump
+        self._reloads_on_ingestion = vector_store_backend(self.config) == LOCAL
+        self._vstore_version = None
+        # BM25 index of the hybrid mode, reloaded after each ingestion (collection version bump)
+        self._lexical = None
+        self._lexical_version = None
+        self._lexical_lock = threading.Lock()
+        self._collection_version = CollectionVersion(self.config["astra_db"]["collection_name"])
+        # Threads start on first submit, so dense-only retrievers never spawn any
+        self._lexical_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="lexical-search")
+        # Results per normalized query and search parameters, dropped after each ingestion
+        self.result_cache = RetrievalCache.from_config(self.config, version_provider=self._collection_version.current)
 
 
     def _load_env_variables(self):
@@ -36,7 +67,7 @@ class Retriever:
         """
         load_dotenv()
          
-        required_vars = ["GOOGLE_API_KEY", "ASTRA_DB_API_ENDPOINT", "ASTRA_DB_APPLICATION_TOKEN", "ASTRA_DB_KEYSPACE"]
+        required_vars = ["GOOGLE_API_KEY"] + required_env_vars(self.config)
         
         missing_vars = [var for var in required_vars if os.getenv(var) is None]
         
@@ -51,31 +82,46 @@ class Retriever:
     
 
     def load_retriever(self):
-        """_summary_
         """
-        if not self.vstore:
+        Build the vector store and its MMR retriever on first use and return the (memoized)
+        retriever. A local index is reloaded once the collection version changes.
+        """
+        if self.retriever is not None and not self._stale():
+            return self.retriever
+        with self._init_lock:
+            return self._build_retriever()
+
+    def _stale(self) -> bool:
+        """The local index was rewritten by DataIngestion since it was loaded (Astra DB is always current)."""
+        return self._reloads_on_ingestion and self._collection_version.current() != self._vstore_version
+
+    def _build_retriever(self):
+        # Re-checked under the lock: another worker may have reloaded it while this one waited
+        if self.vstore is None or self._stale():
+            if self.vstore is not None:
+                log.info("Collection re-ingested, reloading the local vector index",
+                         old_version=self._vstore_version, new_version=self._collection_version.current())
+            version = self._collection_version.current()
             collection_name = self.config["astra_db"]["collection_name"]
             
             print(collection_name,"\n",self.db_keyspace,"\n",self.db_api_endpoint,"\n",self.db_application_token)
 
-            self.vstore =AstraDBVectorStore(
-                embedding= self.model_loader.load_embeddings(),
-                collection_name=collection_name,
-                api_endpoint=self.db_api_endpoint,
-                token=self.db_application_token,
-                namespace=self.db_keyspace,
-                )
-        if not self.retriever:
+            vstore = load_vector_store(self.config, self.model_loader.load_embeddings())
+            # Until the new retriever is set, load_retriever() callers wait on the lock for it
+            self.retriever = None
+            self.vstore, self._vstore_version = vstore, version
+        if self.retriever is None:
             top_k = self.config["retriever"]["top_k"] if "retriever" in self.config else 3
             # retriever=self.vstore.as_retriever(search_kwargs={"k":top_k})
             # print("Retriever loaded successfully.")
             # return retriever
 
-            retriever=self.vstore.as_retriever(
+            retriever_cfg = self.config.get("retriever", {})
+            self.retriever=self.vstore.as_retriever(
                 search_type="mmr",
                 search_kwargs={"k": top_k,
-                                "fetch_k": 20,
-                                "lambda_mult": 0.7,
+                                "fetch_k": retriever_cfg.get("fetch_k", 20),
+                                "lambda_mult": retriever_cfg.get("lambda_mult", 0.7),
                                 "score_threshold": 0.6
                                })
             # print("Retriever loaded successfully.")
@@ -89,16 +135,157 @@ class Retriever:
             #     base_retriever=mmr_retriever
             # )
             
-            return retriever
+        return self.retriever
             
 
 
+    def metadata_filter(self, query) -> Optional[dict]:
+        """
+        Price / rating bounds stated in the query as a vector store filter on the
+        numeric `price_inr` / `rating` metadata, or None when there are none.
+        """
+        retriever_cfg = self.config.get("retriever", {})
+        if not retriever_cfg.get("constraint_filters", True):
+            return None
+        constraints = QueryConstraints.extract(query, around_tolerance=retriever_cfg.get("price_around_tolerance", 0.1))
+        for bound in constraints.kinds:
+            RETRIEVER_FILTERS.inc(bound=bound)
+        return constraints.to_filter()
+
+    def _cached(self, key, search):
+        """search() through the result cache (when enabled) under `key`."""
+        if self.result_cache is None:
+            return search()
+        results = self.result_cache.get(key)
+        if results is None:
+            results = search()
+            # An empty result may be a transient miss; do not pin it
+            if results:
+                self.result_cache.set(key, results)
+        return results
+
     def call_retriever(self,query):
         """Call the retriever to fetch relevant documents."""
+        retriever_cfg = self.config.get("retriever", {})
+        key = RetrievalCache.key(query, "mmr", retriever_cfg.get("top_k", 3), retriever_cfg.get("fetch_k", 20),
+                                 retriever_cfg.get("lambda_mult", 0.7))
+        return self._cached(key, lambda: self._call_retriever(query))
+
+    def _call_retriever(self, query):
         retriever=self.load_retriever()
+        metadata_filter = self.metadata_filter(query)
+        if metadata_filter:
+            output = retriever.invoke(query, filter=metadata_filter)
+            if output:
+                return output
+            # Nothing qualifies (or the collection predates the numeric fields): let the LLM judge prices
+            log.info("No documents match the query bounds, retrying unfiltered", filter=metadata_filter)
         output=retriever.invoke(query)
         return output
 
+    def fetch_candidates(self, query, fetch_k: Optional[int] = None, metadata_filter: Optional[dict] = None) -> MMRCandidates:
+        """
+        The MMR candidate pool of a query: the fetch_k nearest documents fetched together
+        with their embeddings in one query, ready to be re-ranked in process.
+        """
+        vstore = self.load_retriever().vectorstore
+        fetch_k = fetch_k or self.config.get("retriever", {}).get("fetch_k", 20)
+        # Price / rating bounds are applied by the vector search itself, so every candidate qualifies
+        if metadata_filter is None:
+            metadata_filter = self.metadata_filter(query)
+        query_vector, hits = vstore.similarity_search_with_embedding(query, k=fetch_k, filter=metadata_filter)
+        if not hits and metadata_filter:
+            log.info("No documents match the query bounds, retrying unfiltered", filter=metadata_filter)
+            query_vector, hits = vstore.similarity_search_with_embedding(query, k=fetch_k)
+        return MMRCandidates(query_vector, [embedding for _, embedding in hits], [doc for doc, _ in hits])
+
+    def call_retriever_with_scores(self, query, k: Optional[int] = None,
+                                   lambda_mult: Optional[float] = None) -> List[Tuple[Document, float]]:
+        """
+        Same MMR retrieval as load_retriever(), but returns (document, cosine similarity
+        to the query) pairs. The candidates are fetched together with their embeddings
+        in one query, so the scores cost no extra round trip, and the MMR selection runs
+        here: k and lambda_mult (config defaults) can differ per request.
+        In `retriever.mode: hybrid` the results come from hybrid_search() instead.
+        """
+        retriever_cfg = self.config.get("retriever", {})
+        k = k or retriever_cfg.get("top_k", 3)
+        lambda_mult = retriever_cfg.get("lambda_mult", 0.7) if lambda_mult is None else lambda_mult
+        mode = retriever_cfg.get("mode", "dense")
+        key = RetrievalCache.key(query, "scored", mode, k, retriever_cfg.get("fetch_k", 20), lambda_mult)
+        if mode == "hybrid":
+            return self._cached(key, lambda: self.hybrid_search(query, k=k))
+        # Keep the vector store's order (most similar first), as its own MMR search does
+        return self._cached(key, lambda: self.fetch_candidates(query).rerank(k=k, lambda_mult=lambda_mult))
+
+    def lexical_index(self) -> Optional[LexicalIndex]:
+        """The BM25 index written by DataIngestion, reloaded when the collection version changes; None if missing."""
+        version = self._collection_version.current()
+        if version == self._lexical_version:
+            return self._lexical
+        with self._lexical_lock:
+            # Another worker may have reloaded it while this one waited
+            if version != self._lexical_version:
+                self._lexical = LexicalIndex.from_config(self.config)
+                self._lexical_version = version
+                if self._lexical is None:
+                    log.warning("No lexical index, hybrid retrieval runs dense only (run DataIngestion to build it)",
+                                path=LexicalIndex.path_from_config(self.config))
+            return self._lexical
+
+    def hybrid_search(self, query, k: Optional[int] = None) -> List[Tuple[Document, float]]:
+        """
+        Dense and BM25 search run concurrently, fused with reciprocal-rank fusion.
+
+        Exact model names ("S25 Plus Navy") match product titles lexically even
+        when the dense ranking prefers similar products. Returns the top k fused
+        documents as (document, cosine similarity to the query) pairs, so the
+        score keeps its meaning for the agent's relevance gate.
+        """
+        retriever_cfg = self.config.get("retriever", {})
+        hybrid_cfg = retriever_cfg.get("hybrid", {})
+        k = k or retriever_cfg.get("top_k", 3)
+        fetch_k = retriever_cfg.get("fetch_k", 20)
+        lexical = self.lexical_index()
+        metadata_filter = self.metadata_filter(query)
+
+        lexical_hits = None
+        if lexical is not None:
+            # The dense search waits on the network; BM25 scores the catalog meanwhile
+            lexical_hits = self._lexical_pool.submit(lexical.search, query, fetch_k, metadata_filter)
+        candidates = self.fetch_candidates(query, fetch_k, metadata_filter)
+        if lexical_hits is None:
+            return candidates.rerank(k=k, lambda_mult=retriever_cfg.get("lambda_mult", 0.7))
+        lexical_hits = lexical_hits.result()
+        if not lexical_hits and metadata_filter:
+            lexical_hits = lexical.search(query, fetch_k)
+
+        dense_rows = {document_key(doc): i for i, doc in enumerate(candidates.documents)}
+        lexical_docs = {document_key(doc): doc for doc, _ in lexical_hits}
+        fused = reciprocal_rank_fusion(
+            [list(dense_rows), list(lexical_docs)],
+            k=hybrid_cfg.get("rrf_k", 10),
+            weights=[hybrid_cfg.get("dense_weight", 1.0), hybrid_cfg.get("lexical_weight", 2.0)],
+        )[:k]
+
+        # Lexical-only documents have no stored vector at hand: embed them (the embedding cache makes this cheap)
+        lexical_only = [key for key, _ in fused if key not in dense_rows]
+        extra = {}
+        if lexical_only:
+            texts = [lexical_docs[key].page_content for key in lexical_only]
+            similarities = candidates.query_similarity(self.vstore.embeddings.embed_documents(texts))
+            extra = dict(zip(lexical_only, similarities))
+
+        results = []
+        for key, _ in fused:
+            if key in dense_rows:
+                HYBRID_RESULTS.inc(source="both" if key in lexical_docs else "dense")
+                row = dense_rows[key]
+                results.append((candidates.documents[row], float(candidates.relevance[row])))
+            else:
+                HYBRID_RESULTS.inc(source="lexical")
+                results.append((lexical_docs[key], float(extra[key])))
+        return results
 
 if __name__=='__main__':
     retriever_obj = Retriever()
@@ -0,0 +1,55 @@
+import os
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+ASTRA, LOCAL = "astra", "local"
+ASTRA_ENV_VARS = ["ASTRA_DB_API_ENDPOINT", "ASTRA_DB_APPLICATION_TOKEN", "ASTRA_DB_KEYSPACE"]
+
+
+def vector_store_backend(config: dict) -> str:
+    """`vector_store.backend` from config.yaml: "astra" (default) or "local"."""
+    backend = config.get("vector_store", {}).get("backend", ASTRA)
+    if backend not in (ASTRA, LOCAL):
+        raise ValueError(f"Unknown vector_store.backend: {backend!r} (expected {ASTRA!r} or {LOCAL!r})")
+    return backend
+
+
+def required_env_vars(config: dict) -> list:
+    """Environment variables the configured backend needs, besides the embedding model key."""
+    return ASTRA_ENV_VARS if vector_store_backend(config) == ASTRA else []
+
+
+def load_vector_store(config: dict, embeddings: Embeddings) -> VectorStore:
+    """
+    Vector store of the product collection, as selected by `vector_store.backend`:
+    the Astra DB collection, or the in-process IVF index persisted under
+    `vector_store.local.path/<collection_name>`.
+    """
+    collection_name = config["astra_db"]["collection_name"]
+    if vector_store_backend(config) == LOCAL:
+        from prod_assistant.retriever.ivf_index import IVFVectorStore
+
+        local_cfg = config.get("vector_store", {}).get("local", {})
+        path = os.path.join(os.getcwd(), local_cfg.get("path", "data/vector_index"), collection_name)
+        log.info("Using local vector index", path=path)
+        return IVFVectorStore(
+            embeddings,
+            path=path,
+            nlist=local_cfg.get("nlist", 0),
+            nprobe=local_cfg.get("nprobe", 8),
+            min_train_size=local_cfg.get("min_train_size", 1024),
+            retrain_growth=local_cfg.get("retrain_growth", 2.0),
+        )
+
+    from langchain_astradb import AstraDBVectorStore
+
+    return AstraDBVectorStore(
+        embedding=embeddings,
+        collection_name=collection_name,
+        api_endpoint=os.getenv("ASTRA_DB_API_ENDPOINT"),
+        token=os.getenv("ASTRA_DB_APPLICATION_TOKEN"),
+        namespace=os.getenv("ASTRA_DB_KEYSPACE"),
+    )
@@ -0,0 +1,140 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict
+
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+QUEUE_DEPTH = METRICS.gauge(
+    "admission_queue_depth", "Requests waiting for an LLM provider slot.", ["provider"]
+)
+IN_FLIGHT = METRICS.gauge(
+    "admission_in_flight", "Requests currently holding an LLM provider slot.", ["provider"]
+)
+WAIT_SECONDS = METRICS.histogram(
+    "admission_wait_seconds", "Time spent queued before a provider slot was granted.", ["provider"]
+)
+REJECTIONS = METRICS.counter(
+    "admission_rejections_total", "Requests shed by admission control.", ["provider", "reason"]
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed; carries the HTTP status and Retry-After to return."""
+
+    def __init__(self, provider: str, status_code: int, retry_after: int, reason: str):
+        self.provider = provider
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+        super().__init__(f"{provider}: {reason}")
+
+
+class AdmissionTicket:
+    """A granted provider slot. release() is idempotent so it can be wired to several cleanup paths."""
+
+    def __init__(self, limiter: "ProviderLimiter"):
+        self._limiter = limiter
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._limiter._release()
+
+
+class ProviderLimiter:
+    """
+    Concurrency limit for one LLM provider with a bounded wait queue.
+
+    Up to `max_concurrency` requests run at once; up to `max_queue` more wait
+    for at most `queue_timeout` seconds. A full queue is rejected with 429, a
+    request whose queue deadline passes is rejected with 503.
+    """
+
+    def __init__(self, provider: str, max_concurrency: int, max_queue: int,
+                 queue_timeout: float, retry_after: int):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+
+    def _reject(self, status_code: int, reason: str):
+        REJECTIONS.inc(provider=self.provider, reason=reason)
+        log.warning("Request shed by admission control", provider=self.provider,
+                    reason=reason, waiting=self._waiting)
+        raise AdmissionRejected(self.provider, status_code, self.retry_after, reason)
+
+    async def acquire(self) -> AdmissionTicket:
+        if self._semaphore.locked() and self._waiting >= self.max_queue:
+            self._reject(429, "queue_full")
+
+        start = time.perf_counter()
+        self._waiting += 1
+        QUEUE_DEPTH.set(self._waiting, provider=self.provider)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._reject(503, "queue_timeout")
+        finally:
+            self._waiting -= 1
+            QUEUE_DEPTH.set(self._waiting, provider=self.provider)
+
+        WAIT_SECONDS.observe(time.perf_counter() - start, provider=self.provider)
+        IN_FLIGHT.inc(provider=self.provider)
+        return AdmissionTicket(self)
+
+    def _release(self):
+        IN_FLIGHT.dec(provider=self.provider)
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        ticket = await self.acquire()
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+
+class AdmissionController:
+    """
+    Per-provider limiters built from the `admission` block of config.yaml.
+
+    A request that may call several providers (the LLM router) is admitted
+    under the "+"-joined provider set, e.g. "google+openai". Unless the set
+    has its own `providers` entry, it gets the tightest limits of its members:
+    every request can end up on any of them, and a hedged call on two.
+    """
+
+    def __init__(self, config: dict):
+        admission_cfg = config.get("admission", {})
+        self.defaults = admission_cfg.get("default", {})
+        self.overrides = admission_cfg.get("providers", {}) or {}
+        self._limiters: Dict[str, ProviderLimiter] = {}
+
+    def settings(self, provider: str) -> dict:
+        if provider not in self.overrides and "+" in provider:
+            members = [self.settings(p) for p in provider.split("+")]
+            return {
+                "max_concurrency": min(m["max_concurrency"] for m in members),
+                "max_queue": min(m["max_queue"] for m in members),
+                "queue_timeout": min(m["queue_timeout"] for m in members),
+                "retry_after": max(m["retry_after"] for m in members),
+            }
+        cfg = {**self.defaults, **self.overrides.get(provider, {})}
+        return {
+            "max_concurrency": cfg.get("max_concurrency", 16),
+            "max_queue": cfg.get("max_queue", 64),
+            "queue_timeout": cfg.get("queue_timeout_seconds", 10),
+            "retry_after": cfg.get("retry_after_seconds", 2),
+        }
+
+    def limiter(self, provider: str) -> ProviderLimiter:
+        if provider not in self._limiters:
+            self._limiters[provider] = ProviderLimiter(provider, **self.settings(provider))
+        return self._limiters[provider]
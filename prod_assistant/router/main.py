@@ -1,15 +1,82 @@
 
+import asyncio
+import json
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
 import uvicorn
-from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Request, Response, Form, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from pydantic import BaseModel
 #from langchaincore.messages import HumanMessage
 from prod_assistant.workflow.agentic_workflow_with_mcp_websearch import AgenticRAG
+from prod_assistant.router.admission import AdmissionController, AdmissionRejected
+from prod_assistant.utils.config_loader import load_config
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.utils.deadline import Deadline
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+
+# ---------- Warm-up ----------
+async def _warm_up(app: FastAPI):
+    """Build the per-worker AgenticRAG once and discover MCP tools, retrying until the tool server answers."""
+    warmup_cfg = load_config().get("warmup", {})
+    max_attempts = warmup_cfg.get("max_attempts", 30)
+    retry_interval = warmup_cfg.get("retry_interval_seconds", 2)
+    build_timeout = warmup_cfg.get("build_timeout_seconds", 120)
+
+    start = time.perf_counter()
+    try:
+        # Config, SQLite caches and graph compile run in a worker thread, bounded by build_timeout
+        rag_agent = await asyncio.wait_for(
+            asyncio.to_thread(AgenticRAG, load_embeddings=False), timeout=build_timeout
+        )
+        # Created on the event loop thread: the Google embeddings gRPC aio client binds to the
+        # loop that exists at construction time, so building it in a worker thread breaks aembed_*
+        rag_agent.load_embeddings()
+    except asyncio.TimeoutError:
+        log.error("AgenticRAG initialization timed out", timeout_seconds=build_timeout)
+        app.state.warmup_error = f"AgenticRAG initialization timed out after {build_timeout}s"
+        return
+    except Exception as e:
+        log.error("AgenticRAG initialization failed", error=str(e))
+        app.state.warmup_error = str(e)
+        return
+    log.info("AgenticRAG built", duration_seconds=round(time.perf_counter() - start, 3))
+    app.state.rag_agent = rag_agent
+
+    for attempt in range(1, max_attempts + 1):
+        if await rag_agent._safe_async_init():
+            log.info("AgenticRAG warm-up complete", attempt=attempt,
+                     tools=[t.name for t in rag_agent.mcp_tools])
+            app.state.warmup_error = None
+            return
+        app.state.warmup_error = f"MCP tool discovery failed (attempt {attempt}/{max_attempts})"
+        await asyncio.sleep(retry_interval)
 
+    log.error("AgenticRAG warm-up gave up", error=app.state.warmup_error)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start warm-up in the background so the worker can answer /healthz while tools load."""
+    app.state.rag_agent = None
+    app.state.warmup_error = None
+    app.state.admission = AdmissionController(load_config())
+    warmup_task = asyncio.create_task(_warm_up(app))
+    try:
+        yield
+    finally:
+        warmup_task.cancel()
+
+
+app = FastAPI(lifespan=lifespan)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
@@ -22,34 +89,170 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# # Initialize AgenticRAG once at startup
-# rag_agent = AgenticRAG()
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    """Shed load fast: 429 when the provider queue is full, 503 when the queue deadline passed."""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": f"Assistant is busy ({exc.reason}), please retry"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+SESSION_COOKIE = "shopbuddy_session"
+
+
+def get_session_id(request) -> str:
+    """Conversation thread id of the caller, taken from the session cookie or freshly issued."""
+    return request.cookies.get(SESSION_COOKIE) or uuid.uuid4().hex
+
+
+def set_session_cookie(response: Response, session_id: str):
+    response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="lax")
+
+
+def get_limiter(rag_agent: AgenticRAG):
+    """Admission limiter of the LLM provider (or router provider set) the agent was built with."""
+    return app.state.admission.limiter(rag_agent.llm_provider)
+
+
+def request_deadline(rag_agent: AgenticRAG) -> float:
+    """End of this request's time budget, started on arrival so admission queueing counts against it."""
+    return Deadline.from_config(rag_agent.config).at
 
 
-# @app.on_event("startup")
-# async def startup_event():
-#     """Load MCP tools asynchronously when FastAPI starts."""
-#     await rag_agent.init_tools()
+def get_rag_agent() -> AgenticRAG:
+    """Return the warm agent, or fail fast while warm-up is still in progress."""
+    rag_agent = app.state.rag_agent
+    if rag_agent is None or not rag_agent.ready:
+        raise HTTPException(status_code=503, detail="Assistant is warming up",
+                            headers={"Retry-After": "2"})
+    return rag_agent
+
+
+# ---------- Health Endpoints ----------
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the worker process is up and serving HTTP."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: only report ready once the agent is built and MCP tools are loaded."""
+    rag_agent = app.state.rag_agent
+    if rag_agent is not None and rag_agent.ready:
+        return {"status": "ready", "tools": [t.name for t in rag_agent.mcp_tools]}
+    return JSONResponse(
+        status_code=503,
+        content={"status": "warming_up", "error": app.state.warmup_error},
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint for this worker's workflow, cache and admission metrics."""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
 
 # ---------- FastAPI Endpoints ----------
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
-    return templates.TemplateResponse("chat.html", {"request": request})
+    response = templates.TemplateResponse("chat.html", {"request": request})
+    set_session_cookie(response, get_session_id(request))
+    return response
 
 
 @app.post("/get", response_class=HTMLResponse)
-async def chat(msg: str = Form(...)):
+async def chat(request: Request, response: Response, msg: str = Form(...)):
     """Call the Agentic RAG workflow."""
-    rag_agent = AgenticRAG()
-    answer = await rag_agent.run(msg)   # run() already returns final answer string
-    print(f"Agentic Response: {answer}")
+    rag_agent = get_rag_agent()
+    deadline = request_deadline(rag_agent)
+    session_id = get_session_id(request)
+    set_session_cookie(response, session_id)
+    async with get_limiter(rag_agent).slot():
+        answer = await rag_agent.run(msg, thread_id=session_id, deadline=deadline)   # run() already returns final answer string
+    log.info("Agentic response", answer=answer)
     return answer
 
 
-# @app.post("/get", response_class=HTMLResponse)
-# async def chat(msg: str = Form(...)):
-#     """Call the Agentic RAG workflow."""
-#     # Await the async run() method
-#     answer = await rag_agent.run(msg)
-#     print(f"Agentic Response: {answer}")
-#     return answer
\ No newline at end of file
+@app.post("/get/stream")
+async def chat_stream(request: Request, msg: str = Form(...)):
+    """Stream node progress and answer tokens as Server-Sent Events."""
+    rag_agent = get_rag_agent()
+    deadline = request_deadline(rag_agent)
+    session_id = get_session_id(request)
+    # Admit before the response starts so a rejection can still be a 429/503
+    ticket = await get_limiter(rag_agent).acquire()
+
+    async def event_source():
+        try:
+            async for event in rag_agent.astream(msg, thread_id=session_id, deadline=deadline):
+                yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            log.error("Streaming response failed", error=str(e))
+            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+        finally:
+            ticket.release()
+
+    response = StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(ticket.release),
+    )
+    set_session_cookie(response, session_id)
+    return response
+
+
+class BatchRequest(BaseModel):
+    queries: List[str]
+    concurrency: Optional[int] = None
+
+
+@app.post("/get/batch")
+async def chat_batch(request: BatchRequest):
+    """Answer a list of queries concurrently and stream results back as NDJSON, in completion order."""
+    rag_agent = get_rag_agent()
+    batch_cfg = load_config().get("batch", {})
+    max_queries = batch_cfg.get("max_queries", 5000)
+    max_concurrency = batch_cfg.get("max_concurrency", 8)
+
+    if len(request.queries) > max_queries:
+        raise HTTPException(status_code=413, detail=f"At most {max_queries} queries per batch")
+    concurrency = min(request.concurrency or max_concurrency, max_concurrency)
+
+    async def results():
+        async for result in rag_agent.run_many(request.queries, concurrency=concurrency,
+                                               guard=get_limiter(rag_agent).slot):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@app.websocket("/ws")
+async def chat_ws(websocket: WebSocket):
+    """WebSocket variant of /get/stream: each text frame is a question, answered with JSON events."""
+    await websocket.accept()
+    session_id = get_session_id(websocket)
+    try:
+        while True:
+            msg = await websocket.receive_text()
+            rag_agent = app.state.rag_agent
+            if rag_agent is None or not rag_agent.ready:
+                await websocket.send_json({"type": "error", "message": "Assistant is warming up"})
+                continue
+            deadline = request_deadline(rag_agent)
+            try:
+                async with get_limiter(rag_agent).slot():
+                    async for event in rag_agent.astream(msg, thread_id=session_id, deadline=deadline):
+                        await websocket.send_json(event)
+            except AdmissionRejected as e:
+                await websocket.send_json({"type": "error", "message": "Assistant is busy, please retry",
+                                           "retry_after": e.retry_after})
+            except Exception as e:
+                log.error("WebSocket response failed", error=str(e))
+                await websocket.send_json({"type": "error", "message": str(e)})
+    except WebSocketDisconnect:
+        pass
@@ -0,0 +1,64 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime, timezone
+from prod_assistant.utils.config_loader import load_config
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+
+class CollectionVersion:
+    """
+    Version stamp of a vector collection, persisted as a small JSON file.
+    DataIngestion bumps it after every successful ingestion; caches compare
+    it on lookup and drop their entries when it changes.
+    """
+
+    def __init__(self, collection_name: str | None = None, path: str | None = None):
+        config = load_config()
+        version_cfg = config.get("collection_version", {})
+        self.collection_name = collection_name or config["astra_db"]["collection_name"]
+        self.path = path or os.path.join(os.getcwd(), version_cfg.get("path", "data/collection_version.json"))
+        self.check_interval = version_cfg.get("check_interval_seconds", 5)
+        self._lock = threading.Lock()
+        self._cached_version = None
+        self._checked_at = 0.0
+
+    def _read_all(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            log.warning("Unreadable collection version file", path=self.path, error=str(e))
+            return {}
+
+    def current(self) -> int:
+        """Return the current version, re-reading the stamp file at most every check_interval seconds."""
+        now = time.monotonic()
+        with self._lock:
+            if self._cached_version is None or now - self._checked_at >= self.check_interval:
+                entry = self._read_all().get(self.collection_name, {})
+                self._cached_version = int(entry.get("version", 0))
+                self._checked_at = now
+            return self._cached_version
+
+    def bump(self) -> int:
+        """Increment the version after a successful ingestion and return the new value."""
+        with self._lock:
+            stamps = self._read_all()
+            version = int(stamps.get(self.collection_name, {}).get("version", 0)) + 1
+            stamps[self.collection_name] = {
+                "version": version,
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            }
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(stamps, f, indent=2)
+            os.replace(tmp_path, self.path)  # atomic swap so readers never see a partial file
+            self._cached_version = version
+            self._checked_at = time.monotonic()
+        log.info("Collection version bumped", collection=self.collection_name, version=version)
+        return version
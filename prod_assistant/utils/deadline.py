@@ -0,0 +1,93 @@
+import asyncio
+import time
+from typing import Optional
+
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+DEADLINE_EXCEEDED = METRICS.counter(
+    "deadline_exceeded_total", "Request steps cut off because the request deadline was reached.", ["step"]
+)
+DEADLINE_SKIPPED = METRICS.counter(
+    "deadline_skipped_steps_total", "Optional request steps skipped for lack of remaining budget.", ["step"]
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    """A step ran out of the request's remaining time budget."""
+
+
+def _discard_result(task: asyncio.Task):
+    if not task.cancelled():
+        task.exception()
+
+
+class Deadline:
+    """
+    Absolute end time of one request.
+
+    The router creates it when the request arrives; the graph carries it in
+    state as a plain timestamp (`at`), and every step gets whatever is left
+    as its timeout. `reserve` is the share kept back for the answer, so
+    optional steps stop in time for the Generator to run.
+    """
+
+    def __init__(self, at: float, reserve: float = 0.0):
+        self.at = at
+        self.reserve = reserve
+
+    @classmethod
+    def after(cls, seconds: float, reserve: float = 0.0) -> "Deadline":
+        return cls(time.time() + seconds, reserve)
+
+    @classmethod
+    def from_config(cls, config: dict, at: Optional[float] = None) -> "Deadline":
+        """Deadline at `at`, or a fresh one with the configured request budget."""
+        deadline_cfg = config.get("deadline", {})
+        reserve = deadline_cfg.get("answer_reserve_seconds", 4)
+        if at is not None:
+            return cls(at, reserve)
+        return cls.after(deadline_cfg.get("request_budget_seconds", 30), reserve)
+
+    def remaining(self) -> float:
+        return max(0.0, self.at - time.time())
+
+    def optional_budget(self) -> float:
+        """Time an optional step may use without eating into the answer reserve."""
+        return max(0.0, self.remaining() - self.reserve)
+
+    def allows(self, step: str, min_seconds: float) -> bool:
+        """Whether an optional step that needs `min_seconds` still fits; counts the skip when it does not."""
+        if self.optional_budget() >= min_seconds:
+            return True
+        DEADLINE_SKIPPED.inc(step=step)
+        log.info("Skipping step, request deadline too close", step=step,
+                 remaining_ms=round(self.remaining() * 1000), needed_ms=round((min_seconds + self.reserve) * 1000))
+        return False
+
+    async def run(self, step: str, coro, optional: bool = False, leave: float = 0.0):
+        """
+        Await `coro` with the remaining budget as its timeout, minus the answer
+        reserve when `optional` and minus `leave` seconds kept for the steps
+        after it. Raises DeadlineExceeded when time runs out; the step is
+        cancelled without waiting for its cleanup.
+        """
+        timeout = (self.optional_budget() if optional else self.remaining()) - leave
+        if timeout <= 0:
+            coro.close()
+            DEADLINE_EXCEEDED.inc(step=step)
+            raise DeadlineExceeded(f"{step}: no time budget left")
+
+        task = asyncio.ensure_future(coro)
+        try:
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+        finally:
+            if not task.done():
+                task.cancel()
+                # Some clients turn the cancellation into their own error (e.g. the MCP adapter)
+                task.add_done_callback(_discard_result)
+        if not done:
+            DEADLINE_EXCEEDED.inc(step=step)
+            log.warning("Step cut off by request deadline", step=step, timeout_ms=round(timeout * 1000))
+            raise DeadlineExceeded(f"{step} exceeded its {timeout:.2f}s budget")
+        return task.result()
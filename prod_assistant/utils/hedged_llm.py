@@ -0,0 +1,290 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+PROVIDER_LATENCY = METRICS.histogram(
+    "llm_provider_latency_seconds", "LLM latency per provider (full answer for invoke, first token for stream).",
+    ["provider", "kind"]
+)
+PROVIDER_OUTCOMES = METRICS.counter(
+    "llm_provider_requests_total", "LLM provider requests by outcome (won, lost, failed).",
+    ["provider", "kind", "outcome"]
+)
+HEDGES = METRICS.counter(
+    "llm_hedged_requests_total", "Hedged requests sent to a second provider after the hedge delay.", ["kind"]
+)
+PROVIDER_HEALTHY = METRICS.gauge(
+    "llm_provider_healthy", "1 while a provider is healthy, 0 during its failure cooldown.", ["provider"]
+)
+
+INVOKE, STREAM = "invoke", "stream"
+# Inner models must not report to the caller's callbacks: their events (and streamed
+# tokens) would show up twice in astream_events next to the wrapper's own
+_NO_CALLBACKS = {"callbacks": []}
+
+
+def _discard_result(task: asyncio.Task):
+    if not task.cancelled():
+        task.exception()
+
+
+class ProviderStats:
+    """Rolling latency windows (per call kind) and failure health of one provider."""
+
+    def __init__(self, window: int = 200, failure_threshold: int = 3, cooldown_seconds: float = 30.0):
+        self.window = window
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.latencies: Dict[str, deque] = {}
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    def samples(self, kind: str) -> int:
+        return len(self.latencies.get(kind, ()))
+
+    def percentile(self, kind: str, q: float) -> Optional[float]:
+        samples = self.latencies.get(kind)
+        return float(np.percentile(samples, q)) if samples else None
+
+    def record_latency(self, kind: str, seconds: float):
+        self.latencies.setdefault(kind, deque(maxlen=self.window)).append(seconds)
+
+    def record_success(self):
+        self.consecutive_failures = 0
+
+    def record_failure(self) -> bool:
+        """Count a failure; True when it starts a cooldown."""
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.failure_threshold and self.healthy:
+            self.unhealthy_until = time.monotonic() + self.cooldown_seconds
+            return True
+        return False
+
+
+class HedgedChatModel(BaseChatModel):
+    """
+    Chat model over several providers (the `llm.<provider>` config blocks).
+
+    Providers are ranked healthy first, then by median latency (unmeasured
+    ones keep their config order and are tried first so they get measured).
+    A call goes to the top provider; if it has not answered after the hedge
+    delay - the provider's rolling p`hedge_percentile` latency, clamped to
+    [hedge_min_delay, hedge_max_delay] - the next provider gets the same
+    request and the first answer wins. Errors fail over to the next provider;
+    `failure_threshold` consecutive errors put a provider in cooldown.
+
+    Streaming hedges on time-to-first-token; once tokens flow, the stream is
+    committed to that provider. The sync path only fails over.
+
+    The response cache belongs to the wrapper (`cache=`), not to the wrapped
+    models: LangChain checks it before both `_agenerate` and `_astream`, while
+    the wrapped models are reached through `ainvoke`/`astream`, and `astream`
+    never looks at a cache. The cache key covers every provider's model and
+    parameters.
+    """
+
+    models: Dict[str, BaseChatModel]
+    hedge: bool = True
+    hedge_percentile: float = 95.0
+    hedge_min_delay: float = 0.25
+    hedge_max_delay: float = 10.0
+    # Delay used until a provider has min_samples measurements
+    initial_hedge_delay: float = 2.0
+    min_samples: int = 5
+    window: int = 200
+    failure_threshold: int = 3
+    cooldown_seconds: float = 30.0
+
+    _stats: Dict[str, ProviderStats] = PrivateAttr(default_factory=dict)
+    _provider_params: Dict[str, str] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        self._stats = {
+            name: ProviderStats(self.window, self.failure_threshold, self.cooldown_seconds) for name in self.models
+        }
+        for name in self.models:
+            PROVIDER_HEALTHY.set(1, provider=name)
+        # Part of the cache key: swapping a provider's model or temperature is a miss
+        self._provider_params = {name: model._get_llm_string() for name, model in self.models.items()}
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged-multi-provider"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"providers": self._provider_params}
+
+    def stats(self, provider: str) -> ProviderStats:
+        return self._stats[provider]
+
+    def ranked(self, kind: str = INVOKE) -> List[str]:
+        """Providers in the order they would be tried."""
+        def key(indexed):
+            position, name = indexed
+            stats = self._stats[name]
+            measured = stats.samples(kind) >= self.min_samples
+            median = stats.percentile(kind, 50) if measured else 0.0
+            return (not stats.healthy, median, position)
+        return [name for _, name in sorted(enumerate(self.models), key=key)]
+
+    def hedge_delay(self, provider: str, kind: str = INVOKE) -> float:
+        stats = self._stats[provider]
+        if stats.samples(kind) < self.min_samples:
+            return self.initial_hedge_delay
+        delay = stats.percentile(kind, self.hedge_percentile)
+        return min(max(delay, self.hedge_min_delay), self.hedge_max_delay)
+
+    def _record_success(self, provider: str, kind: str, seconds: float):
+        self._stats[provider].record_success()
+        self._stats[provider].record_latency(kind, seconds)
+        PROVIDER_LATENCY.observe(seconds, provider=provider, kind=kind)
+        PROVIDER_OUTCOMES.inc(provider=provider, kind=kind, outcome="won")
+        PROVIDER_HEALTHY.set(1, provider=provider)
+
+    def _record_failure(self, provider: str, kind: str, error: BaseException):
+        PROVIDER_OUTCOMES.inc(provider=provider, kind=kind, outcome="failed")
+        if self._stats[provider].record_failure():
+            PROVIDER_HEALTHY.set(0, provider=provider)
+            log.warning("LLM provider in cooldown", provider=provider, cooldown_seconds=self.cooldown_seconds)
+        log.warning("LLM provider failed, failing over", provider=provider, kind=kind, error=str(error))
+
+    async def _race(self, kind: str, start: Callable[[str], Awaitable],
+                    release: Optional[Callable[[Any], Awaitable]] = None):
+        """
+        Run `start(provider)` with hedging and failover; returns (provider, result)
+        of the first success. `release` disposes of results that lost the race.
+        """
+        queue = self.ranked(kind)
+        pending: Dict[asyncio.Task, tuple] = {}
+        hedged = False
+        last_error: Optional[BaseException] = None
+
+        def launch():
+            name = queue.pop(0)
+            pending[asyncio.create_task(start(name))] = (name, time.perf_counter())
+            return name
+
+        current = launch()
+        try:
+            while pending:
+                timeout = None
+                if self.hedge and not hedged and queue:
+                    timeout = self.hedge_delay(current, kind)
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    HEDGES.inc(kind=kind)
+                    log.info("Hedging LLM request", slow_provider=current, hedge_provider=queue[0],
+                             after_ms=round(timeout * 1000, 1))
+                    launch()
+                    continue
+
+                winner = None
+                for task in done:
+                    name, started = pending.pop(task)
+                    if task.cancelled() or task.exception() is not None:
+                        last_error = task.exception() if not task.cancelled() else asyncio.CancelledError()
+                        self._record_failure(name, kind, last_error)
+                    elif winner is None:
+                        winner = (name, task.result())
+                        self._record_success(name, kind, time.perf_counter() - started)
+                    elif release is not None:
+                        await release(task.result())
+                if winner is not None:
+                    return winner
+                if not pending and queue:
+                    current = launch()
+            raise last_error or RuntimeError("No LLM provider configured")
+        finally:
+            for task, (name, started) in pending.items():
+                # The loser took at least this long: keep it in the window so a provider
+                # that is always out-raced still shows its slowdown
+                self._stats[name].record_latency(kind, time.perf_counter() - started)
+                PROVIDER_OUTCOMES.inc(provider=name, kind=kind, outcome="lost")
+                task.cancel()
+                task.add_done_callback(_discard_result)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        async def call(name: str):
+            return await self.models[name].ainvoke(messages, config=_NO_CALLBACKS, stop=stop, **kwargs)
+
+        _, message = await self._race(INVOKE, call)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        async def first_chunk(name: str):
+            stream = self.models[name].astream(messages, config=_NO_CALLBACKS, stop=stop, **kwargs)
+            try:
+                return stream, await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, None
+            except BaseException:
+                await stream.aclose()
+                raise
+
+        async def release(result):
+            await result[0].aclose()
+
+        _, (stream, first) = await self._race(STREAM, first_chunk, release)
+        try:
+            if first is None:
+                return
+            chunk = first
+            while True:
+                generation = ChatGenerationChunk(message=chunk)
+                if run_manager:
+                    await run_manager.on_llm_new_token(str(chunk.content), chunk=generation)
+                yield generation
+                try:
+                    chunk = await stream.__anext__()
+                except StopAsyncIteration:
+                    return
+        finally:
+            await stream.aclose()
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        # Sync callers get failover only: hedging needs the event loop
+        last_error: Optional[BaseException] = None
+        for name in self.ranked(INVOKE):
+            started = time.perf_counter()
+            try:
+                message = self.models[name].invoke(messages, config=_NO_CALLBACKS, stop=stop, **kwargs)
+            except Exception as e:
+                last_error = e
+                self._record_failure(name, INVOKE, e)
+                continue
+            self._record_success(name, INVOKE, time.perf_counter() - started)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        raise last_error or RuntimeError("No LLM provider configured")
+
+    @classmethod
+    def from_config(cls, config: dict, models: Dict[str, BaseChatModel], cache=None) -> "HedgedChatModel":
+        router_cfg = config.get("llm_router", {})
+        return cls(
+            models=models,
+            cache=cache,
+            hedge=router_cfg.get("hedge", True),
+            hedge_percentile=router_cfg.get("hedge_percentile", 95),
+            hedge_min_delay=router_cfg.get("hedge_min_delay_ms", 250) / 1000,
+            hedge_max_delay=router_cfg.get("hedge_max_delay_ms", 10000) / 1000,
+            initial_hedge_delay=router_cfg.get("initial_hedge_delay_ms", 2000) / 1000,
+            min_samples=router_cfg.get("min_samples", 5),
+            window=router_cfg.get("window", 200),
+            failure_threshold=router_cfg.get("failure_threshold", 3),
+            cooldown_seconds=router_cfg.get("cooldown_seconds", 30),
+        )
@@ -9,6 +9,9 @@ from langchain_groq import ChatGroq
 from tavily import TavilyClient
 from prod_assistant.logger import GLOBAL_LOGGER as log
 from prod_assistant.exception.custom_exception import ProductAssistantException
+from prod_assistant.cache.llm_cache import get_llm_cache
+from prod_assistant.cache.embedding_cache import cached_embeddings
+from prod_assistant.utils.hedged_llm import HedgedChatModel
 import asyncio
 
 
@@ -114,40 +117,80 @@ class ModelLoader:
             except RuntimeError:
                 asyncio.set_event_loop(asyncio.new_event_loop())
 
-            return GoogleGenerativeAIEmbeddings(
+            embeddings = GoogleGenerativeAIEmbeddings(
                 model=model_name,
                 google_api_key=self.api_key_mgr.get("GOOGLE_API_KEY") # type: ignore
             )
+            # Memory + SQLite tiers in front of the API (unchanged when embedding_cache is disabled)
+            return cached_embeddings(self.config, embeddings, model_name)
         except Exception as e:
             log.error("Error loading embedding model", error=str(e))
             raise ProductAssistantException("Failed to load embedding model", sys)
 
 
+    def get_provider_key(self) -> str:
+        """
+        Return the key of the `llm` config block selected through LLM_PROVIDER.
+        """
+        return os.getenv("LLM_PROVIDER", "openai")
+
+    def get_admission_key(self, llm) -> str:
+        """
+        Provider(s) the LLM may call, as admission control keys them: the
+        LLM_PROVIDER key, or the "+"-joined provider set behind the LLM router.
+        """
+        if isinstance(llm, HedgedChatModel):
+            return "+".join(sorted(llm.models))
+        return self.get_provider_key()
+
     def load_llm(self):
         """
         Load and return the configured LLM model.
+
+        With `llm_router.enabled`, the LLM_PROVIDER block and the other
+        `llm_router.providers` are wrapped in a HedgedChatModel.
         """
         llm_block = self.config["llm"]
-        provider_key = os.getenv("LLM_PROVIDER", "openai")
+        provider_key = self.get_provider_key()
 
         if provider_key not in llm_block:
             log.error("LLM provider not found in config", provider=provider_key)
             raise ValueError(f"LLM provider '{provider_key}' not found in config")
 
-        llm_config = llm_block[provider_key]
+        # Persistent response cache (None: disabled or bypassed)
+        cache = get_llm_cache(self.config)
+
+        router_cfg = self.config.get("llm_router", {})
+        if router_cfg.get("enabled", False):
+            # LLM_PROVIDER stays the first choice until latencies say otherwise
+            keys = [provider_key] + [k for k in router_cfg.get("providers", []) if k != provider_key]
+            missing = [k for k in keys if k not in llm_block]
+            if missing:
+                log.error("LLM router providers not found in config", providers=missing)
+                raise ValueError(f"LLM router providers {missing} not found in config")
+            if len(keys) > 1:
+                log.info("Loading hedged LLM router", providers=keys)
+                # The router owns the cache: streamed calls to the wrapped models would bypass theirs
+                models = {k: self._build_llm(llm_block[k], False) for k in keys}
+                return HedgedChatModel.from_config(self.config, models, cache=cache)
+
+        return self._build_llm(llm_block[provider_key], cache)
+
+    def _build_llm(self, llm_config: dict, cache):
         provider = llm_config.get("provider")
         model_name = llm_config.get("model_name")
         temperature = llm_config.get("temperature", 0.2)
         max_tokens = llm_config.get("max_output_tokens", 2048)
 
-        log.info("Loading LLM", provider=provider, model=model_name)
+        log.info("Loading LLM", provider=provider, model=model_name, cache=bool(cache))
 
         if provider == "google":
             return ChatGoogleGenerativeAI(
                 model=model_name,
                 google_api_key=self.api_key_mgr.get("GOOGLE_API_KEY"),
                 temperature=temperature,
-                max_output_tokens=max_tokens
+                max_output_tokens=max_tokens,
+                cache=cache,
             )
 
         elif provider == "groq":
@@ -155,6 +198,7 @@ class ModelLoader:
                 model=model_name,
                 api_key=self.api_key_mgr.get("GROQ_API_KEY"), #type: ignore
                 temperature=temperature,
+                cache=cache,
             )
 
         elif provider == "openai":
@@ -162,7 +206,7 @@ class ModelLoader:
                 model=model_name,
                 api_key=self.api_key_mgr.get("OPENAI_API_KEY"),
                 temperature=temperature,
-                
+                cache=cache,
             )
 
         else:
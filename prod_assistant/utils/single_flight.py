@@ -0,0 +1,57 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, TypeVar
+
+from prod_assistant.utils.metrics import METRICS
+
+T = TypeVar("T")
+
+SINGLE_FLIGHT_CALLS = METRICS.counter(
+    "single_flight_calls_total",
+    "Calls entering a single-flight group; role=leader executed, role=follower shared the leader's result.",
+    ["group", "role"],
+)
+SINGLE_FLIGHT_INFLIGHT = METRICS.gauge(
+    "single_flight_inflight", "Distinct keys currently executing in a single-flight group.", ["group"]
+)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent async calls that share a key into one execution.
+
+    The first caller for a key (the leader) starts the work as a task; every
+    caller that arrives while it is still running (followers) awaits the same
+    task and receives the same result or exception. The task is shielded, so a
+    caller that disconnects does not cancel the work for the others.
+    """
+
+    def __init__(self, group: str):
+        self.group = group
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._done(key, t))
+            SINGLE_FLIGHT_CALLS.inc(group=self.group, role="leader")
+            SINGLE_FLIGHT_INFLIGHT.set(len(self._inflight), group=self.group)
+        else:
+            SINGLE_FLIGHT_CALLS.inc(group=self.group, role="follower")
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        SINGLE_FLIGHT_INFLIGHT.set(len(self._inflight), group=self.group)
+        if not task.cancelled():
+            task.exception()  # mark as retrieved even if every caller went away
+
+    def stats(self) -> dict:
+        """Executions performed vs. executions saved by sharing an in-flight result."""
+        return {
+            "executions": SINGLE_FLIGHT_CALLS.value(group=self.group, role="leader"),
+            "saved": SINGLE_FLIGHT_CALLS.value(group=self.group, role="follower"),
+            "inflight": len(self._inflight),
+        }
@@ -0,0 +1,108 @@
+import math
+import re
+import unicodedata
+from typing import Optional
+
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to a character estimate
+    tiktoken = None
+
+_WHITESPACE = re.compile(r"\s+")
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Rupee markers, rewritten to a single " inr" after the amount
+_CURRENCY = re.compile(r"₹|\brs\.?(?=\s*\d)|\brupees?\b|/-")
+_AMOUNT = re.compile(
+    r"(?<![\w.])(\d+(?:,\d+)*(?:\.\d+)?)\s*(lakhs?|lacs?|crores?|cr|thousand|k)?(?!\w)"
+)
+_UNITS = {"lakh": 100_000, "lakhs": 100_000, "lac": 100_000, "lacs": 100_000,
+          "crore": 10_000_000, "crores": 10_000_000, "cr": 10_000_000, "thousand": 1_000, "k": 1_000}
+_PRICE_DIGITS = re.compile(r"\d+(?:,\d+)*(?:\.\d+)?")
+# "k" is only a thousand next to a price word ("under 50k", "50k inr"), not in "8k video"
+_PRICE_CONTEXT = re.compile(
+    r"(under|below|above|over|within|around|upto|from|to|budget( of)?|inr|price|between|between\s+\S+\s+and|"
+    r"(\dk|inr|inr\s*[\d,.]+)\s*(and|-))\s*$"
+)
+# ...or as the low end of a range whose high end is a "k" amount ("20k to 30k")
+_RANGE_TO_K = re.compile(r"\s*(to|-|and)\s*\d+(?:\.\d+)?\s*k(?!\w)")
+
+# Words that appear in nearly every shopping question and say nothing about which product is meant
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "of", "for", "to", "in", "on", "and", "or", "with", "me", "my",
+    "i", "you", "it", "this", "that", "what", "which", "how", "about", "can", "do", "does", "show", "tell",
+    "give", "suggest", "some", "any", "under", "below", "above", "best", "good", "worth", "buy", "buying",
+    "price", "prices", "cost", "review", "reviews", "rating", "product", "products", "phone", "phones",
+    "mobile", "mobiles", "inr", "rs",
+}
+
+
+def normalize_query(text: str) -> str:
+    """
+    Canonical form of a user query for cache and de-duplication keys:
+    Unicode NFKC, lowercase, collapsed whitespace, no trailing punctuation.
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = _WHITESPACE.sub(" ", text).strip()
+    return text.rstrip("?!. ")
+
+
+def normalize_amounts(text: str) -> str:
+    """
+    Rewrite rupee amounts in lowercase `text` to plain integers followed by
+    "inr": "₹1,00,000", "rs. 100000", "1 lakh", "under 100k" and
+    "under 1,00,000" all become "100000 inr". Other numbers ("256 gb",
+    "8k video") are left alone.
+    """
+    text = _CURRENCY.sub(" inr ", text)
+
+    def amount(match: re.Match) -> str:
+        number, unit = match.group(1), match.group(2)
+        price_context = (_PRICE_CONTEXT.search(text[:match.start()]) is not None
+                         or (unit == "k" and _RANGE_TO_K.match(text, match.end()) is not None))
+        if unit == "k" and not (price_context or text[match.end():].lstrip().startswith("inr")):
+            return match.group(0)
+        value = float(number.replace(",", "")) * _UNITS.get(unit or "", 1)
+        formatted = f"{value:.0f}" if value == int(value) else f"{value:g}"
+        # Lakh / crore / k amounts and four-digit figures after a price word are rupees
+        return f"{formatted} inr" if unit or (price_context and value >= 1000) else formatted
+
+    text = _AMOUNT.sub(amount, text)
+    # "inr 50000" -> "50000 inr", then drop repeated markers ("50000 inr inr")
+    text = re.sub(r"\binr\s+(\d+)\b", r"\1 inr", text)
+    text = re.sub(r"\binr(\s+inr\b)+", "inr", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def parse_price_inr(value) -> Optional[int]:
+    """Rupee price as an integer ("₹74,999" -> 74999), or None when there is no amount (NaN, "N/A")."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, (int, float)):
+        return int(round(value))
+    match = _PRICE_DIGITS.search(str(value))
+    return int(round(float(match.group(0).replace(",", "")))) if match else None
+
+
+def content_tokens(text: str) -> set:
+    """Lowercase alphanumeric tokens of `text` without STOPWORDS."""
+    return {t for t in _TOKEN.findall((text or "").lower()) if t not in STOPWORDS}
+
+
+class TokenCounter:
+    """tiktoken count when tiktoken is installed, otherwise ~4 characters per token."""
+
+    def __init__(self, encoding: str = "cl100k_base"):
+        self._encoding = None
+        if tiktoken is not None:
+            try:
+                self._encoding = tiktoken.get_encoding(encoding)
+            except Exception as e:  # unknown encoding, or its BPE file cannot be downloaded
+                log.warning("tiktoken encoding unavailable, estimating tokens", encoding=encoding, error=str(e))
+
+    def __call__(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        return math.ceil(len(text) / 4)
@@ -5,12 +5,14 @@ from langchain_core.output_parsers import StrOutputParser
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 
-from prod_assistant.prompt_library.prompts import PROMPT_REGISTRY, PromptType
+from prod_assistant.prompt_library.prompts import CHAIN_REGISTRY, PromptType
 #from prompt_library.prompts import PROMPT_REGISTRY, PromptType
 from prod_assistant.retriever.retrieval import Retriever
+from prod_assistant.retriever.context_packer import ContextPacker
 from prod_assistant.utils.model_loader import ModelLoader
 from prod_assistant.utils.model_loader import TavilyClientManager
 from langgraph.checkpoint.memory import MemorySaver
+from prod_assistant.workflow.instrumentation import instrument_node, instrument_router
 
 
 
@@ -27,13 +29,17 @@ class AgenticRAG:
         self.llm = self.model_loader.load_llm()
         self.tavily_manager = TavilyClientManager()
         self.checkpointer = MemorySaver()
+        packer_cfg = self.model_loader.config.get("context_packer", {})
+        self.context_packer = ContextPacker.from_config(self.model_loader.config) if packer_cfg.get("enabled", False) else None
         self.workflow = self._build_workflow()
         self.app = self.workflow.compile(checkpointer=self.checkpointer)
 
     # ---------- Helpers ----------
-    def _format_docs(self, docs) -> str:
+    def _format_docs(self, docs, query: str = "") -> str:
         if not docs:
             return "No relevant documents found."
+        if self.context_packer:
+            return self.context_packer.pack(query, docs)
         formatted_chunks = []
         for d in docs:
             meta = d.metadata or {}
@@ -56,10 +62,7 @@ class AgenticRAG:
         if any(word in last_message.lower() for word in ["price", "review", "product"]):
             return {"messages": [HumanMessage(content="TOOL: retriever")]}
         else:
-            prompt = ChatPromptTemplate.from_template(
-                "You are a helpful assistant. Answer the user directly.\n\nQuestion: {question}\nAnswer:"
-            )
-            chain = prompt | self.llm | StrOutputParser()
+            chain = CHAIN_REGISTRY.chain(PromptType.ASSISTANT, self.llm)
             response = chain.invoke({"question": last_message})
             return {"messages": [HumanMessage(content=response)]}
 
@@ -72,7 +75,7 @@ class AgenticRAG:
         if not docs:
             return {"messages": [HumanMessage(content="No relevant documents found.")]}
 
-        context = self._format_docs(docs)
+        context = self._format_docs(docs, query)
         return {"messages": [HumanMessage(content=context)]}
     
     def _tavily_search(self, state: AgentState):
@@ -157,12 +160,7 @@ class AgenticRAG:
         question = state["messages"][0].content
         docs = state["messages"][-1].content
 
-        prompt = PromptTemplate(
-            template="""You are a grader. Question: {question}\nDocs: {docs}\n
-            Are docs relevant to the question? Answer yes or no.""",
-            input_variables=["question", "docs"],
-        )
-        chain = prompt | self.llm | StrOutputParser()
+        chain = CHAIN_REGISTRY.chain(PromptType.GRADER, self.llm)
         score = chain.invoke({"question": question, "docs": docs})
         return "generator" if "yes" in score.lower() else "rewriter"
 
@@ -180,10 +178,7 @@ class AgenticRAG:
         print("--- GENERATE ---")
         question = state["messages"][0].content
         docs = state["messages"][-1].content
-        prompt = ChatPromptTemplate.from_template(
-            PROMPT_REGISTRY[PromptType.PRODUCT_BOT].template
-        )
-        chain = prompt | self.llm | StrOutputParser()
+        chain = CHAIN_REGISTRY.chain(PromptType.PRODUCT_BOT, self.llm)
         response = chain.invoke({"context": docs, "question": question})
         return {"messages": [HumanMessage(content=response)]}
 
@@ -257,21 +252,23 @@ class AgenticRAG:
 
 
     def _build_workflow(self):
+        graph = "agentic_rag"
         workflow = StateGraph(self.AgentState)
-        workflow.add_node("Assistant", self._ai_assistant)
-        workflow.add_node("Retriever", self._vector_retriever)
-        workflow.add_node("Generator", self._generate)
-        workflow.add_node("Rewriter", self._rewrite)
+        workflow.add_node("Assistant", instrument_node(graph, "Assistant", self._ai_assistant))
+        workflow.add_node("Retriever", instrument_node(graph, "Retriever", self._vector_retriever))
+        workflow.add_node("Generator", instrument_node(graph, "Generator", self._generate))
+        workflow.add_node("Rewriter", instrument_node(graph, "Rewriter", self._rewrite))
 
         workflow.add_edge(START, "Assistant")
         workflow.add_conditional_edges(
             "Assistant",
-            lambda state: "Retriever" if "TOOL" in state["messages"][-1].content else END,
+            instrument_router(graph, "assistant_router",
+                              lambda state: "Retriever" if "TOOL" in state["messages"][-1].content else END),
             {"Retriever": "Retriever", END: END},
         )
         workflow.add_conditional_edges(
             "Retriever",
-            self._grade_documents,
+            instrument_router(graph, "grader", self._grade_documents),
             {"generator": "Generator", "rewriter": "Rewriter"},
         )
         workflow.add_edge("Generator", END)
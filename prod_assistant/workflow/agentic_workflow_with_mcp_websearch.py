@@ -1,29 +1,113 @@
-from typing import Annotated, Sequence, TypedDict, Literal
+from typing import Annotated, Sequence, TypedDict, Literal, List, Optional
 from langchain_core.messages import BaseMessage, HumanMessage
-from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
-from langgraph.checkpoint.memory import MemorySaver
 
-from prod_assistant.prompt_library.prompts import PROMPT_REGISTRY, PromptType
+from prod_assistant.prompt_library.prompts import CHAIN_REGISTRY, PromptType
 from prod_assistant.retriever.retrieval import Retriever
+from prod_assistant.retriever.query_constraints import QueryConstraints
 from prod_assistant.utils.model_loader import ModelLoader
 from prod_assistant.evaluation.ragas_eval import evaluate_context_precision, evaluate_response_relevancy
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.utils.collection_version import CollectionVersion
+from prod_assistant.cache.semantic_cache import SemanticCache
+from prod_assistant.cache.embedding_cache import aembed_queries
+from prod_assistant.utils.single_flight import SingleFlight
+from prod_assistant.utils.text_utils import normalize_query
+from prod_assistant.utils.deadline import Deadline, DeadlineExceeded
+from prod_assistant.workflow.instrumentation import instrument_node, instrument_router
+from prod_assistant.workflow.memory import BoundedMemorySaver
+from prod_assistant.workflow.speculation import Speculation
+from prod_assistant.workflow.relevance_gate import RelevanceGate, parse_context
+from prod_assistant.workflow.intent_router import IntentRouter, PRODUCT_INTENTS, keyword_intent
+from prod_assistant.workflow.query_normalizer import QUERY_REWRITES, QueryNormalizer, RewriteCache
+from prod_assistant.logger import GLOBAL_LOGGER as log
 from langchain_mcp_adapters.client import MultiServerMCPClient
 import asyncio
+import os
+import time
+import uuid
+
+TTFT_SECONDS = METRICS.histogram(
+    "rag_time_to_first_token_seconds",
+    "Time from request start until the first answer token is streamed.",
+)
 
 class AgenticRAG:
     """Agentic RAG pipeline using LangGraph + MCP (Retriever + WebSearch)."""
 
+    # Nodes whose LLM output is the user-facing answer and is streamed token by token
+    ANSWER_NODES = ("Assistant", "Generator")
+
     class AgentState(TypedDict):
         messages: Annotated[Sequence[BaseMessage], add_messages]
-
-    def __init__(self):
+        question: str  # the current turn's user query; messages also hold earlier turns of the session
+        relevance: str  # speculative grader outcome: "relevant", "not_relevant" or "web_ready"
+        deadline: float  # request deadline (epoch seconds) set by the router, see utils.deadline
+        retrieved: str  # Retriever context, answered from when the web search is skipped
+        degraded: bool  # a step was skipped or cut off by the deadline; such answers are not cached
+        intent: str  # Assistant routing intent (intent_router), tunes the Retriever's MMR
+        answered: bool  # a node already wrote the final (degraded) answer, the Generator is skipped
+
+    def __init__(self, load_embeddings: bool = True):
         self.retriever_obj = Retriever()
         self.model_loader = ModelLoader()
         self.llm = self.model_loader.load_llm()
-        self.checkpointer = MemorySaver()
+        # Admission key: the router's whole provider set when it is enabled
+        self.llm_provider = self.model_loader.get_admission_key(self.llm)
+        self.config = self.model_loader.config
+        self.checkpointer = BoundedMemorySaver.from_config(self.config)
+
+        # Query embeddings are shared by the semantic cache and the intent router
+        self.embeddings = None
+        cache_cfg = self.config.get("semantic_cache", {})
+        router_cfg = self.config.get("intent_router", {})
+        self._needs_embeddings = cache_cfg.get("enabled", False) or router_cfg.get("enabled", False)
+        if load_embeddings:
+            self.load_embeddings()
+
+        # Semantic answer cache consulted before the graph runs
+        self.semantic_cache = None
+        if cache_cfg.get("enabled", False):
+            around_tolerance = self.config.get("retriever", {}).get("price_around_tolerance", 0.1)
+            self.semantic_cache = SemanticCache(
+                similarity_threshold=cache_cfg.get("similarity_threshold", 0.95),
+                ttl_seconds=cache_cfg.get("ttl_seconds", 3600),
+                max_entries=cache_cfg.get("max_entries", 2000),
+                version_provider=CollectionVersion().current,
+                # Different price/rating bounds never share an answer, however similar the wording
+                key_fn=lambda query: QueryConstraints.extract(query, around_tolerance=around_tolerance).key,
+            )
+
+        # Concurrent identical queries share one graph execution
+        self.single_flight = None
+        if self.config.get("single_flight", {}).get("enabled", False):
+            self.single_flight = SingleFlight("agentic_rag")
+
+        # Web search (and its query rewrite) started alongside the grader instead of after it
+        self.speculation_cfg = self.config.get("speculation", {})
+        self.speculative = self.speculation_cfg.get("enabled", False)
+
+        # Exemplar-embedding intent classifier for the Assistant node (built in async_init)
+        self.intent_router = IntentRouter.from_config(self.config) if router_cfg.get("enabled", False) else None
+
+        # Local relevance score that stands in for the LLM grader when it is confident
+        self.relevance_gate = None
+        if self.config.get("relevance_gate", {}).get("enabled", False):
+            self.relevance_gate = RelevanceGate.from_config(self.config)
+
+        # Per-request time budget: optional steps are skipped when too little of it is left
+        self.deadline_cfg = self.config.get("deadline", {})
+
+        # Rule-based rewrite and persistent rewrite cache in front of the Rewriter LLM
+        self.query_normalizer = None
+        self.rewrite_cache = None
+        normalizer_cfg = self.config.get("query_normalizer", {})
+        if normalizer_cfg.get("enabled", False):
+            self.query_normalizer = QueryNormalizer.from_config(self.config)
+            if normalizer_cfg.get("rewrite_cache", {}).get("enabled", False):
+                self.rewrite_cache = RewriteCache.from_config(self.config)
 
         # MCP Client Init
         # self.mcp_client = MultiServerMCPClient({
@@ -33,11 +117,12 @@ class AgenticRAG:
         #         "transport": "stdio"
         #     }
         # })
+        mcp_url = os.getenv("MCP_SERVER_URL", self.config.get("mcp", {}).get("url", "http://localhost:9000/mcp"))
         self.mcp_client = MultiServerMCPClient(
             {
                 "hybrid_search": {
                     "transport": "streamable_http",
-                    "url": "http://localhost:9000/mcp"
+                    "url": mcp_url
                 }
             }
         )
@@ -47,28 +132,65 @@ class AgenticRAG:
         self.workflow = self._build_workflow()
         self.app = self.workflow.compile(checkpointer=self.checkpointer)
 
-        # Load MCP tools asynchronously
-        asyncio.run(self._safe_async_init())
+        # MCP tools are discovered by awaiting async_init() / _safe_async_init()
+        # from the caller's event loop (e.g. the FastAPI lifespan hook).
 
     # # ---------- Async tool initialization ----------
     # async def init_tools(self):
     #     """Load MCP tools asynchronously."""
     #     self.mcp_tools = await self.mcp_client.get_tools()
 
+    def load_embeddings(self):
+        """Create the query embeddings client; call it on the thread whose event loop will await it."""
+        if self._needs_embeddings:
+            self.embeddings = self.model_loader.load_embeddings()
+
     async def async_init(self):
         """Load MCP tools asynchronously."""
         self.mcp_tools = await self.mcp_client.get_tools()
+        await self._build_intent_router()
+
+    async def _build_intent_router(self):
+        """Embed the intent exemplars once; until this succeeds the keyword rule routes queries."""
+        if self.intent_router is None or self.intent_router.ready:
+            return
+        try:
+            await self.intent_router.build(self.embeddings)
+        except Exception as e:
+            log.warning("Intent router unavailable, routing by keywords", error=str(e))
 
     async def _safe_async_init(self):
         """Safe async init wrapper (prevents event loop crash)."""
+        await self._build_intent_router()
         try:
             self.mcp_tools = await self.mcp_client.get_tools()
             print("MCP tools loaded successfully.")
         except Exception as e:
             print(f"Warning: Failed to load MCP tools — {e}")
             self.mcp_tools = []
+        return self.ready
+
+    @property
+    def ready(self) -> bool:
+        """True once the MCP tools have been discovered and the graph can serve requests."""
+        return bool(self.mcp_tools)
 
 
+    # ---------- Deadline ----------
+    def _deadline(self, state: AgentState) -> Deadline:
+        return Deadline.from_config(self.config, state.get("deadline"))
+
+    @staticmethod
+    def _degraded_answer(docs: str) -> str:
+        """Answer from the retrieved product list alone, when the Generator ran out of time."""
+        lines = []
+        for chunk, _ in parse_context(docs)[:5]:
+            fields = dict(line.split(": ", 1) for line in chunk.splitlines()[:3] if ": " in line)
+            lines.append(f"- {fields.get('Title', 'N/A')} ({fields.get('Price', 'N/A')}, rated {fields.get('Rating', 'N/A')})")
+        if not lines:
+            return "Sorry, I could not answer in time. Please try again."
+        return "I could not finish a full answer in time. The closest matches I found:\n" + "\n".join(lines)
+
     # ---------- Nodes ----------
     # def _ai_assistant(self, state: AgentState):
     #     messages = state["messages"]
@@ -84,20 +206,32 @@ class AgenticRAG:
     #         response = chain.invoke({"question": last_message})
     #         return {"messages": [HumanMessage(content=response)]}
 
-    def _ai_assistant(self, state: AgentState):
+    async def _ai_assistant(self, state: AgentState, config: RunnableConfig):
         print("--- CALL ASSISTANT ---")
-        messages = state["messages"]
-        last_message = messages[-1].content
+        last_message = state["question"]
 
-        if any(word in last_message.lower() for word in ["price", "review", "product","phones","mobile","phone"]):
-            return {"messages": [HumanMessage(content="TOOL: retriever")]}
+        intent = await self._intent(last_message, config)
+        if intent in PRODUCT_INTENTS:
+            return {"messages": [HumanMessage(content="TOOL: retriever")], "intent": intent}
         else:
-            prompt = ChatPromptTemplate.from_template(
-                "You are a helpful assistant. Answer the user directly.\n\nQuestion: {question}\nAnswer:"
-            )
-            chain = prompt | self.llm | StrOutputParser()
-            response = chain.invoke({"question": last_message}) or "I'm not sure about that."
-            return {"messages": [HumanMessage(content=response)]}
+            chain = CHAIN_REGISTRY.chain(PromptType.ASSISTANT, self.llm)
+            try:
+                response = await self._deadline(state).run("Assistant", chain.ainvoke({"question": last_message}))
+            except DeadlineExceeded:
+                return {"messages": [HumanMessage(content=self._degraded_answer(""))], "degraded": True}
+            return {"messages": [HumanMessage(content=response or "I'm not sure about that.")]}
+
+    async def _intent(self, query: str, config: RunnableConfig) -> str:
+        """Classify the query, reusing the embedding computed for the semantic cache when there is one."""
+        if self.intent_router is None or not self.intent_router.ready:
+            return keyword_intent(query)
+        vector = config.get("configurable", {}).get("query_vector")
+        if vector is None:
+            try:
+                vector = await self.embeddings.aembed_query(query)
+            except Exception as e:
+                log.warning("Query embedding failed, routing by keywords", error=str(e))
+        return self.intent_router.route(query, vector)
 
     # async def _vector_retriever(self, state: AgentState):
     #     query = state["messages"][-1].content
@@ -107,19 +241,27 @@ class AgenticRAG:
     #     return {"messages": [HumanMessage(content=context)]}
     async def _vector_retriever(self, state: AgentState):
         print("--- RETRIEVER (MCP) ---")
-        query = state["messages"][0].content
+        query = state["question"]
 
         tool = next((t for t in self.mcp_tools if t.name == "get_product_info"), None)
         if not tool:
             return {"messages": [HumanMessage(content="Retriever tool not found in MCP client.")]}
 
+        deadline = self._deadline(state)
+        # The tool server bounds its own search with the same budget
+        args = {"query": query, "timeout_seconds": deadline.optional_budget()}
+        lambda_mult = self.config.get("retriever", {}).get("lambda_mult_by_intent", {}).get(state.get("intent"))
+        if lambda_mult is not None:
+            args["lambda_mult"] = lambda_mult
         try:
-            result = await tool.ainvoke({"query": query})
+            result = await deadline.run("Retriever", tool.ainvoke(args), optional=True)
             context = result or "No relevant product data found."
+        except DeadlineExceeded:
+            context = "No local results found (retrieval timed out)."
         except Exception as e:
             context = f"Error invoking retriever: {e}"
 
-        return {"messages": [HumanMessage(content=context)]}
+        return {"messages": [HumanMessage(content=context)], "retrieved": context}
     
     # async def _web_search(self, state: AgentState):
     #     query = state["messages"][-1].content
@@ -131,10 +273,31 @@ class AgenticRAG:
     async def _web_search(self, state: AgentState):
         print("--- WEB SEARCH (MCP) ---")
         query = state["messages"][-1].content
-        tool = next(t for t in self.mcp_tools if t.name == "web_search")
-        result = await tool.ainvoke({"query": query})  # ✅
-        context = result if result else "No data from web"
+        deadline = self._deadline(state)
+        # Optional step: without enough budget, answer from the retrieved products instead
+        skipped = {"messages": [HumanMessage(content=state.get("retrieved") or "No data from web")], "degraded": True}
+        if not deadline.allows("WebSearch", self.deadline_cfg.get("min_web_search_seconds", 3)):
+            return skipped
+        try:
+            context = await self._search_web(query, deadline)
+        except DeadlineExceeded:
+            return skipped
+        except LookupError as e:
+            # No web search to fall back on: answer from the retrieved products without the Generator
+            log.warning("Web search unavailable, answering from retrieved products", error=str(e))
+            return {"messages": [HumanMessage(content=self._degraded_answer(state.get("retrieved") or ""))],
+                    "degraded": True, "answered": True}
         return {"messages": [HumanMessage(content=context)]}
+
+    async def _search_web(self, query: str, deadline: Deadline) -> str:
+        """Web search results for `query`; raises LookupError when the MCP server has no web_search tool."""
+        tool = next((t for t in self.mcp_tools if t.name == "web_search"), None)
+        if tool is None:
+            raise LookupError("web_search tool not found in MCP client")
+        result = await deadline.run(
+            "WebSearch", tool.ainvoke({"query": query, "timeout_seconds": deadline.optional_budget()}), optional=True
+        )
+        return result if result else "No data from web"
     
 
     # def _grade_documents(self, state: AgentState) -> Literal["generator", "rewriter"]:
@@ -149,19 +312,74 @@ class AgenticRAG:
     #     score = chain.invoke({"question": question, "docs": docs})
     #     return "generator" if "yes" in score.lower() else "rewriter"
 
-    def _grade_documents(self, state: AgentState) -> Literal["generator", "rewriter"]:
+    async def _grade_documents(self, state: AgentState) -> Literal["generator", "rewriter"]:
         print("--- GRADER ---")
-        question = state["messages"][0].content
-        docs = state["messages"][-1].content
+        relevant = await self._is_relevant(state["question"], state["messages"][-1].content, self._deadline(state))
+        return "generator" if relevant else "rewriter"
 
-        prompt = PromptTemplate(
-            template="""You are a grader. Question: {question}\nDocs: {docs}\n
-            Are docs relevant to the question? Answer yes or no.""",
-            input_variables=["question", "docs"],
-        )
-        chain = prompt | self.llm | StrOutputParser()
-        score = chain.invoke({"question": question, "docs": docs}) or ""
-        return "generator" if "yes" in score.lower() else "rewriter"
+    async def _speculative_grade(self, state: AgentState):
+        """Grade the retrieved docs while the web search fallback already runs; keep its result only if needed."""
+        print("--- GRADER (speculative web search) ---")
+        question = state["question"]
+        docs = state["messages"][-1].content
+        verdict = self._fast_relevance(question, docs)
+        if verdict is not None:
+            return {"relevance": "relevant" if verdict else "not_relevant"}
+
+        deadline = self._deadline(state)
+        speculation = None
+        if deadline.allows("SpeculativeWebSearch", self.deadline_cfg.get("min_web_search_seconds", 3)):
+            speculation = Speculation("mcp_websearch", "web_search", self._speculative_web_search(question, deadline))
+        try:
+            relevant = await self._llm_grade(question, docs, deadline)
+        except BaseException:
+            if speculation is not None:
+                speculation.cancel()
+            raise
+
+        if relevant:
+            if speculation is not None:
+                speculation.cancel()
+            return {"relevance": "relevant"}
+        if speculation is None:
+            return {"relevance": "not_relevant"}
+        try:
+            messages = await speculation.use()
+        except Exception as e:
+            log.warning("Speculative web search failed, falling back to rewrite + web search", error=str(e))
+            return {"relevance": "not_relevant"}
+        return {"relevance": "web_ready", "messages": messages}
+
+    async def _speculative_web_search(self, question: str, deadline: Deadline) -> List[BaseMessage]:
+        """The Rewriter -> WebSearch path as one coroutine, returning the messages those nodes would add."""
+        messages = []
+        query = question
+        if self.speculation_cfg.get("rewrite", False):
+            query = await self._rewrite_query(question, deadline)
+            messages.append(HumanMessage(content=query))
+        messages.append(HumanMessage(content=await self._search_web(query, deadline)))
+        return messages
+
+    async def _is_relevant(self, question: str, docs: str, deadline: Deadline) -> bool:
+        verdict = self._fast_relevance(question, docs)
+        if verdict is not None:
+            return verdict
+        return await self._llm_grade(question, docs, deadline)
+
+    def _fast_relevance(self, question: str, docs: str) -> Optional[bool]:
+        """Verdict of the local relevance gate, or None when the LLM grader has to decide."""
+        if self.relevance_gate is None:
+            return None
+        return self.relevance_gate.decide(question, docs)
+
+    async def _llm_grade(self, question: str, docs: str, deadline: Deadline) -> bool:
+        chain = CHAIN_REGISTRY.chain(PromptType.GRADER, self.llm)
+        try:
+            score = await deadline.run("Grader", chain.ainvoke({"question": question, "docs": docs}), optional=True)
+        except DeadlineExceeded:
+            # No time left for the web fallback anyway: answer from the retrieved docs
+            return True
+        return "yes" in (score or "").lower()
 
 
     # def _generate(self, state: AgentState):
@@ -174,18 +392,19 @@ class AgenticRAG:
     #     response = chain.invoke({"context": docs, "question": question})
     #     return {"messages": [HumanMessage(content=response)]}
 
-    def _generate(self, state: AgentState):
+    async def _generate(self, state: AgentState):
         print("--- GENERATE ---")
-        question = state["messages"][0].content
+        question = state["question"]
         docs = state["messages"][-1].content
 
-        prompt = ChatPromptTemplate.from_template(
-            PROMPT_REGISTRY[PromptType.PRODUCT_BOT].template
-        )
-        chain = prompt | self.llm | StrOutputParser()
+        chain = CHAIN_REGISTRY.chain(PromptType.PRODUCT_BOT, self.llm)
 
         try:
-            response = chain.invoke({"context": docs, "question": question}) or "No response generated."
+            response = await self._deadline(state).run(
+                "Generator", chain.ainvoke({"context": docs, "question": question})
+            ) or "No response generated."
+        except DeadlineExceeded:
+            return {"messages": [HumanMessage(content=self._degraded_answer(docs))], "degraded": True}
         except Exception as e:
             response = f"Error generating response: {e}"
 
@@ -201,60 +420,257 @@ class AgenticRAG:
     #     new_q = chain.invoke({"question": question})
     #     return {"messages": [HumanMessage(content=new_q.strip())]}
 
-    def _rewrite(self, state: AgentState):
+    async def _rewrite(self, state: AgentState):
         print("--- REWRITE ---")
-        question = state["messages"][0].content
+        new_q = await self._rewrite_query(state["question"], self._deadline(state))
+        return {"messages": [HumanMessage(content=new_q)]}
 
-        prompt = ChatPromptTemplate.from_template(
-            "Rewrite this user query to make it more clear and specific for a search engine. "
-            "Do NOT answer the query. Only rewrite it.\n\nQuery: {question}\nRewritten Query:"
-        )
-        chain = prompt | self.llm | StrOutputParser()
+    async def _rewrite_query(self, question: str, deadline: Deadline) -> str:
+        """
+        Search query for `question`: the rule-based rewrite when it suffices, else a cached
+        or fresh LLM rewrite. Without budget for the LLM and the search after it, the
+        rule-based rewrite (or the question itself) is used as is.
+        """
+        normalized = None
+        if self.query_normalizer is not None:
+            normalized = self.query_normalizer.normalize(question)
+            if self.query_normalizer.search_ready(normalized):
+                QUERY_REWRITES.inc(source="rules")
+                return normalized
+            cached = await self.rewrite_cache.aget(normalized) if self.rewrite_cache is not None else None
+            if cached:
+                QUERY_REWRITES.inc(source="cache")
+                return cached
+
+        min_seconds = self.deadline_cfg.get("min_rewrite_seconds", 2) + self.deadline_cfg.get("min_web_search_seconds", 3)
+        if not deadline.allows("Rewriter", min_seconds):
+            return normalized or question
+
+        chain = CHAIN_REGISTRY.chain(PromptType.REWRITER, self.llm)
 
         try:
-            new_q = chain.invoke({"question": question}).strip()
+            new_q = (await deadline.run(
+                "Rewriter", chain.ainvoke({"question": question}), optional=True,
+                leave=self.deadline_cfg.get("min_web_search_seconds", 3),  # the web search still has to fit
+            )).strip()
+        except DeadlineExceeded:
+            return normalized or question
         except Exception as e:
-            new_q = f"Error rewriting query: {e}"
-
-        return {"messages": [HumanMessage(content=new_q)]}
+            # Never search the web for an error message: fall back to the question itself
+            log.warning("Query rewrite failed, searching with the original question", error=str(e))
+            return normalized or question
+        QUERY_REWRITES.inc(source="llm")
+        if self.rewrite_cache is not None and normalized and new_q:
+            await self.rewrite_cache.aset(normalized, new_q)
+        return new_q
 
     # ---------- Build Workflow ----------
     def _build_workflow(self):
+        graph = "mcp_websearch"
         workflow = StateGraph(self.AgentState)
-        workflow.add_node("Assistant", self._ai_assistant)
-        workflow.add_node("Retriever", self._vector_retriever)
-        workflow.add_node("Generator", self._generate)
-        workflow.add_node("Rewriter", self._rewrite)
-        workflow.add_node("WebSearch", self._web_search)
+        workflow.add_node("Assistant", instrument_node(graph, "Assistant", self._ai_assistant))
+        workflow.add_node("Retriever", instrument_node(graph, "Retriever", self._vector_retriever))
+        workflow.add_node("Generator", instrument_node(graph, "Generator", self._generate))
+        workflow.add_node("Rewriter", instrument_node(graph, "Rewriter", self._rewrite))
+        workflow.add_node("WebSearch", instrument_node(graph, "WebSearch", self._web_search))
 
         workflow.add_edge(START, "Assistant")
         workflow.add_conditional_edges(
             "Assistant",
-            lambda state: "Retriever" if "TOOL" in state["messages"][-1].content else END,
+            instrument_router(graph, "assistant_router",
+                              lambda state: "Retriever" if "TOOL" in state["messages"][-1].content else END),
             {"Retriever": "Retriever", END: END},
         )
-        workflow.add_conditional_edges(
-            "Retriever",
-            self._grade_documents,
-            {"generator": "Generator", "rewriter": "Rewriter"},
-        )
+        if self.speculative:
+            workflow.add_node("Grader", instrument_node(graph, "Grader", self._speculative_grade))
+            workflow.add_edge("Retriever", "Grader")
+            workflow.add_conditional_edges(
+                "Grader",
+                instrument_router(graph, "grader", lambda state: state["relevance"]),
+                {"relevant": "Generator", "web_ready": "Generator", "not_relevant": "Rewriter"},
+            )
+        else:
+            workflow.add_conditional_edges(
+                "Retriever",
+                instrument_router(graph, "grader", self._grade_documents),
+                {"generator": "Generator", "rewriter": "Rewriter"},
+            )
         workflow.add_edge("Generator", END)
         workflow.add_edge("Rewriter", "WebSearch")
-        workflow.add_edge("WebSearch", "Generator")
+        workflow.add_conditional_edges(
+            "WebSearch",
+            instrument_router(graph, "web_search_router",
+                              lambda state: END if state.get("answered") else "Generator"),
+            {"Generator": "Generator", END: END},
+        )
 
         return workflow
 
+    # ---------- Semantic Cache ----------
+    async def _lookup_cache(self, query: str, vector=None):
+        """Embed the query (unless a vector is given) and consult the semantic cache. Returns (cached answer or None, query vector)."""
+        if self.semantic_cache is None:
+            return None, None
+        if vector is None:
+            try:
+                vector = await self.embeddings.aembed_query(query)
+            except Exception as e:
+                log.warning("Query embedding failed, bypassing semantic cache", error=str(e))
+                return None, None
+        return self.semantic_cache.lookup(vector, query), vector
+
+    async def _embed_queries(self, queries: List[str]) -> List:
+        """Embed many queries up front, concurrently and as queries, like _lookup_cache embeds one."""
+        if self.semantic_cache is None or not queries:
+            return [None] * len(queries)
+        vectors = await aembed_queries(self.embeddings, queries)
+        failed = sum(isinstance(v, BaseException) for v in vectors)
+        if failed:
+            log.warning("Batch query embedding failed, embedding those queries on their turn", failed=failed)
+        return [None if isinstance(v, BaseException) else v for v in vectors]
+
+    def _store_cache(self, query: str, vector, answer: str):
+        """Cache a successful answer under the query embedding."""
+        if self.semantic_cache is None or vector is None:
+            return
+        if not answer or answer.startswith("Error"):
+            return
+        self.semantic_cache.store(query, vector, answer)
+
     # ---------- Public Run ----------
-    async def run(self, query: str, thread_id: str = "default_thread") -> str:
-        """Run the workflow for a given query and return the final answer."""
-        # if self.mcp_tools is None:
-        #     await self.init_tools()  # ensure tools are loaded
-
-        result = await self.app.ainvoke(
-            {"messages": [HumanMessage(content=query)]},
-            config={"configurable": {"thread_id": thread_id}}
-        )
-        return result["messages"][-1].content
+    async def run(self, query: str, thread_id: Optional[str] = None, deadline: Optional[float] = None) -> str:
+        """
+        Run the workflow for a given query and return the final answer.
+        Pass the caller's session id as `thread_id` to keep conversation history;
+        without one the query runs on a fresh, single-turn thread.
+        `deadline` (epoch seconds) bounds the whole run; by default the configured
+        request budget starts now.
+        """
+        return await self._run(query, thread_id or uuid.uuid4().hex, deadline=deadline)
+
+    def _graph_input(self, query: str, deadline: Optional[float]) -> dict:
+        if deadline is None:
+            deadline = Deadline.from_config(self.config).at
+        return {"messages": [HumanMessage(content=query)], "question": query,
+                "deadline": deadline, "degraded": False, "answered": False}
+
+    async def _run(self, query: str, thread_id: str, query_vector=None, deadline: Optional[float] = None) -> str:
+        cached_answer, query_vector = await self._lookup_cache(query, query_vector)
+        if cached_answer is not None:
+            return cached_answer
+
+        async def invoke_graph():
+            result = await self.app.ainvoke(
+                self._graph_input(query, deadline),
+                config={"configurable": {"thread_id": thread_id, "query_vector": query_vector}}
+            )
+            answer = result["messages"][-1].content
+            if not result.get("degraded"):
+                self._store_cache(query, query_vector, answer)
+            return answer
+
+        if self.single_flight is None:
+            return await invoke_graph()
+        # Followers get the leader's answer; only the leader's thread records the turn
+        return await self.single_flight.do(await self._flight_key(query, thread_id), invoke_graph)
+
+    async def _flight_key(self, query: str, thread_id: str) -> str:
+        """
+        Single-flight key of a turn. A first turn depends on the query alone and
+        is shared across sessions; a follow-up also depends on the thread's
+        history, so it only coalesces with duplicates on the same thread.
+        """
+        state = await self.app.aget_state({"configurable": {"thread_id": thread_id}})
+        if state.values.get("messages"):
+            return f"{thread_id}:{normalize_query(query)}"
+        return normalize_query(query)
+
+    async def run_many(self, queries: List[str], concurrency: Optional[int] = None, guard=None):
+        """
+        Run many independent queries through the graph concurrently, at most
+        `concurrency` at a time, and yield {"index", "query", "answer"} dicts
+        (or {"index", "query", "error"}) in completion order.
+        `guard`, if given, is a factory of async context managers entered around
+        every query (e.g. an admission-control slot).
+        """
+        concurrency = concurrency or self.config.get("batch", {}).get("max_concurrency", 8)
+        semaphore = asyncio.Semaphore(concurrency)
+        batch_id = uuid.uuid4().hex[:8]
+        vectors = await self._embed_queries(queries)
+
+        async def run_one(index: int, query: str, vector):
+            async with semaphore:
+                try:
+                    if guard is None:
+                        answer = await self._run(query, f"batch-{batch_id}-{index}", vector)
+                    else:
+                        async with guard():
+                            answer = await self._run(query, f"batch-{batch_id}-{index}", vector)
+                    return {"index": index, "query": query, "answer": answer}
+                except Exception as e:
+                    log.error("Batch query failed", index=index, error=str(e))
+                    return {"index": index, "query": query, "error": str(e)}
+
+        tasks = [asyncio.create_task(run_one(i, q, v)) for i, (q, v) in enumerate(zip(queries, vectors))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Consumer went away (client disconnect): stop the remaining work
+            for task in tasks:
+                task.cancel()
+
+    async def astream(self, query: str, thread_id: Optional[str] = None, deadline: Optional[float] = None):
+        """
+        Run the workflow and yield progress events as they happen:
+        {"type": "node", "node": ...} when a graph node starts,
+        {"type": "token", "content": ...} for every answer token,
+        {"type": "done", "answer": ..., "ttft_ms": ..., "total_ms": ...} at the end
+        ("degraded": true when the deadline cut a step short).
+        """
+        config = {"configurable": {"thread_id": thread_id or uuid.uuid4().hex}}
+        nodes = set(self.workflow.nodes)
+        start = time.perf_counter()
+        ttft = None
+
+        cached_answer, query_vector = await self._lookup_cache(query)
+        config["configurable"]["query_vector"] = query_vector
+        if cached_answer is not None:
+            elapsed = time.perf_counter() - start
+            TTFT_SECONDS.observe(elapsed)
+            yield {"type": "token", "content": cached_answer}
+            yield {"type": "done", "answer": cached_answer, "cached": True,
+                   "ttft_ms": round(elapsed * 1000, 1), "total_ms": round(elapsed * 1000, 1)}
+            return
+
+        async for event in self.app.astream_events(self._graph_input(query, deadline), config=config, version="v2"):
+            kind = event["event"]
+            node = event.get("metadata", {}).get("langgraph_node")
+            if kind == "on_chain_start" and event["name"] in nodes and event["name"] == node:
+                yield {"type": "node", "node": node}
+            elif kind == "on_chat_model_stream" and node in self.ANSWER_NODES:
+                content = event["data"]["chunk"].content
+                if not content:
+                    continue
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                yield {"type": "token", "content": content}
+
+        state = await self.app.aget_state(config)
+        answer = state.values["messages"][-1].content
+        degraded = bool(state.values.get("degraded"))
+        if ttft is None:
+            # Nothing was streamed (keyword route, cached LLM result...): send the answer in one piece
+            ttft = time.perf_counter() - start
+            yield {"type": "token", "content": answer}
+
+        if not degraded:
+            self._store_cache(query, query_vector, answer)
+        total = time.perf_counter() - start
+        TTFT_SECONDS.observe(ttft)
+        log.info("Streamed answer", ttft_ms=round(ttft * 1000, 1), total_ms=round(total * 1000, 1), degraded=degraded)
+        yield {"type": "done", "answer": answer, "cached": False, "degraded": degraded,
+               "ttft_ms": round(ttft * 1000, 1), "total_ms": round(total * 1000, 1)}
 
 
 # ---------- Example Usage ----------
@@ -263,6 +679,7 @@ if __name__ == "__main__":
 
     async def main():
         rag_agent = AgenticRAG()
+        await rag_agent._safe_async_init()
         answer = await rag_agent.run("suggest me some mobile phones under 50000 INR?")
         print("\nFinal Answer:\n", answer)
 
@@ -0,0 +1,62 @@
+import time
+import inspect
+import functools
+
+from prod_assistant.utils.metrics import METRICS
+
+NODE_LATENCY = METRICS.histogram(
+    "graph_node_latency_seconds", "Latency of LangGraph nodes and routing functions.", ["graph", "node"]
+)
+NODE_ERRORS = METRICS.counter(
+    "graph_node_errors_total", "Exceptions raised by LangGraph nodes and routing functions.", ["graph", "node"]
+)
+ROUTE_DECISIONS = METRICS.counter(
+    "graph_route_decisions_total", "Branches chosen by LangGraph routing functions.", ["graph", "router", "decision"]
+)
+
+
+def _timed(graph: str, name: str, fn, on_result=None):
+    """Wrap a sync or async callable so every call records latency and errors under (graph, name)."""
+    # functools.wraps keeps the signature visible to LangGraph (e.g. an optional `config` parameter)
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception:
+                NODE_ERRORS.inc(graph=graph, node=name)
+                raise
+            finally:
+                NODE_LATENCY.observe(time.perf_counter() - start, graph=graph, node=name)
+            if on_result:
+                on_result(result)
+            return result
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def sync_wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            NODE_ERRORS.inc(graph=graph, node=name)
+            raise
+        finally:
+            NODE_LATENCY.observe(time.perf_counter() - start, graph=graph, node=name)
+        if on_result:
+            on_result(result)
+        return result
+    return sync_wrapper
+
+
+def instrument_node(graph: str, node: str, fn):
+    """Record latency and error count for a graph node."""
+    return _timed(graph, node, fn)
+
+
+def instrument_router(graph: str, router: str, fn):
+    """Record latency, errors and the chosen branch for a conditional-edge routing function."""
+    def count_decision(decision):
+        ROUTE_DECISIONS.inc(graph=graph, router=router, decision=str(decision))
+    return _timed(graph, router, fn, on_result=count_decision)
@@ -0,0 +1,95 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from prod_assistant.cache.embedding_cache import aembed_queries
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+INTENT_DECISIONS = METRICS.counter(
+    "intent_router_decisions_total", "Assistant routing decisions by intent and deciding method.", ["intent", "method"]
+)
+
+RETRIEVE, COMPARE, CHITCHAT = "retrieve", "compare", "chitchat"
+# Intents answered from the product catalogue (through the Retriever node)
+PRODUCT_INTENTS = (RETRIEVE, COMPARE)
+
+# The original _ai_assistant rule, kept as the fallback when no embedding is available
+PRODUCT_KEYWORDS = ("price", "review", "product", "phones", "mobile", "phone")
+
+
+def keyword_intent(query: str) -> str:
+    return RETRIEVE if any(word in query.lower() for word in PRODUCT_KEYWORDS) else CHITCHAT
+
+
+class IntentRouter:
+    """
+    Nearest-exemplar intent classifier over query embeddings.
+
+    The exemplar sentences from config are embedded once (`build`) with the
+    query task type, since they are user queries too, into a row-normalised
+    NumPy matrix; classifying a query embedding is then one matrix-vector
+    product. The intent of the most similar exemplar wins, unless
+    that similarity is below `min_similarity`, in which case `classify` returns
+    None and the caller falls back to the keyword rule.
+    """
+
+    def __init__(self, exemplars: Dict[str, Sequence[str]], min_similarity: float = 0.5):
+        self.exemplars = {intent: list(texts) for intent, texts in exemplars.items() if texts}
+        self.min_similarity = min_similarity
+        self.matrix: Optional[np.ndarray] = None
+        self.labels: List[str] = []
+
+    @property
+    def ready(self) -> bool:
+        return self.matrix is not None
+
+    async def build(self, embeddings):
+        """Embed every exemplar with the query task type: exemplars are user queries too."""
+        labels = [intent for intent, texts in self.exemplars.items() for _ in texts]
+        texts = [text for texts in self.exemplars.values() for text in texts]
+        if not texts:
+            return
+        vectors = await aembed_queries(embeddings, texts)
+        errors = [v for v in vectors if isinstance(v, BaseException)]
+        if errors:
+            raise errors[0]
+        self.load(vectors, labels)
+        log.info("Intent router built", exemplars=len(labels), intents=sorted(self.exemplars))
+
+    def load(self, vectors, labels: List[str]):
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = matrix / np.where(norms == 0, 1.0, norms)
+        self.labels = list(labels)
+
+    def classify(self, vector) -> Tuple[Optional[str], float]:
+        """(intent, similarity of the closest exemplar); intent is None below `min_similarity`."""
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if self.matrix is None or not norm:
+            return None, 0.0
+        similarities = self.matrix @ (query / norm)
+        best = int(np.argmax(similarities))
+        similarity = float(similarities[best])
+        if similarity < self.min_similarity:
+            return None, similarity
+        return self.labels[best], similarity
+
+    def route(self, query: str, vector=None) -> str:
+        """Intent of the query: by exemplar similarity when possible, otherwise by the keyword rule."""
+        intent = None
+        if vector is not None:
+            intent, _ = self.classify(vector)
+        method = "embedding" if intent else "keyword"
+        intent = intent or keyword_intent(query)
+        INTENT_DECISIONS.inc(intent=intent, method=method)
+        return intent
+
+    @classmethod
+    def from_config(cls, config: dict) -> "IntentRouter":
+        router_cfg = config.get("intent_router", {})
+        return cls(
+            exemplars=router_cfg.get("exemplars", {}),
+            min_similarity=router_cfg.get("min_similarity", 0.5),
+        )
@@ -0,0 +1,132 @@
+import time
+from collections import OrderedDict, defaultdict
+from typing import List, Sequence
+
+from langchain_core.messages import BaseMessage
+from langgraph.checkpoint.memory import InMemorySaver
+
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+THREADS = METRICS.gauge("checkpointer_threads", "Conversation threads held by the in-memory checkpointer.")
+THREAD_EVICTIONS = METRICS.counter(
+    "checkpointer_thread_evictions_total", "Conversation threads evicted from the checkpointer.", ["reason"]
+)
+TRIMMED_MESSAGES = METRICS.counter(
+    "checkpointer_trimmed_messages_total", "Messages dropped from persisted state by the history window."
+)
+
+
+def trim_history(messages: Sequence[BaseMessage], max_messages: int, max_chars: int) -> List[BaseMessage]:
+    """Keep the most recent `max_messages` messages whose total content fits in `max_chars` (always keeps the last one)."""
+    kept = list(messages)[-max_messages:] if max_messages > 0 else list(messages)[-1:]
+    total = sum(len(str(m.content)) for m in kept)
+    while len(kept) > 1 and total > max_chars:
+        total -= len(str(kept[0].content))
+        kept.pop(0)
+    return kept
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """
+    In-memory checkpointer with bounded memory.
+
+    - Only the latest checkpoint of each thread is kept (no time travel).
+    - The persisted `messages` channel is trimmed to a sliding window of
+      `max_messages` messages and `max_state_chars` characters.
+    - Threads idle for more than `idle_ttl_seconds` are evicted, and the least
+      recently used threads are evicted beyond `max_threads`.
+    """
+
+    def __init__(self, max_messages: int = 12, max_state_chars: int = 24000,
+                 max_threads: int = 5000, idle_ttl_seconds: float = 1800):
+        super().__init__()
+        self.max_messages = max_messages
+        self.max_state_chars = max_state_chars
+        self.max_threads = max_threads
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._last_access: "OrderedDict[str, float]" = OrderedDict()
+        self._blob_keys = defaultdict(set)  # thread_id -> blob keys, so pruning never scans every thread
+
+    # ---------- Thread bookkeeping ----------
+    def _touch(self, thread_id: str):
+        self._last_access[thread_id] = time.monotonic()
+        self._last_access.move_to_end(thread_id)
+
+    def _evict(self, protect: str):
+        now = time.monotonic()
+        while self._last_access:
+            thread_id, last_access = next(iter(self._last_access.items()))
+            if thread_id == protect:
+                break
+            if now - last_access > self.idle_ttl_seconds:
+                reason = "ttl"
+            elif len(self._last_access) > self.max_threads:
+                reason = "lru"
+            else:
+                break
+            self.delete_thread(thread_id)
+            THREAD_EVICTIONS.inc(reason=reason)
+        THREADS.set(len(self._last_access))
+
+    def delete_thread(self, thread_id: str) -> None:
+        # Only the latest checkpoint survives _prune, so its writes are the only ones left
+        for checkpoint_ns, checkpoints in self.storage.pop(thread_id, {}).items():
+            for checkpoint_id in checkpoints:
+                self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+        for key in self._blob_keys.pop(thread_id, set()):
+            self.blobs.pop(key, None)
+        self._last_access.pop(thread_id, None)
+
+    # ---------- Checkpointer API ----------
+    def get_tuple(self, config):
+        thread_id = config["configurable"]["thread_id"]
+        if thread_id in self._last_access:
+            self._touch(thread_id)
+        return super().get_tuple(config)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+
+        messages = checkpoint["channel_values"].get("messages")
+        if messages and "messages" in new_versions:
+            trimmed = trim_history(messages, self.max_messages, self.max_state_chars)
+            if len(trimmed) < len(messages):
+                TRIMMED_MESSAGES.inc(len(messages) - len(trimmed))
+                checkpoint = {**checkpoint, "channel_values": {**checkpoint["channel_values"], "messages": trimmed}}
+
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        for channel, version in new_versions.items():
+            self._blob_keys[thread_id].add((thread_id, checkpoint_ns, channel, version))
+        self._prune(thread_id, checkpoint_ns, checkpoint)
+
+        self._touch(thread_id)
+        self._evict(protect=thread_id)
+        return next_config
+
+    def _prune(self, thread_id: str, checkpoint_ns: str, latest):
+        """Drop every older checkpoint of the thread together with its pending writes and unreferenced blobs."""
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        for checkpoint_id in [cid for cid in checkpoints if cid != latest["id"]]:
+            del checkpoints[checkpoint_id]
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+
+        live = {(thread_id, checkpoint_ns, channel, version)
+                for channel, version in latest["channel_versions"].items()}
+        stale = {key for key in self._blob_keys[thread_id] if key[1] == checkpoint_ns and key not in live}
+        for key in stale:
+            self.blobs.pop(key, None)
+        self._blob_keys[thread_id] -= stale
+
+    @classmethod
+    def from_config(cls, config: dict) -> "BoundedMemorySaver":
+        memory_cfg = config.get("memory", {})
+        saver = cls(
+            max_messages=memory_cfg.get("max_messages", 12),
+            max_state_chars=memory_cfg.get("max_state_chars", 24000),
+            max_threads=memory_cfg.get("max_threads", 5000),
+            idle_ttl_seconds=memory_cfg.get("idle_ttl_seconds", 1800),
+        )
+        log.info("Bounded checkpointer configured", **memory_cfg)
+        return saver
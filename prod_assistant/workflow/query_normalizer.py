@@ -0,0 +1,147 @@
+import asyncio
+import csv
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+
+from prod_assistant.cache.sqlite_store import SQLiteStore
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.utils.text_utils import content_tokens, normalize_amounts, normalize_query
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+QUERY_REWRITES = METRICS.counter(
+    "query_rewrites_total", "Search query rewrites by source (rules, cache, llm).", ["source"]
+)
+
+# Politeness and request phrasing a search engine does not need
+_FILLERS = re.compile(
+    r"\b(please|kindly|can you|could you|would you|will you|suggest me|show me|tell me|give me|"
+    r"recommend me|i want|i need|i am looking for|i'm looking for|looking for|some)\b"
+)
+_PUNCTUATION = re.compile(r"[?!,;:\"()\[\]]")
+# "s25+" -> "s25 plus", as in the catalog titles
+_PLUS = re.compile(r"(?<=[a-z0-9])\+")
+# Title words that do not identify the model
+_TITLE_NOISE = {"5g", "4g", "snapdragon"}
+_AMOUNT_INR = re.compile(r"\b\d+ inr\b")
+
+
+def _model_tokens(title: str) -> List[str]:
+    """'Samsung Galaxy S25 Plus 5G (Navy, 256 GB)' -> ['samsung', 'galaxy', 's25', 'plus']"""
+    name = title.split("(", 1)[0].lower()
+    return [t for t in re.findall(r"[a-z0-9]+", name) if t not in _TITLE_NOISE]
+
+
+class QueryNormalizer:
+    """
+    Deterministic query rewrite run before the LLM Rewriter.
+
+    Lowercases the query, drops request phrasing ("suggest me", "please"),
+    writes rupee amounts as plain integers ("1 lakh", "₹1,00,000" ->
+    "100000 inr") and expands model aliases from the catalog titles to the
+    full model name ("s25 ultra" -> "samsung galaxy s25 ultra"). A query that
+    names a catalog model, a price, or enough content words is search-ready
+    and needs no LLM rewrite.
+    """
+
+    def __init__(self, titles: Iterable[str] = (), min_content_tokens: int = 2):
+        self.min_content_tokens = min_content_tokens
+        self.aliases = self._build_aliases(titles)
+        self._alias_pattern = None
+        if self.aliases:
+            # Longest alias first, so "s25 ultra" wins over "s25"
+            alternatives = sorted(self.aliases, key=len, reverse=True)
+            self._alias_pattern = re.compile(
+                r"(?<![a-z0-9])(" + "|".join(re.escape(a) for a in alternatives) + r")(?![a-z0-9])"
+            )
+
+    @staticmethod
+    def _build_aliases(titles: Iterable[str]) -> Dict[str, str]:
+        """Alias -> full model name: every suffix of the name from the model number back, with or without the series."""
+        aliases: Dict[str, str] = {}
+        for title in titles:
+            tokens = _model_tokens(title)
+            model_at = next((i for i, t in enumerate(tokens) if any(c.isdigit() for c in t)), None)
+            if not tokens or model_at is None:
+                continue
+            full = " ".join(tokens)
+            candidates = {" ".join(tokens[i:]) for i in range(model_at + 1)}
+            candidates.add(" ".join([tokens[0]] + tokens[model_at:]))  # brand without series
+            for alias in candidates:
+                # A bare number ("10") is not a model name; "s25" or "pixel 10" is
+                if " " not in alias and (alias.isdigit() or alias.isalpha()):
+                    continue
+                # "samsung s25 ultra" is both a title and an alias of "samsung galaxy s25 ultra": keep the longer name
+                if len(full) > len(aliases.get(alias, "")):
+                    aliases[alias] = full
+        return aliases
+
+    def normalize(self, query: str) -> str:
+        text = normalize_query(query)
+        text = _PLUS.sub(" plus", text)
+        text = normalize_amounts(text)  # before punctuation, which would split "1,00,000"
+        text = _PUNCTUATION.sub(" ", text)
+        text = _FILLERS.sub(" ", text)
+        if self._alias_pattern is not None:
+            text = self._alias_pattern.sub(lambda m: self.aliases[m.group(1)], text)
+        return re.sub(r"\s+", " ", text).strip()
+
+    def mentions_model(self, normalized: str) -> bool:
+        return self._alias_pattern is not None and self._alias_pattern.search(normalized) is not None
+
+    def search_ready(self, normalized: str) -> bool:
+        """True when the normalized query can go to search without an LLM rewrite."""
+        if not normalized:
+            return False
+        if self.mentions_model(normalized) or _AMOUNT_INR.search(normalized):
+            return True
+        return len(content_tokens(normalized)) >= self.min_content_tokens
+
+    @staticmethod
+    def load_titles(path: str) -> List[str]:
+        """Product titles of the ingestion CSV (data/product_reviews.csv); empty when it is missing."""
+        try:
+            with open(path, newline="", encoding="utf-8") as f:
+                return sorted({row["product_title"] for row in csv.DictReader(f) if row.get("product_title")})
+        except (OSError, KeyError, csv.Error) as e:
+            log.warning("Catalog titles unavailable, query aliases disabled", path=path, error=str(e))
+            return []
+
+    @classmethod
+    def from_config(cls, config: dict) -> "QueryNormalizer":
+        normalizer_cfg = config.get("query_normalizer", {})
+        path = os.path.join(os.getcwd(), normalizer_cfg.get("catalog_path", "data/product_reviews.csv"))
+        normalizer = cls(cls.load_titles(path), min_content_tokens=normalizer_cfg.get("min_content_tokens", 2))
+        log.info("Query normalizer ready", aliases=len(normalizer.aliases))
+        return normalizer
+
+
+class RewriteCache:
+    """LLM query rewrites persisted by normalized query, so a repeat never reaches the Rewriter LLM."""
+
+    def __init__(self, store: SQLiteStore, ttl_seconds: float = 604800):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, normalized: str) -> Optional[str]:
+        return self.store.get(normalized)
+
+    def set(self, normalized: str, rewritten: str):
+        self.store.set(normalized, rewritten, self.ttl_seconds)
+
+    # Graph nodes use these: the SQLite round trip runs in a worker thread, not on the event loop
+    async def aget(self, normalized: str) -> Optional[str]:
+        return await asyncio.to_thread(self.get, normalized)
+
+    async def aset(self, normalized: str, rewritten: str):
+        await asyncio.to_thread(self.set, normalized, rewritten)
+
+    @classmethod
+    def from_config(cls, config: dict) -> "RewriteCache":
+        cache_cfg = config.get("query_normalizer", {}).get("rewrite_cache", {})
+        store = SQLiteStore(
+            cache_cfg.get("path", "data/rewrite_cache.sqlite"),
+            table="query_rewrites",
+            max_entries=cache_cfg.get("max_entries", 50000),
+        )
+        return cls(store, ttl_seconds=cache_cfg.get("ttl_seconds", 604800))
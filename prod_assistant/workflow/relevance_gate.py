@@ -0,0 +1,87 @@
+import re
+from typing import List, Optional, Tuple
+
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.utils.text_utils import content_tokens
+
+GRADER_SKIPPED = METRICS.counter(
+    "grader_calls_skipped_total", "LLM grader calls answered by the local relevance gate.", ["verdict"]
+)
+GATE_SCORES = METRICS.histogram(
+    "relevance_gate_score", "Local relevance score of retrieved product context (use it to tune thresholds).",
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0),
+)
+
+_CHUNK_SEPARATOR = "\n\n---\n\n"
+_TITLE = re.compile(r"^Title: (.*)$", re.MULTILINE)
+_SIMILARITY = re.compile(r"^Similarity: (-?[0-9.]+)$", re.MULTILINE)
+
+
+def parse_context(context: str) -> List[Tuple[str, Optional[float]]]:
+    """Split the formatted retriever context into (chunk text, vector similarity or None) per product."""
+    chunks = []
+    for chunk in context.split(_CHUNK_SEPARATOR):
+        if not _TITLE.search(chunk):
+            continue
+        similarity = _SIMILARITY.search(chunk)
+        chunks.append((chunk, float(similarity.group(1)) if similarity else None))
+    return chunks
+
+
+class RelevanceGate:
+    """
+    Local relevance check of retrieved product context, run before the LLM grader.
+
+    The score mixes the best vector similarity reported by the retriever with
+    the share of the query's content words found in the best matching product
+    (title and reviews). Clearly high scores are graded relevant, clearly low
+    ones (or no products at all) not relevant; in between, `decide()` returns
+    None and the LLM grader has the final word.
+    """
+
+    def __init__(self, accept_above: float = 0.75, reject_below: float = 0.4,
+                 vector_weight: float = 0.7, lexical_weight: float = 0.3):
+        self.accept_above = accept_above
+        self.reject_below = reject_below
+        self.vector_weight = vector_weight
+        self.lexical_weight = lexical_weight
+
+    def score(self, question: str, context: str) -> Optional[float]:
+        """Relevance in [0, 1], or None when the context carries no similarity scores."""
+        chunks = parse_context(context or "")
+        if not chunks:
+            return 0.0  # "No local results found.", retriever errors...
+        similarities = [s for _, s in chunks if s is not None]
+        if not similarities:
+            return None
+
+        query_tokens = content_tokens(question)
+        if query_tokens:
+            overlap = max(len(query_tokens & content_tokens(chunk)) / len(query_tokens) for chunk, _ in chunks)
+        else:
+            overlap = 1.0  # nothing product-specific to match against
+        return self.vector_weight * max(similarities) + self.lexical_weight * overlap
+
+    def decide(self, question: str, context: str) -> Optional[bool]:
+        """True / False when the score is outside the uncertain band, otherwise None."""
+        score = self.score(question, context)
+        if score is None:
+            return None
+        GATE_SCORES.observe(score)
+        if score >= self.accept_above:
+            GRADER_SKIPPED.inc(verdict="relevant")
+            return True
+        if score <= self.reject_below:
+            GRADER_SKIPPED.inc(verdict="not_relevant")
+            return False
+        return None
+
+    @classmethod
+    def from_config(cls, config: dict) -> "RelevanceGate":
+        gate_cfg = config.get("relevance_gate", {})
+        return cls(
+            accept_above=gate_cfg.get("accept_above", 0.75),
+            reject_below=gate_cfg.get("reject_below", 0.4),
+            vector_weight=gate_cfg.get("vector_weight", 0.7),
+            lexical_weight=gate_cfg.get("lexical_weight", 0.3),
+        )
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+OUTCOMES = METRICS.counter(
+    "speculation_outcomes_total", "Speculative graph work by outcome (used, wasted, failed).",
+    ["graph", "speculation", "outcome"]
+)
+SAVED_SECONDS = METRICS.histogram(
+    "speculation_saved_seconds", "Latency removed from the critical path by speculative work that was used.",
+    ["graph", "speculation"]
+)
+WASTED_SECONDS = METRICS.histogram(
+    "speculation_wasted_seconds", "Time spent on speculative work that was cancelled.",
+    ["graph", "speculation"]
+)
+
+
+def _discard_result(task: asyncio.Task):
+    if not task.cancelled():
+        task.exception()
+
+
+class Speculation:
+    """
+    Work started before we know whether its result is needed.
+
+    The coroutine runs as a task next to the deciding step (e.g. the grader).
+    Call `use()` when the result turns out to be needed, or `cancel()` when it
+    does not; either way the outcome and its latency impact are recorded.
+    """
+
+    def __init__(self, graph: str, name: str, coro):
+        self.graph = graph
+        self.name = name
+        self._started = time.perf_counter()
+        self._finished = None
+        self.task = asyncio.create_task(coro)
+        self.task.add_done_callback(self._mark_finished)
+
+    def _mark_finished(self, _task):
+        self._finished = time.perf_counter()
+
+    def _duration(self) -> float:
+        # The done callback may not have run yet if the task finished in this loop iteration
+        return (self._finished or time.perf_counter()) - self._started
+
+    async def use(self):
+        """Await the speculative result. Re-raises its exception (recorded as `failed`)."""
+        decided_at = time.perf_counter()
+        try:
+            result = await self.task
+        except Exception:
+            OUTCOMES.inc(graph=self.graph, speculation=self.name, outcome="failed")
+            raise
+        # Run sequentially, the work would have started at decided_at and taken `duration`;
+        # run alongside the decision it only costs whatever part is left after it
+        duration = self._duration()
+        saved = min(duration, decided_at - self._started)
+        OUTCOMES.inc(graph=self.graph, speculation=self.name, outcome="used")
+        SAVED_SECONDS.observe(saved, graph=self.graph, speculation=self.name)
+        log.info("Speculative work used", graph=self.graph, speculation=self.name,
+                 saved_ms=round(saved * 1000, 1))
+        return result
+
+    def cancel(self):
+        """Discard the speculative work, cancelling it if it is still running."""
+        wasted = self._duration()
+        if not self.task.done():
+            self.task.cancel()
+        # Some clients turn the cancellation into their own error (e.g. the MCP adapter's
+        # RuntimeError); the result no longer matters, so never let it surface as unretrieved
+        self.task.add_done_callback(_discard_result)
+        OUTCOMES.inc(graph=self.graph, speculation=self.name, outcome="wasted")
+        WASTED_SECONDS.observe(wasted, graph=self.graph, speculation=self.name)
@@ -0,0 +1,130 @@
+"""
+Hit rate and latency of the Retriever's hybrid mode (dense + BM25 with
+reciprocal-rank fusion) against dense-only retrieval, on queries that name an
+exact catalog model, colour or storage variant.
+
+    python -m test.benchmark.hybrid_retrieval_benchmark                    # offline hashing embeddings
+    python -m test.benchmark.hybrid_retrieval_benchmark --live-embeddings  # embedding model from config.yaml
+
+Both modes run through Retriever.call_retriever_with_scores over the same
+documents (data/product_reviews.csv) in a local vector index; the dense
+vectors embed the review text, as ingestion does. hit@1 / hit@k count
+queries whose expected product is ranked first / within top_k.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from test.benchmark.run_benchmark import OFFLINE_ENV
+
+# Exact-model queries and the catalog titles that answer them
+LABELLED_QUERIES: List[Tuple[str, List[str]]] = [
+    ("Samsung Galaxy S25 Plus Navy 256 GB", ["Samsung Galaxy S25 Plus 5G (Navy, 256 GB)"]),
+    ("S25 Plus Navy", ["Samsung Galaxy S25 Plus 5G (Navy, 256 GB)", "Samsung Galaxy S25 Plus 5G (Navy, 512 GB)"]),
+    ("S25+ 512GB", ["Samsung Galaxy S25 Plus 5G (Navy, 512 GB)"]),
+    ("Samsung S25 Icyblue", ["Samsung Galaxy S25 5G (Icyblue, 256 GB)"]),
+    ("S25 Ultra 512 GB price", ["Samsung Galaxy S25 Ultra 5G (Titanium Silverblue, 512 GB)"]),
+    ("Samsung S25 Ultra Titanium Gray", ["Samsung S25 Ultra 5G (Titanium Gray, 256 GB)"]),
+    ("Galaxy S24 Ultra Titanium Violet", ["Samsung Galaxy S24 Ultra 5G (Titanium Violet, 256 GB)"]),
+    ("Galaxy S24 Marble Gray 128GB", ["Samsung Galaxy S24 5G Snapdragon (Marble Gray, 128 GB)"]),
+    ("S24 Onyx Black reviews", ["Samsung Galaxy S24 5G Snapdragon (Onyx Black, 256 GB)"]),
+    ("Pixel 9A Iris", ["Google Pixel 9A (Iris, 256 GB)"]),
+    ("Google Pixel 10 Lemongrass", ["Google Pixel 10 (Lemongrass, 256 GB)"]),
+    ("Pixel 9 Porcelain", ["Google Pixel 9 (Porcelain, 256 GB)"]),
+    ("vivo X300 Summit Red", ["vivo X300 (Summit Red, 256 GB)"]),
+    ("vivo T4x Glacial Teal", ["vivo T4x 5G (Glacial Teal, 128 GB)"]),
+    ("vivo T4 Emerald Blaze 128 GB", ["vivo T4 5G (Emerald Blaze, 128 GB)"]),
+    ("vivo T4 Phantom Grey", ["vivo T4 5G (Phantom Grey, 256 GB)"]),
+]
+
+
+def _latency_ms(samples: List[float]) -> Dict[str, float]:
+    return {"p50": round(float(np.percentile(samples, 50)), 3), "p95": round(float(np.percentile(samples, 95)), 3)}
+
+
+def _score(retriever, mode: str, repeats: int) -> dict:
+    retriever.config["retriever"]["mode"] = mode
+    hits_at_1 = hits_at_k = 0
+    reciprocal_ranks, samples, misses = [], [], []
+    for query, expected in LABELLED_QUERIES:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            results = retriever.call_retriever_with_scores(query)
+            samples.append((time.perf_counter() - start) * 1000)
+        titles = [doc.metadata.get("product_title") for doc, _ in results]
+        rank = next((i for i, title in enumerate(titles, start=1) if title in expected), None)
+        hits_at_1 += rank == 1
+        hits_at_k += rank is not None
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+        if rank is None:
+            misses.append(query)
+    n = len(LABELLED_QUERIES)
+    return {
+        "hit@1": round(hits_at_1 / n, 3),
+        "hit@k": round(hits_at_k / n, 3),
+        "mrr": round(float(np.mean(reciprocal_ranks)), 3),
+        "latency_ms": _latency_ms(samples),
+        "missed": misses,
+    }
+
+
+def run_hybrid_benchmark(embeddings=None, repeats: int = 5) -> dict:
+    """Index the product CSV in a temporary local store + lexical index and score both retrieval modes."""
+    for key, value in OFFLINE_ENV.items():
+        os.environ.setdefault(key, value)
+    from prod_assistant.etl.data_ingestion import DataIngestion
+    from prod_assistant.retriever.retrieval import Retriever
+    from prod_assistant.retriever.vector_store import load_vector_store
+    from test.benchmark.stubs import HashingEmbeddings
+
+    embeddings = embeddings or HashingEmbeddings()
+    with tempfile.TemporaryDirectory() as workdir:
+        ingestion = DataIngestion()
+        retriever = Retriever()
+        retriever.result_cache = None  # time the searches, not cache hits
+        for config in (ingestion.config, retriever.config):
+            config["vector_store"] = {"backend": "local", "local": {"path": os.path.join(workdir, "vector_index")}}
+            config["retriever"].setdefault("hybrid", {})["lexical_index_path"] = os.path.join(workdir, "lexical")
+
+        documents = ingestion.transform_data()
+        retriever.vstore = load_vector_store(retriever.config, embeddings)
+        retriever.vstore.add_documents(documents)
+        ingestion.build_lexical_index(documents)
+
+        return {
+            "queries": len(LABELLED_QUERIES),
+            "documents": len(documents),
+            "top_k": retriever.config["retriever"].get("top_k", 3),
+            "dense": _score(retriever, "dense", repeats),
+            "hybrid": _score(retriever, "hybrid", repeats),
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live-embeddings", action="store_true",
+                        help="use the embedding model from config.yaml (needs API keys)")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per query")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    embeddings = None
+    if args.live_embeddings:
+        from prod_assistant.utils.model_loader import ModelLoader
+        embeddings = ModelLoader().load_embeddings()
+    report = run_hybrid_benchmark(embeddings, repeats=args.repeats)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
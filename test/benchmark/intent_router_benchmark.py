@@ -0,0 +1,150 @@
+"""
+Accuracy and latency of the Assistant's routing decision: the embedding
+intent router (prod_assistant/workflow/intent_router.py) against the original
+keyword rule, on a labelled set of shopping and chit-chat queries.
+
+    python -m test.benchmark.intent_router_benchmark                 # offline hashing embeddings
+    python -m test.benchmark.intent_router_benchmark --live-embeddings  # configured embedding model
+
+"route" accuracy scores what the graph acts on (product question -> Retriever,
+anything else -> direct answer); "intent" accuracy also separates compare
+from retrieve. Latencies are per query; embedding time is reported apart from
+classification because the served graph reuses the semantic-cache embedding.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from prod_assistant.utils.config_loader import load_config
+from prod_assistant.workflow.intent_router import (
+    CHITCHAT, COMPARE, PRODUCT_INTENTS, RETRIEVE, IntentRouter, keyword_intent,
+)
+
+LABELLED_QUERIES: List[Tuple[str, str]] = [
+    ("What is the price of the Samsung Galaxy S25 Ultra?", RETRIEVE),
+    ("Show me reviews of the iPhone 15", RETRIEVE),
+    ("How is the battery backup of the vivo T4?", RETRIEVE),
+    ("Is the OnePlus Nord good for gaming?", RETRIEVE),
+    ("Which smartphone has the best camera under 40000?", RETRIEVE),
+    ("Recommend a handset with 12 GB RAM", RETRIEVE),
+    ("Does the Galaxy S24 heat up?", RETRIEVE),
+    ("How much does the iPhone 16 cost?", RETRIEVE),
+    ("What do buyers say about the display of the vivo X300?", RETRIEVE),
+    ("Any 5G device with fast charging?", RETRIEVE),
+    ("Is the Samsung S25 worth the money?", RETRIEVE),
+    ("Tell me about the Motorola Edge 50 camera", RETRIEVE),
+    ("best budget iphone", RETRIEVE),
+    ("Good Android with long battery life", RETRIEVE),
+    ("What storage options does the S25 Plus come in?", RETRIEVE),
+    ("Compare Samsung Galaxy S25 with iPhone 16", COMPARE),
+    ("iPhone 15 vs iPhone 16, which should I buy?", COMPARE),
+    ("Which is better for photos, vivo X300 or Galaxy S24?", COMPARE),
+    ("Difference between OnePlus 13 and OnePlus 13R", COMPARE),
+    ("Should I pick the S24 Ultra or the S25 Ultra?", COMPARE),
+    ("Galaxy S25 or Pixel 9 for battery?", COMPARE),
+    ("Hello!", CHITCHAT),
+    ("Hey, how are you?", CHITCHAT),
+    ("Who built you?", CHITCHAT),
+    ("Thanks a lot", CHITCHAT),
+    ("What can you do?", CHITCHAT),
+    ("Good evening", CHITCHAT),
+    ("What's the weather like today?", CHITCHAT),
+    ("Tell me something funny", CHITCHAT),
+    ("Goodbye, see you later", CHITCHAT),
+    ("What is 2 + 2?", CHITCHAT),
+    ("Write a poem about the sea", CHITCHAT),
+]
+
+
+def _route(intent: str) -> str:
+    return "product" if intent in PRODUCT_INTENTS else "direct"
+
+
+def _accuracy(predicted: List[str], expected: List[str]) -> Dict[str, float]:
+    route_hits = sum(_route(p) == _route(e) for p, e in zip(predicted, expected))
+    intent_hits = sum(p == e for p, e in zip(predicted, expected))
+    return {
+        "route_accuracy": round(route_hits / len(expected), 3),
+        "intent_accuracy": round(intent_hits / len(expected), 3),
+    }
+
+
+def _latency_us(fn, items, repeats: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeats):
+        for item in items:
+            start = time.perf_counter()
+            fn(item)
+            samples.append((time.perf_counter() - start) * 1e6)
+    return {"p50": round(float(np.percentile(samples, 50)), 2), "p95": round(float(np.percentile(samples, 95)), 2)}
+
+
+async def _embed(embeddings, router: IntentRouter, queries: List[str]):
+    await router.build(embeddings)
+    start = time.perf_counter()
+    vectors = [await embeddings.aembed_query(q) for q in queries]
+    embed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    return vectors, embed_ms
+
+
+def run_intent_benchmark(embeddings=None, config: Optional[dict] = None, repeats: int = 200) -> dict:
+    """Score both routing methods on LABELLED_QUERIES and return the report dict."""
+    if embeddings is None:
+        from test.benchmark.stubs import HashingEmbeddings
+        embeddings = HashingEmbeddings()
+    router = IntentRouter.from_config(config or load_config())
+    queries = [q for q, _ in LABELLED_QUERIES]
+    expected = [intent for _, intent in LABELLED_QUERIES]
+
+    vectors, embed_ms = asyncio.run(_embed(embeddings, router, queries))
+    # Served behaviour: below min_similarity the router falls back to the keyword rule
+    embedding_predictions = [router.classify(v)[0] or keyword_intent(q) for q, v in zip(queries, vectors)]
+    keyword_predictions = [keyword_intent(q) for q in queries]
+
+    return {
+        "queries": len(queries),
+        "keyword": {
+            **_accuracy(keyword_predictions, expected),
+            "latency_us": _latency_us(keyword_intent, queries, repeats),
+        },
+        "embedding": {
+            **_accuracy(embedding_predictions, expected),
+            "classify_latency_us": _latency_us(router.classify, vectors, repeats),
+            "embed_latency_ms": round(embed_ms, 3),
+            "keyword_fallbacks": sum(router.classify(v)[0] is None for v in vectors),
+            "exemplars": len(router.labels),
+        },
+        "misrouted": {
+            "keyword": [q for q, p, e in zip(queries, keyword_predictions, expected) if _route(p) != _route(e)],
+            "embedding": [q for q, p, e in zip(queries, embedding_predictions, expected) if _route(p) != _route(e)],
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live-embeddings", action="store_true",
+                        help="use the embedding model from config.yaml (needs API keys)")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    embeddings = None
+    if args.live_embeddings:
+        from prod_assistant.utils.model_loader import ModelLoader
+        embeddings = ModelLoader().load_embeddings()
+    report = run_intent_benchmark(embeddings, repeats=args.repeats)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+"""
+Offline end-to-end load test for the FastAPI assistant.
+
+Starts prod_assistant.router.main:app and a stub MCP tool server on local
+ports, with the LLM and embeddings replaced by the deterministic stubs in
+test/benchmark/stubs.py, drives /get (or /get/stream) at a fixed concurrency
+and writes a JSON report that can be compared across commits:
+
+    python -m test.benchmark.run_benchmark --requests 200 --concurrency 16 --output baseline.json
+    python -m test.benchmark.run_benchmark --requests 200 --concurrency 16 --compare baseline.json
+
+Run from the repository root (the app serves ./static and ./templates).
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from unittest import mock
+
+import httpx
+import numpy as np
+
+OFFLINE_ENV = {
+    "GROQ_API_KEY": "offline-benchmark",
+    "GOOGLE_API_KEY": "offline-benchmark",
+    "OPENAI_API_KEY": "offline-benchmark",
+    "ASTRA_DB_API_ENDPOINT": "http://offline.invalid",
+    "ASTRA_DB_APPLICATION_TOKEN": "offline-benchmark",
+    "ASTRA_DB_KEYSPACE": "offline",
+}
+
+QUERY_TEMPLATES = [
+    "What is the price of {title}?",
+    "Show me reviews of {title}",
+    "Is the {title} phone worth buying?",
+    "How is the battery life of {title} mobile?",
+]
+CHIT_CHAT = ["Hello, who are you?", "What can you help me with?"]
+
+
+@dataclass
+class BenchmarkConfig:
+    requests: int = 200
+    concurrency: int = 8
+    warmup_requests: int = 5
+    endpoint: str = "/get"
+    llm_latency_ms: float = 150.0
+    web_latency_ms: float = 100.0
+    semantic_cache: bool = False
+    single_flight: bool = True
+    seed: int = 7
+
+
+def build_queries(titles: List[str], count: int, seed: int) -> List[str]:
+    """Deterministic mix of product questions (with repeats) and chit-chat."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        if rng.random() < 0.1:
+            queries.append(rng.choice(CHIT_CHAT))
+        else:
+            queries.append(rng.choice(QUERY_TEMPLATES).format(title=rng.choice(titles)))
+    return queries
+
+
+def _latency_summary(values_s: List[float]) -> Dict[str, float]:
+    if not values_s:
+        return {}
+    ms = np.asarray(values_s) * 1000
+    return {
+        "p50": round(float(np.percentile(ms, 50)), 2),
+        "p95": round(float(np.percentile(ms, 95)), 2),
+        "p99": round(float(np.percentile(ms, 99)), 2),
+        "mean": round(float(ms.mean()), 2),
+        "max": round(float(ms.max()), 2),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _scrape_metrics(text: str) -> Dict[str, float]:
+    """Counters and gauges from the /metrics exposition (histogram buckets are skipped)."""
+    values = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#") or "_bucket{" in line:
+            continue
+        name, _, value = line.rpartition(" ")
+        values[name] = float(value)
+    return values
+
+
+@contextlib.contextmanager
+def offline_stack(config: BenchmarkConfig):
+    """Start the stub MCP server and the FastAPI app with stub models; yield (base_url, stub_llm, embeddings)."""
+    for key, value in OFFLINE_ENV.items():
+        os.environ.setdefault(key, value)
+    # Per-request client logs would dominate the output (and the timings)
+    for noisy in ("httpx", "mcp", "uvicorn.access"):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
+
+    from test.benchmark.stubs import HashingEmbeddings, StubChatModel, build_vector_store
+    from test.benchmark.stub_mcp_server import ServerThread, build_stub_mcp, free_port
+    from prod_assistant.utils.model_loader import ModelLoader
+
+    embeddings = HashingEmbeddings()
+    stub_llm = StubChatModel(latency_ms=config.llm_latency_ms)
+    mcp = build_stub_mcp(build_vector_store(embeddings), web_latency_ms=config.web_latency_ms)
+    mcp_server = ServerThread(mcp.streamable_http_app(), free_port()).start()
+    os.environ["MCP_SERVER_URL"] = f"{mcp_server.url}/mcp"
+
+    with mock.patch.object(ModelLoader, "load_llm", lambda self: stub_llm), \
+            mock.patch.object(ModelLoader, "load_embeddings", lambda self: embeddings):
+        from prod_assistant.router import main as router
+        app_server = ServerThread(router.app, free_port()).start()
+        try:
+            deadline = time.monotonic() + 60
+            while httpx.get(f"{app_server.url}/readyz").status_code != 200:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("Assistant did not become ready")
+                time.sleep(0.1)
+            rag_agent = router.app.state.rag_agent
+            if not config.semantic_cache:
+                rag_agent.semantic_cache = None
+            if not config.single_flight:
+                rag_agent.single_flight = None
+            yield app_server.url, stub_llm, embeddings
+        finally:
+            app_server.stop()
+            mcp_server.stop()
+
+
+async def _one_request(client: httpx.AsyncClient, endpoint: str, query: str) -> dict:
+    start = time.perf_counter()
+    if endpoint == "/get/stream":
+        ttft = None
+        async with client.stream("POST", endpoint, data={"msg": query}) as response:
+            async for line in response.aiter_lines():
+                if ttft is None and line.startswith("data: ") and '"token"' in line:
+                    ttft = time.perf_counter() - start
+            status = response.status_code
+        return {"status": status, "latency": time.perf_counter() - start, "ttft": ttft}
+
+    response = await client.post(endpoint, data={"msg": query})
+    return {"status": response.status_code, "latency": time.perf_counter() - start, "ttft": None}
+
+
+async def drive(base_url: str, endpoint: str, queries: List[str], concurrency: int) -> List[dict]:
+    """Closed-loop load: `concurrency` workers each send their next request as soon as the previous returns."""
+    pending = asyncio.Queue()
+    for query in queries:
+        pending.put_nowait(query)
+    results: List[dict] = []
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120,
+                                 limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def worker():
+            while not pending.empty():
+                query = pending.get_nowait()
+                try:
+                    results.append(await _one_request(client, endpoint, query))
+                except httpx.HTTPError as e:
+                    results.append({"status": type(e).__name__, "latency": None, "ttft": None})
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+def run_benchmark(config: BenchmarkConfig) -> dict:
+    """Run one benchmark and return the report dict."""
+    import pandas as pd
+
+    titles = pd.read_csv(os.path.join("data", "product_reviews.csv"))["product_title"].tolist()
+    queries = build_queries(titles, config.requests, config.seed)
+    warmup = build_queries(titles, config.warmup_requests, config.seed + 1)
+
+    with offline_stack(config) as (base_url, stub_llm, embeddings):
+        asyncio.run(drive(base_url, config.endpoint, warmup, min(config.concurrency, len(warmup) or 1)))
+        llm_calls_before = stub_llm.calls
+
+        start = time.perf_counter()
+        results = asyncio.run(drive(base_url, config.endpoint, queries, config.concurrency))
+        duration = time.perf_counter() - start
+
+        server_metrics = _scrape_metrics(httpx.get(f"{base_url}/metrics").text)
+        llm_calls = stub_llm.calls - llm_calls_before
+
+    ok = [r for r in results if r["status"] == 200]
+    status_counts: Dict[str, int] = {}
+    for r in results:
+        status_counts[str(r["status"])] = status_counts.get(str(r["status"]), 0) + 1
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "config": asdict(config),
+        "results": {
+            "requests": len(results),
+            "errors": len(results) - len(ok),
+            "status_counts": status_counts,
+            "duration_s": round(duration, 3),
+            "throughput_rps": round(len(ok) / duration, 2) if duration else 0.0,
+            "latency_ms": _latency_summary([r["latency"] for r in ok]),
+            "ttft_ms": _latency_summary([r["ttft"] for r in ok if r["ttft"] is not None]),
+            "llm_calls": llm_calls,
+            "llm_calls_per_request": round(llm_calls / len(results), 3) if results else 0.0,
+        },
+        "server_metrics": server_metrics,
+    }
+
+
+def compare_reports(current: dict, baseline: dict, tolerance: float = 0.15) -> List[str]:
+    """Return human-readable regressions of `current` against `baseline` beyond `tolerance` (fraction)."""
+    regressions = []
+    cur, base = current["results"], baseline["results"]
+    for section in ("latency_ms", "ttft_ms"):
+        for stat in ("p50", "p95", "p99"):
+            old, new = base.get(section, {}).get(stat), cur.get(section, {}).get(stat)
+            if old and new and new > old * (1 + tolerance):
+                regressions.append(f"{section}.{stat}: {old} -> {new} (+{(new / old - 1) * 100:.1f}%)")
+    if base["throughput_rps"] and cur["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+        regressions.append(f"throughput_rps: {base['throughput_rps']} -> {cur['throughput_rps']}")
+    if cur["errors"] > base["errors"]:
+        regressions.append(f"errors: {base['errors']} -> {cur['errors']}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup-requests", type=int, default=5)
+    parser.add_argument("--endpoint", choices=["/get", "/get/stream"], default="/get")
+    parser.add_argument("--llm-latency-ms", type=float, default=150.0)
+    parser.add_argument("--web-latency-ms", type=float, default=100.0)
+    parser.add_argument("--semantic-cache", action="store_true", help="keep the semantic answer cache enabled")
+    parser.add_argument("--no-single-flight", action="store_true", help="disable query coalescing")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="benchmark_report.json")
+    parser.add_argument("--compare", help="baseline report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    args = parser.parse_args(argv)
+
+    config = BenchmarkConfig(
+        requests=args.requests, concurrency=args.concurrency, warmup_requests=args.warmup_requests,
+        endpoint=args.endpoint, llm_latency_ms=args.llm_latency_ms, web_latency_ms=args.web_latency_ms,
+        semantic_cache=args.semantic_cache, single_flight=not args.no_single_flight, seed=args.seed,
+    )
+    report = run_benchmark(config)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report["results"], indent=2))
+    print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare_reports(report, json.load(f), args.tolerance)
+        if regressions:
+            print("Regressions against baseline:\n  " + "\n  ".join(regressions))
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
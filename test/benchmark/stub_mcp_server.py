@@ -0,0 +1,97 @@
+"""
+Local stand-in for prod_assistant/mcp_server/product_search_server.py:
+same tool names and output format, backed by the in-memory vector store.
+"""
+import asyncio
+import socket
+import threading
+import time
+from typing import Optional
+
+import uvicorn
+from mcp.server.fastmcp import FastMCP
+from langchain_core.vectorstores import VectorStore
+
+from prod_assistant.retriever.context_packer import ContextPacker
+from prod_assistant.retriever.query_constraints import QueryConstraints
+from prod_assistant.utils.config_loader import load_config
+
+
+def format_docs(docs) -> str:
+    """Same layout as product_search_server.format_docs for (doc, similarity) pairs."""
+    formatted_chunks = []
+    for d, score in docs:
+        meta = d.metadata or {}
+        formatted_chunks.append(
+            f"Title: {meta.get('product_title', 'N/A')}\n"
+            f"Price: {meta.get('price', 'N/A')}\n"
+            f"Rating: {meta.get('rating', 'N/A')}\n"
+            f"Similarity: {score:.3f}\n"
+            f"Reviews:\n{d.page_content.strip()}"
+        )
+    return "\n\n---\n\n".join(formatted_chunks)
+
+
+def build_stub_mcp(vector_store: VectorStore, top_k: int = 4, web_latency_ms: float = 100.0) -> FastMCP:
+    mcp = FastMCP("hybrid_search", log_level="WARNING")
+    config = load_config()
+    packer = ContextPacker.from_config(config) if config.get("context_packer", {}).get("enabled", False) else None
+
+    @mcp.tool()
+    async def get_product_info(query: str, timeout_seconds: Optional[float] = None,
+                               lambda_mult: Optional[float] = None) -> str:
+        """Retrieve product information for a given query from local retriever."""
+        # lambda_mult is accepted for signature parity; the stub ranks by similarity only
+        # Retriever.metadata_filter as a predicate: the in-memory store filters Documents, not metadata queries
+        constraints = QueryConstraints.extract(query)
+        doc_filter = (lambda doc: constraints.matches(doc.metadata)) if constraints else None
+        docs = await vector_store.asimilarity_search_with_score(query, k=top_k, filter=doc_filter)
+        if not docs and doc_filter:
+            docs = await vector_store.asimilarity_search_with_score(query, k=top_k)
+        context = packer.pack(query, docs) if packer else format_docs(docs)
+        return context if context.strip() else "No local results found."
+
+    @mcp.tool()
+    async def web_search(query: str, timeout_seconds: Optional[float] = None) -> str:
+        """Search the web using DuckDuckGo if retriever has no results."""
+        if timeout_seconds is not None and timeout_seconds < web_latency_ms / 1000:
+            await asyncio.sleep(timeout_seconds)
+            return "Web search timed out."
+        await asyncio.sleep(web_latency_ms / 1000)
+        return f"Web results for '{query}': prices and reviews from popular Indian e-commerce sites."
+
+    return mcp
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ServerThread:
+    """Run an ASGI app with uvicorn on its own thread and event loop."""
+
+    def __init__(self, app, port: int):
+        self.port = port
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on")
+        )
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout: float = 30.0) -> "ServerThread":
+        self.thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError(f"Server on port {self.port} failed to start")
+            time.sleep(0.05)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
@@ -0,0 +1,128 @@
+"""
+Deterministic stand-ins for the paid / remote dependencies of the assistant:
+a chat model with configurable latency, hashing embeddings and an in-memory
+vector store seeded from data/product_reviews.csv.
+"""
+import asyncio
+import hashlib
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.vectorstores import InMemoryVectorStore
+
+_TOKEN = re.compile(r"\w+")
+
+
+class HashingEmbeddings(Embeddings):
+    """Bag-of-words feature hashing: texts sharing words get similar vectors, with no network calls."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.calls = 0
+
+    def _embed(self, text: str) -> List[float]:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for word in _TOKEN.findall(text.lower()):
+            digest = hashlib.md5(word.encode("utf-8")).digest()
+            vec[int.from_bytes(digest[:4], "little") % self.dim] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vec)
+        return (vec / norm if norm else vec).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        return self._embed(text)
+
+    async def aembed_documents(self, texts: List[str], **kwargs) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str, **kwargs) -> List[float]:
+        return self.embed_query(text)
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Chat model that answers from the prompt shape after a fixed delay:
+    graders get "yes", rewrites get a search query, everything else a canned answer.
+    Streaming emits the answer word by word after the same time-to-first-token.
+    """
+
+    latency_ms: float = 200.0
+    token_interval_ms: float = 5.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-chat"
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        prompt = str(messages[-1].content)
+        lowered = prompt.lower()
+        if "answer yes or no" in lowered:
+            return "yes"
+        if "rewrite" in lowered:
+            return "best smartphone price and reviews in india"
+        return ("Based on the product reviews, this phone offers a great display, solid battery life "
+                "and a good camera for its price. Check the listed price and rating before buying.")
+
+    def _message(self, messages: List[BaseMessage], text: str) -> AIMessage:
+        input_tokens = sum(len(str(m.content)) for m in messages) // 4
+        output_tokens = len(text) // 4
+        return AIMessage(content=text, usage_metadata={
+            "input_tokens": input_tokens, "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        })
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        time.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages, self._reply(messages)))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        await asyncio.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages, self._reply(messages)))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        self.calls += 1
+        time.sleep(self.latency_ms / 1000)
+        for word in re.split(r"(\s+)", self._reply(messages)):
+            if word:
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=word))
+                if run_manager:
+                    run_manager.on_llm_new_token(word, chunk=chunk)
+                yield chunk
+                time.sleep(self.token_interval_ms / 1000)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        self.calls += 1
+        await asyncio.sleep(self.latency_ms / 1000)
+        for word in re.split(r"(\s+)", self._reply(messages)):
+            if word:
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=word))
+                if run_manager:
+                    await run_manager.on_llm_new_token(word, chunk=chunk)
+                yield chunk
+                await asyncio.sleep(self.token_interval_ms / 1000)
+
+
+def load_product_documents():
+    """Documents exactly as DataIngestion.transform_data builds them from data/product_reviews.csv."""
+    from prod_assistant.etl.data_ingestion import DataIngestion
+    return DataIngestion().transform_data()
+
+
+def build_vector_store(embeddings: Optional[Embeddings] = None) -> InMemoryVectorStore:
+    """In-memory vector store seeded from the product CSV."""
+    store = InMemoryVectorStore(embedding=embeddings or HashingEmbeddings())
+    store.add_documents(load_product_documents())
+    return store
@@ -0,0 +1,29 @@
+from test.benchmark.run_benchmark import BenchmarkConfig, compare_reports, run_benchmark
+
+
+def test_offline_benchmark_produces_comparable_report():
+    config = BenchmarkConfig(requests=12, concurrency=4, warmup_requests=2,
+                             llm_latency_ms=5, web_latency_ms=5)
+    report = run_benchmark(config)
+    results = report["results"]
+
+    assert results["requests"] == 12
+    assert results["errors"] == 0
+    assert set(results["latency_ms"]) == {"p50", "p95", "p99", "mean", "max"}
+    assert results["throughput_rps"] > 0
+    assert results["llm_calls"] > 0
+    assert compare_reports(report, report) == []
+
+
+def test_compare_reports_flags_latency_and_throughput_regressions():
+    baseline = {"results": {"latency_ms": {"p50": 100, "p95": 200, "p99": 300}, "ttft_ms": {},
+                            "throughput_rps": 50.0, "errors": 0}}
+    current = {"results": {"latency_ms": {"p50": 105, "p95": 260, "p99": 300}, "ttft_ms": {},
+                           "throughput_rps": 30.0, "errors": 2}}
+
+    regressions = compare_reports(current, baseline, tolerance=0.15)
+
+    assert any(r.startswith("latency_ms.p95") for r in regressions)
+    assert not any(r.startswith("latency_ms.p50") for r in regressions)
+    assert any(r.startswith("throughput_rps") for r in regressions)
+    assert any(r.startswith("errors") for r in regressions)
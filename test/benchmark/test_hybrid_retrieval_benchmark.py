@@ -0,0 +1,13 @@
+from test.benchmark.hybrid_retrieval_benchmark import LABELLED_QUERIES, run_hybrid_benchmark
+
+
+def test_hybrid_benchmark_reports_both_retrieval_modes():
+    report = run_hybrid_benchmark(repeats=1)
+
+    assert report["queries"] == len(LABELLED_QUERIES)
+    for mode in ("dense", "hybrid"):
+        assert 0.0 <= report[mode]["hit@1"] <= report[mode]["hit@k"] <= 1.0
+        assert report[mode]["latency_ms"]["p50"] > 0
+    # Exact model / colour names are in the titles, which only the lexical index sees
+    assert report["hybrid"]["hit@k"] >= report["dense"]["hit@k"]
+    assert report["hybrid"]["mrr"] > report["dense"]["mrr"]
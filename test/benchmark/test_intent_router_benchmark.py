@@ -0,0 +1,13 @@
+from test.benchmark.intent_router_benchmark import LABELLED_QUERIES, run_intent_benchmark
+
+
+def test_intent_benchmark_reports_both_routing_methods():
+    report = run_intent_benchmark(repeats=5)
+
+    assert report["queries"] == len(LABELLED_QUERIES)
+    for method in ("keyword", "embedding"):
+        assert 0.0 <= report[method]["route_accuracy"] <= 1.0
+    assert report["embedding"]["exemplars"] > 0
+    assert report["embedding"]["classify_latency_us"]["p50"] > 0
+    # Even bag-of-words hashing embeddings route the keyword-free product questions better
+    assert report["embedding"]["route_accuracy"] >= report["keyword"]["route_accuracy"]
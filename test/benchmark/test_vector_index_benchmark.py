@@ -0,0 +1,13 @@
+from test.benchmark.vector_index_benchmark import run_vector_index_benchmark
+
+
+def test_vector_index_benchmark_reports_recall_against_exact_search():
+    report = run_vector_index_benchmark(n=3000, dim=64, clusters=30, queries=20, nprobes=(1, 1000))
+
+    assert report["nlist"] > 1
+    assert report["exact"]["latency_ms"]["p50"] > 0
+    for nprobe in ("1", "1000"):
+        assert 0.0 <= report["ivf"][nprobe]["recall@10"] <= 1.0
+    # Probing every list is exact search
+    assert report["ivf"]["1000"]["recall@10"] == 1.0
+    assert report["ivf"]["1"]["recall@10"] <= report["ivf"]["1000"]["recall@10"]
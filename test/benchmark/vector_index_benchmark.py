@@ -0,0 +1,118 @@
+"""
+Recall and latency of the local IVF vector index
+(prod_assistant/retriever/ivf_index.py) against exact (exhaustive) search,
+on synthetic clustered embeddings of the configured dimensionality.
+
+    python -m test.benchmark.vector_index_benchmark
+    python -m test.benchmark.vector_index_benchmark --n 50000 --nprobe 4 8 16 --output ivf.json
+
+recall@k is the share of the exact top-k that the IVF search also returns;
+latencies are per query (embedding excluded) and include the MMR search the
+Retriever runs (fetch_k candidates, top_k results).
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from prod_assistant.retriever.ivf_index import IVFVectorStore
+from test.benchmark.stubs import HashingEmbeddings
+
+
+def clustered_vectors(n: int, dim: int, clusters: int, seed: int = 0, latent_dim: int = 32,
+                      spread: float = 1.0) -> np.ndarray:
+    """
+    Unit vectors with the shape of text embeddings: overlapping clusters (product
+    families) in a low-dimensional latent space, projected up to `dim`.
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, latent_dim))
+    latent = centres[rng.integers(0, clusters, n)] + spread * rng.standard_normal((n, latent_dim))
+    vectors = (latent @ rng.standard_normal((latent_dim, dim))).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _latency_ms(samples: List[float]) -> Dict[str, float]:
+    return {"p50": round(float(np.percentile(samples, 50)), 3), "p95": round(float(np.percentile(samples, 95)), 3)}
+
+
+def _search(store: IVFVectorStore, queries: np.ndarray, k: int, nprobe: int):
+    results, samples = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = store.search_by_vector(query, k, nprobe=nprobe)
+        samples.append((time.perf_counter() - start) * 1000)
+        results.append({row for row, _ in hits})
+    return results, samples
+
+
+def _mmr_latency(store: IVFVectorStore, queries: np.ndarray, k: int, fetch_k: int, nprobe: int) -> Dict[str, float]:
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        store.max_marginal_relevance_search_by_vector(query.tolist(), k=k, fetch_k=fetch_k, lambda_mult=0.7,
+                                                      nprobe=nprobe)
+        samples.append((time.perf_counter() - start) * 1000)
+    return _latency_ms(samples)
+
+
+def run_vector_index_benchmark(n: int = 20000, dim: int = 384, clusters: int = 200, queries: int = 200,
+                               k: int = 10, fetch_k: int = 20, nlist: int = 0,
+                               nprobes: Sequence[int] = (1, 4, 8, 16), seed: int = 0) -> dict:
+    """Build one IVF index over synthetic vectors and score each nprobe against exact search."""
+    vectors = clustered_vectors(n + queries, dim, clusters, seed)
+    corpus, query_vectors = vectors[:n], vectors[n:]
+
+    store = IVFVectorStore(HashingEmbeddings(dim), nlist=nlist, min_train_size=min(n, 1024), seed=seed)
+    start = time.perf_counter()
+    store.add_embeddings([str(i) for i in range(n)], corpus, ids=[str(i) for i in range(n)])
+    build_s = time.perf_counter() - start
+    lists = len(store._lists) if store.trained else 0
+
+    exact, exact_ms = _search(store, query_vectors, k, nprobe=max(lists, 1) + 1)
+    report = {
+        "vectors": n, "dim": dim, "queries": queries, "k": k, "nlist": lists,
+        "build_seconds": round(build_s, 3),
+        "exact": {"latency_ms": _latency_ms(exact_ms), "mmr_latency_ms": _mmr_latency(
+            store, query_vectors, k, fetch_k, max(lists, 1) + 1)},
+        "ivf": {},
+    }
+    for nprobe in nprobes:
+        found, ivf_ms = _search(store, query_vectors, k, nprobe)
+        recall = np.mean([len(f & e) / len(e) for f, e in zip(found, exact) if e])
+        latency = _latency_ms(ivf_ms)
+        report["ivf"][str(nprobe)] = {
+            f"recall@{k}": round(float(recall), 4),
+            "latency_ms": latency,
+            "mmr_latency_ms": _mmr_latency(store, query_vectors, k, fetch_k, nprobe),
+            "speedup_p50": round(report["exact"]["latency_ms"]["p50"] / max(latency["p50"], 1e-6), 2),
+        }
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=20000, help="vectors in the index")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=0, help="inverted lists (0 = about sqrt(n))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    report = run_vector_index_benchmark(args.n, args.dim, args.clusters, args.queries, args.k,
+                                        nlist=args.nlist, nprobes=args.nprobe)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Admission control: per-provider concurrency with a bounded wait queue, and
+the provider set behind the LLM router.
+"""
+import asyncio
+
+import pytest
+
+from prod_assistant.router.admission import IN_FLIGHT, REJECTIONS, AdmissionController, AdmissionRejected, ProviderLimiter
+
+CONFIG = {"admission": {
+    "default": {"max_concurrency": 16, "max_queue": 64, "queue_timeout_seconds": 10, "retry_after_seconds": 2},
+    "providers": {"groq": {"max_concurrency": 8, "retry_after_seconds": 5}},
+}}
+
+
+def test_router_provider_set_gets_the_tightest_member_limits():
+    limiter = AdmissionController(CONFIG).limiter("google+groq")
+
+    assert limiter.max_concurrency == 8
+    assert limiter.max_queue == 64
+    assert limiter.retry_after == 5
+
+
+def test_provider_set_can_be_configured_on_its_own():
+    config = {"admission": {**CONFIG["admission"], "providers": {
+        **CONFIG["admission"]["providers"], "google+groq": {"max_concurrency": 12}}}}
+
+    assert AdmissionController(config).limiter("google+groq").max_concurrency == 12
+
+
+def _limiter(provider: str, **kwargs) -> ProviderLimiter:
+    settings = {"max_concurrency": 1, "max_queue": 1, "queue_timeout": 1.0, "retry_after": 3, **kwargs}
+    return ProviderLimiter(provider, **settings)
+
+
+def test_full_queue_is_rejected_with_429():
+    limiter = _limiter("test-queue-full")
+
+    async def scenario():
+        ticket = await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())  # takes the only queue place
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire()
+        ticket.release()
+        (await waiter).release()
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+
+    assert (rejected.status_code, rejected.reason, rejected.retry_after) == (429, "queue_full", 3)
+    assert REJECTIONS.value(provider="test-queue-full", reason="queue_full") == 1
+
+
+def test_queue_deadline_is_rejected_with_503():
+    limiter = _limiter("test-queue-timeout", queue_timeout=0.05)
+
+    async def scenario():
+        ticket = await limiter.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire()
+        ticket.release()
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+
+    assert (rejected.status_code, rejected.reason) == (503, "queue_timeout")
+    assert limiter._waiting == 0
+
+
+def test_release_is_idempotent():
+    limiter = _limiter("test-release", max_concurrency=2, queue_timeout=0.01)
+
+    async def scenario():
+        ticket = await limiter.acquire()
+        ticket.release()
+        ticket.release()  # e.g. both the streaming generator and the background task
+        tickets = [await limiter.acquire() for _ in range(2)]
+        # A double release would have let a third request past max_concurrency
+        with pytest.raises(AdmissionRejected):
+            await limiter.acquire()
+        for t in tickets:
+            t.release()
+
+    asyncio.run(scenario())
+
+    assert IN_FLIGHT.value(provider="test-release") == 0
+
+
+def test_slot_waits_for_a_free_slot_and_releases_it():
+    limiter = _limiter("test-slot", queue_timeout=1.0)
+    order = []
+
+    async def request(name):
+        async with limiter.slot():
+            order.append(f"{name} start")
+            await asyncio.sleep(0.02)
+            order.append(f"{name} end")
+
+    async def scenario():
+        await asyncio.gather(request("first"), request("second"))
+
+    asyncio.run(scenario())
+
+    assert order == ["first start", "first end", "second start", "second end"]
+    assert IN_FLIGHT.value(provider="test-slot") == 0
@@ -0,0 +1,66 @@
+"""
+Regression test: graph nodes must await the LLM instead of blocking the
+event loop, so concurrent requests overlap instead of queueing.
+"""
+import asyncio
+import os
+import time
+from unittest import mock
+
+import pytest
+from langchain_core.tools import StructuredTool
+
+from test.benchmark.run_benchmark import OFFLINE_ENV
+from test.benchmark.stubs import HashingEmbeddings, StubChatModel
+
+LLM_LATENCY_MS = 500
+CONCURRENT_REQUESTS = 16
+
+
+async def _get_product_info(query: str) -> str:
+    return "Title: Apple iPhone 15\nPrice: 69900\nRating: 4.6\nReviews:\nGreat display and battery."
+
+
+async def _web_search(query: str) -> str:
+    return f"Web results for '{query}'"
+
+
+@pytest.fixture
+def rag_agent():
+    with mock.patch.dict(os.environ, {k: os.environ.get(k, v) for k, v in OFFLINE_ENV.items()}):
+        from prod_assistant.utils.model_loader import ModelLoader
+        from prod_assistant.workflow.agentic_workflow_with_mcp_websearch import AgenticRAG
+
+        llm = StubChatModel(latency_ms=LLM_LATENCY_MS)
+        with mock.patch.object(ModelLoader, "load_llm", lambda self: llm), \
+                mock.patch.object(ModelLoader, "load_embeddings", lambda self: HashingEmbeddings()):
+            agent = AgenticRAG()
+        agent.semantic_cache = None
+        agent.single_flight = None
+        agent.mcp_tools = [
+            StructuredTool.from_function(coroutine=_get_product_info, name="get_product_info",
+                                         description="Product lookup"),
+            StructuredTool.from_function(coroutine=_web_search, name="web_search", description="Web search"),
+        ]
+        yield agent
+
+
+def test_concurrent_runs_take_about_one_request_latency(rag_agent):
+    async def timed_runs():
+        # One request on its own first: grader + generator = two LLM round trips
+        start = time.perf_counter()
+        await rag_agent.run("What is the price of iPhone 15?")
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        answers = await asyncio.gather(*(
+            rag_agent.run(f"What is the price of phone model {i}?") for i in range(CONCURRENT_REQUESTS)
+        ))
+        return single, time.perf_counter() - start, answers
+
+    single, concurrent, answers = asyncio.run(timed_runs())
+
+    assert len(answers) == CONCURRENT_REQUESTS
+    assert all(answer and not answer.startswith("Error") for answer in answers)
+    # Blocking nodes would serialise the LLM calls (or queue them on the thread pool)
+    assert concurrent < single * 2, f"{CONCURRENT_REQUESTS} concurrent runs took {concurrent:.2f}s vs {single:.2f}s for one"
@@ -0,0 +1,55 @@
+"""
+ContextPacker: review deduplication across variants, query-overlap sentence
+ranking and the token budget.
+"""
+from langchain_core.documents import Document
+
+from prod_assistant.retriever.context_packer import ContextPacker
+from prod_assistant.workflow.relevance_gate import parse_context
+
+
+def _doc(title: str, reviews: str) -> Document:
+    return Document(page_content=reviews, metadata={"product_title": title, "price": "69900", "rating": "4.6"})
+
+
+def test_sentences_sharing_query_words_come_first():
+    packer = ContextPacker(max_sentences_per_product=1)
+    doc = _doc("Apple iPhone 15", "Looks premium. Battery lasts two days.|| Camera is sharp.")
+
+    packed = packer.pack("iphone battery", [doc])
+
+    assert "- Battery lasts two days." in packed
+    assert "Looks premium" not in packed and "Camera" not in packed
+
+
+def test_variants_with_the_same_reviews_are_emitted_once():
+    reviews = "Great battery. Bright screen.|| Fast charging."
+    packer = ContextPacker()
+
+    packed = packer.pack("phone", [_doc("iPhone 15 (Black, 128 GB)", reviews),
+                                   _doc("iPhone 15 (Blue, 128 GB)", reviews)])
+
+    assert packed.count("Great battery.") == 1
+    assert "Reviews: same as iPhone 15 (Black, 128 GB)" in packed
+
+
+def test_the_budget_keeps_every_header_and_fills_round_robin():
+    docs = [(_doc(f"Phone {p}", " ".join(f"Sentence {i} about phone {p}." for i in range(20))), 0.9 - p / 10)
+            for p in range(3)]
+    packer = ContextPacker(max_tokens=120, max_sentences_per_product=20)
+
+    packed = packer.pack("phone", docs)
+    chunks = packed.split("\n\n---\n\n")
+
+    assert packer.count_tokens(packed) <= 120
+    assert [c.splitlines()[0] for c in chunks] == ["Title: Phone 0", "Title: Phone 1", "Title: Phone 2"]
+    bullets = [c.count("\n- ") for c in chunks]
+    assert max(bullets) - min(bullets) <= 1 and min(bullets) >= 1
+
+
+def test_output_keeps_the_format_docs_layout_and_similarity():
+    packed = ContextPacker().pack("iphone", [(_doc("Apple iPhone 15", "Great battery."), 0.8125)])
+
+    assert parse_context(packed)[0][1] == 0.812
+    assert packed.startswith("Title: Apple iPhone 15\nPrice: 69900\nRating: 4.6\nSimilarity: 0.812\nReviews:\n")
+    assert ContextPacker().pack("iphone", []) == ""
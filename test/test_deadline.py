@@ -0,0 +1,144 @@
+"""
+Deadline: budget accounting and expiry, and the graph degrading instead of
+failing when an optional step runs out of time or is unavailable.
+"""
+import asyncio
+import os
+import time
+from unittest import mock
+
+import pytest
+from langchain_core.tools import StructuredTool
+
+from prod_assistant.utils.deadline import DEADLINE_EXCEEDED, DEADLINE_SKIPPED, Deadline, DeadlineExceeded
+from test.benchmark.run_benchmark import OFFLINE_ENV
+from test.benchmark.stubs import HashingEmbeddings, StubChatModel
+
+PRODUCT = "Title: Apple iPhone 15\nPrice: 69900\nRating: 4.6\nSimilarity: 0.420\nReviews:\nGreat display and battery."
+
+
+def test_optional_budget_keeps_the_answer_reserve():
+    deadline = Deadline.after(10, reserve=4)
+
+    assert deadline.remaining() == pytest.approx(10, abs=0.1)
+    assert deadline.optional_budget() == pytest.approx(6, abs=0.1)
+    assert deadline.allows("deadline-test-fits", 5)
+    assert not deadline.allows("deadline-test-skip", 7)
+    assert DEADLINE_SKIPPED.value(step="deadline-test-skip") == 1
+
+
+def test_an_expired_deadline_has_no_budget_and_refuses_to_start_steps():
+    deadline = Deadline(time.time() - 1, reserve=4)
+
+    async def step():
+        return "never awaited"
+
+    coro = step()
+    with pytest.raises(DeadlineExceeded, match="no time budget left"):
+        asyncio.run(deadline.run("deadline-test-expired", coro))
+    assert (deadline.remaining(), deadline.optional_budget()) == (0.0, 0.0)
+    assert coro.cr_frame is None  # closed, no "never awaited" warning
+    assert DEADLINE_EXCEEDED.value(step="deadline-test-expired") == 1
+
+
+def test_a_step_running_past_the_deadline_is_cancelled():
+    cancelled = asyncio.Event()
+
+    async def slow_step():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def scenario():
+        start = time.perf_counter()
+        with pytest.raises(DeadlineExceeded):
+            await Deadline.after(0.1).run("deadline-test-cutoff", slow_step())
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0)
+        assert cancelled.is_set()
+        return elapsed
+
+    elapsed = asyncio.run(scenario())
+
+    assert elapsed < 1
+    assert DEADLINE_EXCEEDED.value(step="deadline-test-cutoff") == 1
+
+
+def test_optional_steps_stop_before_the_reserve_and_leave_time_for_later_steps():
+    async def scenario():
+        deadline = Deadline.after(1.0, reserve=0.5)
+        with pytest.raises(DeadlineExceeded):
+            await deadline.run("deadline-test-optional", asyncio.sleep(0.8), optional=True)
+        # Required steps may use the reserve
+        return await deadline.run("deadline-test-required", asyncio.sleep(0.1, result="answer"))
+
+    assert asyncio.run(scenario()) == "answer"
+
+
+class NotRelevantChatModel(StubChatModel):
+    """Grades every context as not relevant, so the graph falls back to web search."""
+
+    def _reply(self, messages):
+        if "answer yes or no" in str(messages[-1].content).lower():
+            return "no"
+        return super()._reply(messages)
+
+
+class BrokenRewriterChatModel(NotRelevantChatModel):
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        if "rewrite" in str(messages[-1].content).lower():
+            raise RuntimeError("provider down")
+        return await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+async def _get_product_info(query: str, timeout_seconds: float = None) -> str:
+    return PRODUCT
+
+
+def _agent(llm, tools):
+    with mock.patch.dict(os.environ, {k: os.environ.get(k, v) for k, v in OFFLINE_ENV.items()}):
+        from prod_assistant.utils.model_loader import ModelLoader
+        from prod_assistant.workflow.agentic_workflow_with_mcp_websearch import AgenticRAG
+
+        with mock.patch.object(ModelLoader, "load_llm", lambda self: llm), \
+                mock.patch.object(ModelLoader, "load_embeddings", lambda self: HashingEmbeddings()):
+            agent = AgenticRAG()
+    agent.semantic_cache = None
+    agent.single_flight = None
+    agent.relevance_gate = None
+    agent.query_normalizer = None
+    agent.rewrite_cache = None
+    agent.mcp_tools = [StructuredTool.from_function(coroutine=_get_product_info, name="get_product_info",
+                                                    description="Product lookup")] + tools
+    return agent
+
+
+def test_missing_web_search_tool_degrades_to_the_retrieved_products():
+    agent = _agent(NotRelevantChatModel(latency_ms=1), tools=[])
+
+    answer = asyncio.run(agent.run("Which phone has the best battery?"))
+
+    assert answer.startswith("I could not finish a full answer in time")
+    assert "Apple iPhone 15 (69900, rated 4.6)" in answer
+
+
+def test_failed_rewrite_searches_the_web_with_the_original_question():
+    searched = []
+
+    async def web_search(query: str, timeout_seconds: float = None) -> str:
+        searched.append(query)
+        return f"Web results for '{query}'"
+
+    tool = StructuredTool.from_function(coroutine=web_search, name="web_search", description="Web search")
+    agent = _agent(BrokenRewriterChatModel(latency_ms=1), tools=[tool])
+    # Grader -> Rewriter -> WebSearch, without the speculative search of the original question
+    agent.speculative = False
+    agent.workflow = agent._build_workflow()
+    agent.app = agent.workflow.compile(checkpointer=agent.checkpointer)
+
+    answer = asyncio.run(agent.run("Which phone has the best battery?"))
+
+    assert searched == ["Which phone has the best battery?"]
+    assert answer and not answer.startswith("Error")
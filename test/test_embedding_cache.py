@@ -0,0 +1,101 @@
+"""
+Batched query embeddings must live in the same space, and the same cache
+entries, as single-query embeddings; the disk tier stays off the event loop.
+"""
+import asyncio
+import time
+from typing import List
+
+import pytest
+
+from prod_assistant.cache.embedding_cache import CachedEmbeddings, aembed_queries
+from prod_assistant.cache.sqlite_store import SQLiteStore
+from test.benchmark.stubs import HashingEmbeddings
+
+
+class AsymmetricEmbeddings(HashingEmbeddings):
+    """Retrieval-model stand-in: documents and queries embed differently."""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [[-x for x in vector] for vector in super().embed_documents(texts)]
+
+
+def test_batched_queries_match_single_query_vectors():
+    embeddings = AsymmetricEmbeddings()
+    queries = ["cheap phone with good battery", "pixel 9 camera"]
+
+    batch = asyncio.run(aembed_queries(embeddings, queries))
+
+    assert batch == [embeddings.embed_query(q) for q in queries]
+
+
+def test_batched_queries_share_the_query_cache_entries():
+    underlying = AsymmetricEmbeddings()
+    cached = CachedEmbeddings(underlying, "stub-model")
+
+    async def embed():
+        single = await cached.aembed_query("pixel 9 camera")
+        calls = underlying.calls
+        batch = await aembed_queries(cached, ["pixel 9 camera"])
+        return single, batch, underlying.calls - calls
+
+    single, batch, new_calls = asyncio.run(embed())
+
+    assert batch == [single]
+    assert new_calls == 0
+
+
+def test_failed_query_embedding_is_returned_in_place():
+    class FlakyEmbeddings(HashingEmbeddings):
+        def embed_query(self, text: str) -> List[float]:
+            if "fail" in text:
+                raise RuntimeError("embedding API down")
+            return super().embed_query(text)
+
+    vectors = asyncio.run(aembed_queries(FlakyEmbeddings(), ["ok", "fail"]))
+
+    assert isinstance(vectors[0], list)
+    with pytest.raises(RuntimeError):
+        raise vectors[1]
+
+
+
+class SlowStore(SQLiteStore):
+    """A store on a busy disk: every read and write takes a while."""
+
+    def get(self, key: str):
+        time.sleep(0.1)
+        return super().get(key)
+
+    def set(self, key: str, value, ttl_seconds=None):
+        time.sleep(0.1)
+        super().set(key, value, ttl_seconds)
+
+
+def test_disk_tier_does_not_block_the_event_loop(tmp_path):
+    underlying = HashingEmbeddings()
+    cached = CachedEmbeddings(underlying, "stub-model", store=SlowStore(str(tmp_path / "embeddings.sqlite")))
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        query = await cached.aembed_query("pixel 9 camera")  # disk miss, then disk write
+        documents = await cached.aembed_documents(["pixel 9 camera", "galaxy s24"])
+        cached._memory.clear()
+        from_disk = await cached.aembed_query("pixel 9 camera")
+        task.cancel()
+        return query, documents, from_disk, ticks
+
+    query, documents, from_disk, ticks = asyncio.run(scenario())
+
+    assert from_disk == pytest.approx(query)
+    assert len(documents) == 2 and underlying.calls == 2
+    # ~0.7s of disk time: the loop kept running alongside it
+    assert ticks >= 20
@@ -0,0 +1,117 @@
+"""
+HedgedChatModel: hedging, failover and cooldown across providers, and the
+persistent LLM cache answering streamed node calls (astream_events turns
+every node's ainvoke into a stream).
+"""
+import asyncio
+import time
+
+import pytest
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
+
+from prod_assistant.cache.llm_cache import PersistentLLMCache
+from prod_assistant.cache.sqlite_store import SQLiteStore
+from prod_assistant.utils.hedged_llm import HEDGES, INVOKE, PROVIDER_OUTCOMES, HedgedChatModel
+from test.benchmark.stubs import StubChatModel
+
+
+async def _run_node_under_stream_events(llm, question: str) -> str:
+    chain = ChatPromptTemplate.from_template("Rewrite this query: {question}") | llm | StrOutputParser()
+
+    async def node(inputs):
+        return await chain.ainvoke(inputs)
+
+    answer = None
+    async for event in RunnableLambda(node).astream_events({"question": question}, version="v2"):
+        if event["event"] == "on_chain_end" and event["name"] == "node":
+            answer = event["data"]["output"]
+    return answer
+
+
+def test_hedged_model_hits_the_cache_under_astream_events(tmp_path):
+    cache = PersistentLLMCache(SQLiteStore(str(tmp_path / "llm_cache.sqlite")))
+    primary, secondary = StubChatModel(latency_ms=1), StubChatModel(latency_ms=1)
+    llm = HedgedChatModel.from_config({}, {"openai": primary, "google": secondary}, cache=cache)
+
+    async def runs():
+        return [await _run_node_under_stream_events(llm, "cheap phone") for _ in range(3)]
+
+    answers = asyncio.run(runs())
+
+    assert len(set(answers)) == 1 and answers[0]
+    assert primary.calls + secondary.calls == 1
+
+
+def test_cache_key_covers_the_wrapped_providers():
+    one = HedgedChatModel.from_config({}, {"openai": StubChatModel()})
+    other = HedgedChatModel.from_config({}, {"openai": StubChatModel(), "google": StubChatModel()})
+
+    assert one._get_llm_string() != other._get_llm_string()
+
+
+class FailingChatModel(StubChatModel):
+    """Provider that errors on every call."""
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        raise RuntimeError("provider down")
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        raise RuntimeError("provider down")
+
+
+def test_slow_provider_is_hedged_and_the_first_answer_wins():
+    slow, fast = StubChatModel(latency_ms=500), StubChatModel(latency_ms=1)
+    llm = HedgedChatModel(models={"hedge-slow": slow, "hedge-fast": fast}, initial_hedge_delay=0.05)
+
+    start = time.perf_counter()
+    answer = asyncio.run(llm.ainvoke("Which phone has the best battery?"))
+    elapsed = time.perf_counter() - start
+
+    assert answer.content
+    assert elapsed < 0.4
+    assert (slow.calls, fast.calls) == (1, 1)
+    assert HEDGES.value(kind=INVOKE) >= 1
+    assert PROVIDER_OUTCOMES.value(provider="hedge-fast", kind=INVOKE, outcome="won") == 1
+    assert PROVIDER_OUTCOMES.value(provider="hedge-slow", kind=INVOKE, outcome="lost") == 1
+
+
+def test_errors_fail_over_and_put_the_provider_in_cooldown():
+    broken, healthy = FailingChatModel(latency_ms=1), StubChatModel(latency_ms=1)
+    llm = HedgedChatModel(models={"failover-broken": broken, "failover-healthy": healthy},
+                          failure_threshold=2, cooldown_seconds=60)
+
+    async def runs():
+        return [await llm.ainvoke(f"question {i}") for i in range(3)]
+
+    answers = asyncio.run(runs())
+
+    assert all(a.content for a in answers)
+    # Tried first twice, then skipped while in cooldown
+    assert broken.calls == 2 and healthy.calls == 3
+    assert not llm.stats("failover-broken").healthy
+    assert llm.ranked() == ["failover-healthy", "failover-broken"]
+    assert PROVIDER_OUTCOMES.value(provider="failover-broken", kind=INVOKE, outcome="failed") == 2
+
+
+def test_sync_invoke_fails_over_and_raises_when_every_provider_fails():
+    llm = HedgedChatModel(models={"sync-broken": FailingChatModel(), "sync-healthy": StubChatModel(latency_ms=1)})
+    assert llm.invoke("question").content
+
+    down = HedgedChatModel(models={"sync-down-a": FailingChatModel(), "sync-down-b": FailingChatModel()})
+    with pytest.raises(RuntimeError, match="provider down"):
+        down.invoke("question")
+
+
+def test_measured_providers_are_ranked_by_median_latency():
+    llm = HedgedChatModel(models={"rank-a": StubChatModel(), "rank-b": StubChatModel()}, min_samples=2)
+    for _ in range(2):
+        llm.stats("rank-a").record_latency(INVOKE, 0.8)
+        llm.stats("rank-b").record_latency(INVOKE, 0.2)
+
+    assert llm.ranked() == ["rank-b", "rank-a"]
+    assert llm.hedge_delay("rank-b") == pytest.approx(0.25)  # p95 of 0.2s, clamped to hedge_min_delay
@@ -0,0 +1,55 @@
+"""
+IntentRouter: exemplars are embedded as queries, the nearest exemplar picks
+the intent, and the keyword rule answers below `min_similarity`.
+"""
+import asyncio
+from typing import List
+
+import numpy as np
+import pytest
+
+from prod_assistant.workflow.intent_router import CHITCHAT, RETRIEVE, INTENT_DECISIONS, IntentRouter
+from test.benchmark.stubs import HashingEmbeddings
+
+
+class AsymmetricEmbeddings(HashingEmbeddings):
+    """Retrieval-model stand-in: documents and queries embed differently."""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [[-x for x in vector] for vector in super().embed_documents(texts)]
+
+
+def test_intent_router_embeds_exemplars_as_queries():
+    embeddings = AsymmetricEmbeddings()
+    router = IntentRouter({"compare": ["compare pixel 9 and galaxy s24"], "chitchat": ["hello there"]})
+    asyncio.run(router.build(embeddings))
+
+    intent, similarity = router.classify(embeddings.embed_query("compare pixel 9 and galaxy s24"))
+
+    assert intent == "compare"
+    assert similarity == pytest.approx(1.0)
+
+
+def test_below_min_similarity_the_keyword_rule_routes():
+    router = IntentRouter({"compare": ["compare"], "chitchat": ["hello"]}, min_similarity=0.5)
+    router.load([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], ["compare", "chitchat"])
+    unrelated = [0.2, 0.1, 1.0]
+    before = INTENT_DECISIONS.value(intent=RETRIEVE, method="keyword")
+
+    assert router.classify(unrelated) == (None, pytest.approx(0.2 / np.linalg.norm(unrelated)))
+    assert router.route("phone price?", unrelated) == RETRIEVE
+    assert router.route("thanks!", None) == CHITCHAT
+    assert router.route("hello", [0.1, 1.0, 0.0]) == "chitchat"
+    assert INTENT_DECISIONS.value(intent=RETRIEVE, method="keyword") == before + 1
+
+
+def test_a_failed_exemplar_embedding_leaves_the_router_unbuilt():
+    class BrokenEmbeddings(HashingEmbeddings):
+        def embed_query(self, text: str) -> List[float]:
+            raise RuntimeError("embedding API down")
+
+    router = IntentRouter({"compare": ["compare pixel 9 and galaxy s24"]})
+
+    with pytest.raises(RuntimeError, match="embedding API down"):
+        asyncio.run(router.build(BrokenEmbeddings()))
+    assert not router.ready
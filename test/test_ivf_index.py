@@ -0,0 +1,60 @@
+"""
+IVFVectorStore: search results stay consistent (document, vector and score
+from the same rows) while other threads add and delete documents.
+"""
+import threading
+
+import numpy as np
+
+from prod_assistant.retriever.ivf_index import IVFVectorStore
+from test.benchmark.stubs import HashingEmbeddings
+
+
+def _store(n: int = 200) -> IVFVectorStore:
+    store = IVFVectorStore(HashingEmbeddings(dim=64), min_train_size=50, nprobe=4)
+    store.add_texts([f"phone model {i} review" for i in range(n)], ids=[f"doc-{i}" for i in range(n)])
+    return store
+
+
+def test_hits_keep_pointing_at_the_rows_they_were_scored_on():
+    store = _store()
+    query = store.embedding.embed_query("phone model 7 review")
+    hits, snapshot = store._search(query, 3, None, None)
+
+    # Deleting earlier rows shifts every later row of the live store
+    store.delete([f"doc-{i}" for i in range(50)])
+
+    assert snapshot.document(hits[0][0]).id == "doc-7"
+    assert store.similarity_search_by_vector(query, k=1)[0].id != "doc-7"
+
+
+def test_documents_match_their_scores_and_vectors_under_concurrent_writes():
+    store = _store()
+    embed = store.embedding
+    stop = threading.Event()
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            store.delete([f"doc-{i % 200}"])
+            store.add_texts([f"phone model {i % 200} review"], ids=[f"doc-{i % 200}"])
+            i += 1
+
+    def vector(text):
+        return np.asarray(embed.embed_query(text), dtype=np.float32)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        mismatches = 0
+        for i in range(500):
+            query = vector(f"phone model {i % 200} review")
+            for doc, score in store.similarity_search_with_score_by_vector(query.tolist(), k=5):
+                mismatches += abs(score - (1.0 + float(vector(doc.page_content) @ query)) / 2.0) > 1e-4
+            _, hits = store.similarity_search_with_embedding(f"phone model {i % 200} review", k=5)
+            mismatches += sum(not np.allclose(v, vector(doc.page_content), atol=1e-5) for doc, v in hits)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert mismatches == 0
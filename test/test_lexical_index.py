@@ -0,0 +1,107 @@
+"""
+LexicalIndex: BM25 over titles and reviews (title weighting, filters,
+persistence, re-ingestion merges) and reciprocal-rank fusion ordering.
+"""
+import copy
+import os
+from unittest import mock
+
+import pytest
+from langchain_core.documents import Document
+
+from prod_assistant.retriever.lexical_index import LexicalIndex, document_key, reciprocal_rank_fusion
+from test.benchmark.run_benchmark import OFFLINE_ENV
+
+
+def _doc(product_id: str, title: str, review: str, price: int = 30000) -> Document:
+    return Document(page_content=review,
+                    metadata={"product_id": product_id, "product_title": title, "price_inr": price})
+
+
+DOCS = [
+    _doc("p1", "Samsung Galaxy S25 Plus (Navy, 256 GB)", "Bright display, the battery lasts a day.", 99999),
+    _doc("p2", "Google Pixel 10 (Obsidian, 128 GB)", "The camera beats the Samsung Galaxy S25 Plus.", 79999),
+    _doc("p3", "Redmi Note 14 (Black, 128 GB)", "Good battery for the price.", 17999),
+]
+
+
+def _titles(hits) -> list:
+    return [doc.metadata["product_title"] for doc, _ in hits]
+
+
+def test_title_matches_outrank_review_mentions():
+    index = LexicalIndex.build(DOCS)
+
+    hits = index.search("galaxy s25 plus navy")
+
+    assert _titles(hits)[:2] == [DOCS[0].metadata["product_title"], DOCS[1].metadata["product_title"]]
+    assert hits[0][1] > hits[1][1] > 0
+    assert index.search("nothing matches this") == []
+
+
+def test_title_weight_scales_title_matches():
+    scores = {w: LexicalIndex.build(DOCS, title_weight=w).scores("navy") for w in (1.0, 3.0)}
+
+    assert scores[3.0][0] == pytest.approx(3 * scores[1.0][0])
+
+
+def test_filter_drops_non_matching_products():
+    index = LexicalIndex.build(DOCS)
+
+    hits = index.search("battery", filter={"price_inr": {"$lte": 20000}})
+
+    assert _titles(hits) == [DOCS[2].metadata["product_title"]]
+
+
+def test_save_load_round_trip(tmp_path):
+    index = LexicalIndex.build(DOCS)
+    index.save(str(tmp_path))
+
+    loaded = LexicalIndex.load(str(tmp_path), title_weight=index.title_weight)
+
+    assert [(d.page_content, d.metadata) for d, _ in loaded.search("samsung battery")] == \
+        [(d.page_content, d.metadata) for d, _ in index.search("samsung battery")]
+    assert LexicalIndex.load(str(tmp_path / "missing")) is None
+
+
+def test_merge_replaces_reingested_products_and_keeps_the_rest():
+    updated = _doc("p3", "Redmi Note 14 (Black, 128 GB)", "Charges fast, sluggish software.", 16999)
+    new = _doc("p4", "OnePlus 13 (Green, 256 GB)", "Smooth and fast charging.")
+
+    merged = LexicalIndex.build(DOCS, title_weight=2.0).merged([updated, new])
+
+    assert sorted(document_key(d) for d in merged.documents) == sorted(document_key(d) for d in DOCS + [new])
+    assert merged.title_weight == 2.0
+    assert "OnePlus 13 (Green, 256 GB)" in _titles(merged.search("charging"))
+    assert _titles(merged.search("sluggish")) == ["Redmi Note 14 (Black, 128 GB)"]
+    assert merged.search("price") == []  # the replaced review is gone
+
+
+def test_ingesting_twice_keeps_both_batches_searchable(tmp_path):
+    with mock.patch.dict(os.environ, {k: os.environ.get(k, v) for k, v in OFFLINE_ENV.items()}):
+        from prod_assistant.etl.data_ingestion import DataIngestion
+
+        ingestion = DataIngestion()
+    ingestion.config = copy.deepcopy(ingestion.config)
+    ingestion.config.setdefault("retriever", {}).setdefault("hybrid", {})["lexical_index_path"] = str(tmp_path)
+
+    ingestion.build_lexical_index(DOCS[:2])
+    ingestion.build_lexical_index(DOCS[2:])
+
+    index = LexicalIndex.from_config(ingestion.config)
+    assert len(index) == 3
+    assert _titles(index.search("pixel"))[0] == DOCS[1].metadata["product_title"]
+    assert _titles(index.search("redmi"))[0] == DOCS[2].metadata["product_title"]
+
+
+def test_rrf_rewards_agreement_and_honours_weights():
+    dense, lexical = ["a", "b", "c"], ["d", "b", "e"]
+
+    fused = reciprocal_rank_fusion([dense, lexical], k=10)
+
+    assert [key for key, _ in fused] == ["b", "a", "d", "c", "e"]  # ties keep first-seen order
+    assert fused[0][1] == pytest.approx(2 / 12)
+    # A heavier lexical list moves its hits ahead of equally ranked dense hits
+    weighted = reciprocal_rank_fusion([dense, lexical], k=10, weights=[1.0, 2.0])
+    assert [key for key, _ in weighted] == ["b", "d", "e", "a", "c"]
+    assert reciprocal_rank_fusion([]) == []
@@ -0,0 +1,122 @@
+"""
+PersistentLLMCache: hits, misses and per-prompt-type TTLs, and a plain
+model answering streamed node calls from it.
+"""
+import asyncio
+import time
+
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
+
+from prod_assistant.cache.llm_cache import LLM_CACHE_LOOKUPS, PersistentLLMCache
+from prod_assistant.cache.sqlite_store import SQLiteStore
+from prod_assistant.prompt_library.prompts import PROMPT_REGISTRY, PromptType
+from test.benchmark.stubs import StubChatModel
+
+LLM_STRING = "[('_type', 'stub-chat'), ('temperature', 0)]"
+
+
+def _prompt(prompt_type: PromptType, question: str = "Is the Pixel 9 good?") -> str:
+    return dumps([HumanMessage(content=f"{PROMPT_REGISTRY[prompt_type].static_prefix()}\n{question}")])
+
+
+def _cache(tmp_path, **kwargs) -> PersistentLLMCache:
+    return PersistentLLMCache(SQLiteStore(str(tmp_path / "llm_cache.sqlite")), **kwargs)
+
+
+def test_miss_then_hit_for_the_same_prompt_and_model(tmp_path):
+    cache = _cache(tmp_path)
+    prompt = _prompt(PromptType.GRADER)
+    misses = LLM_CACHE_LOOKUPS.value(prompt="grader", result="miss")
+    hits = LLM_CACHE_LOOKUPS.value(prompt="grader", result="hit")
+
+    assert cache.lookup(prompt, LLM_STRING) is None
+    cache.update(prompt, LLM_STRING, [ChatGeneration(message=AIMessage(content="yes"))])
+    cached = cache.lookup(prompt, LLM_STRING)
+
+    assert [g.message.content for g in cached] == ["yes"]
+    assert LLM_CACHE_LOOKUPS.value(prompt="grader", result="miss") == misses + 1
+    assert LLM_CACHE_LOOKUPS.value(prompt="grader", result="hit") == hits + 1
+
+
+def test_other_model_parameters_or_prompt_miss(tmp_path):
+    cache = _cache(tmp_path)
+    prompt = _prompt(PromptType.GRADER)
+    cache.update(prompt, LLM_STRING, [ChatGeneration(message=AIMessage(content="yes"))])
+
+    assert cache.lookup(prompt, LLM_STRING.replace("0", "0.7")) is None
+    assert cache.lookup(_prompt(PromptType.GRADER, "Is the S24 good?"), LLM_STRING) is None
+
+
+def test_ttl_per_prompt_type(tmp_path):
+    cache = _cache(tmp_path, ttl_seconds={"grader": 0, "rewriter": 0.05}, default_ttl_seconds=3600)
+    answer = [ChatGeneration(message=AIMessage(content="answer"))]
+    for prompt_type in (PromptType.GRADER, PromptType.REWRITER, PromptType.ASSISTANT):
+        cache.update(_prompt(prompt_type), LLM_STRING, answer)
+
+    # TTL 0 disables caching for the type
+    assert cache.lookup(_prompt(PromptType.GRADER), LLM_STRING) is None
+    assert cache.lookup(_prompt(PromptType.REWRITER), LLM_STRING) is not None
+    time.sleep(0.1)
+    assert cache.lookup(_prompt(PromptType.REWRITER), LLM_STRING) is None
+    # Types without their own TTL use the default
+    assert cache.lookup(_prompt(PromptType.ASSISTANT), LLM_STRING) is not None
+
+
+def test_plain_model_answers_streamed_node_calls_from_the_cache(tmp_path):
+    llm = StubChatModel(latency_ms=1, cache=_cache(tmp_path))
+    chain = ChatPromptTemplate.from_template("Rewrite this query: {question}") | llm
+
+    async def node(inputs):
+        return (await chain.ainvoke(inputs)).content
+
+    async def runs():
+        for _ in range(3):
+            async for _event in RunnableLambda(node).astream_events({"question": "cheap phone"}, version="v2"):
+                pass
+
+    asyncio.run(runs())
+
+    assert llm.calls == 1
+
+
+class SlowStore(SQLiteStore):
+    """A store on a busy disk: every read and write takes a while."""
+
+    def get(self, key: str):
+        time.sleep(0.2)
+        return super().get(key)
+
+    def set(self, key: str, value, ttl_seconds=None):
+        time.sleep(0.2)
+        super().set(key, value, ttl_seconds)
+
+
+def test_async_lookup_and_update_do_not_block_the_event_loop(tmp_path):
+    cache = PersistentLLMCache(SlowStore(str(tmp_path / "llm_cache.sqlite")))
+    prompt = _prompt(PromptType.PRODUCT_BOT)
+    generation = [ChatGeneration(message=AIMessage(content="The Pixel 9 is good."))]
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await cache.aupdate(prompt, LLM_STRING, generation)
+        hit = await cache.alookup(prompt, LLM_STRING)
+        task.cancel()
+        return hit, ticks
+
+    hit, ticks = asyncio.run(scenario())
+
+    assert hit[0].message.content == "The Pixel 9 is good."
+    # ~0.4s of disk time: the loop kept running alongside it
+    assert ticks >= 10
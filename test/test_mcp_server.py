@@ -0,0 +1,47 @@
+"""
+MCP tool server: the caller's remaining time budget bounds every tool call,
+and a spent budget starts no work at all.
+"""
+import asyncio
+import importlib
+import os
+import sys
+from unittest import mock
+
+import pytest
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from test.benchmark.run_benchmark import OFFLINE_ENV
+from test.benchmark.stubs import HashingEmbeddings
+
+MODULE = "prod_assistant.mcp_server.product_search_server"
+
+
+@pytest.fixture
+def server():
+    with mock.patch.dict(os.environ, {k: os.environ.get(k, v) for k, v in OFFLINE_ENV.items()}), \
+            mock.patch("prod_assistant.retriever.retrieval.load_vector_store",
+                       lambda config, embeddings: InMemoryVectorStore(embedding=embeddings)), \
+            mock.patch("prod_assistant.utils.model_loader.ModelLoader.load_embeddings",
+                       lambda self: HashingEmbeddings()):
+        sys.modules.pop(MODULE, None)
+        yield importlib.import_module(MODULE)
+    sys.modules.pop(MODULE, None)
+
+
+def test_timeout_is_the_callers_budget_capped_at_the_server_limit(server):
+    assert server._timeout(None, 10) == 10
+    assert server._timeout(3.5, 10) == 3.5
+    assert server._timeout(30, 10) == 10
+    assert server._timeout(0.0, 10) == 0.0
+
+
+def test_spent_budget_returns_without_starting_work(server):
+    with mock.patch.object(server.retriever_obj, "call_retriever_with_scores") as search, \
+            mock.patch.object(server, "duckduckgo") as web:
+        product = asyncio.run(server.get_product_info("pixel 9 price", timeout_seconds=0.0))
+        web_result = asyncio.run(server.web_search("pixel 9 price", timeout_seconds=0.0))
+
+    assert "timed out" in product and "timed out" in web_result
+    search.assert_not_called()
+    web.run.assert_not_called()
@@ -0,0 +1,80 @@
+"""
+BoundedMemorySaver: conversation history window, and eviction of idle and
+least recently used threads.
+"""
+from typing import Annotated, Sequence, TypedDict
+from unittest import mock
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+from prod_assistant.workflow.memory import BoundedMemorySaver, trim_history
+
+
+class State(TypedDict):
+    messages: Annotated[Sequence[BaseMessage], add_messages]
+
+
+def _echo(state: State):
+    return {"messages": [AIMessage(content=f"re: {state['messages'][-1].content}")]}
+
+
+def _graph(saver: BoundedMemorySaver):
+    workflow = StateGraph(State)
+    workflow.add_node("echo", _echo)
+    workflow.add_edge(START, "echo")
+    workflow.add_edge("echo", END)
+    return workflow.compile(checkpointer=saver)
+
+
+def _turn(app, thread_id: str, text: str):
+    return app.invoke({"messages": [HumanMessage(content=text)]}, {"configurable": {"thread_id": thread_id}})
+
+
+def test_trim_history_keeps_the_most_recent_messages_within_the_budget():
+    messages = [HumanMessage(content=c * 10) for c in "abcde"]
+
+    assert [m.content[0] for m in trim_history(messages, max_messages=3, max_chars=1000)] == ["c", "d", "e"]
+    assert [m.content[0] for m in trim_history(messages, max_messages=5, max_chars=25)] == ["d", "e"]
+    # The last message always survives, even over budget
+    assert [m.content[0] for m in trim_history(messages, max_messages=5, max_chars=1)] == ["e"]
+
+
+def test_persisted_history_is_a_sliding_window():
+    saver = BoundedMemorySaver(max_messages=4)
+    app = _graph(saver)
+    for i in range(5):
+        _turn(app, "session", f"question {i}")
+
+    state = app.get_state({"configurable": {"thread_id": "session"}})
+
+    assert [m.content for m in state.values["messages"]] == ["question 3", "re: question 3",
+                                                              "question 4", "re: question 4"]
+    # Only the latest checkpoint of the thread is kept
+    assert sum(len(c) for c in saver.storage["session"].values()) == 1
+
+
+def test_least_recently_used_thread_is_evicted_beyond_max_threads():
+    saver = BoundedMemorySaver(max_threads=2)
+    app = _graph(saver)
+    _turn(app, "a", "hi")
+    _turn(app, "b", "hi")
+    _turn(app, "a", "again")  # "b" is now the least recently used
+    _turn(app, "c", "hi")
+
+    assert set(saver.storage) == {"a", "c"}
+    assert not any(key[0] == "b" for key in saver.blobs)
+
+
+def test_idle_threads_expire():
+    saver = BoundedMemorySaver(idle_ttl_seconds=60)
+    app = _graph(saver)
+    with mock.patch("prod_assistant.workflow.memory.time.monotonic", return_value=1000.0):
+        _turn(app, "idle", "hi")
+    with mock.patch("prod_assistant.workflow.memory.time.monotonic", return_value=1030.0):
+        _turn(app, "active", "hi")
+    with mock.patch("prod_assistant.workflow.memory.time.monotonic", return_value=1070.0):
+        _turn(app, "active", "again")
+
+    assert set(saver.storage) == {"active"}
@@ -0,0 +1,46 @@
+"""
+MMRCandidates: the vectorised selection picks exactly what langchain_core's
+maximal_marginal_relevance picks, and reranking keeps the search order.
+"""
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.vectorstores.utils import maximal_marginal_relevance
+
+from prod_assistant.retriever.mmr import MMRCandidates, mmr_select
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("k, lambda_mult", [(1, 0.5), (4, 0.5), (10, 0.7), (20, 0.0), (25, 1.0)])
+def test_selection_matches_langchain_core(seed, k, lambda_mult):
+    rng = np.random.default_rng(seed)
+    query = rng.normal(size=32).astype(np.float32)
+    # Unnormalised, correlated candidates: clusters around a few directions
+    centers = rng.normal(size=(4, 32))
+    embeddings = (centers[rng.integers(0, 4, 20)] + 0.5 * rng.normal(size=(20, 32))) * rng.uniform(0.5, 3, (20, 1))
+
+    expected = maximal_marginal_relevance(query, list(embeddings), lambda_mult=lambda_mult, k=k)
+
+    assert mmr_select(query, embeddings, k=k, lambda_mult=lambda_mult) == expected
+
+
+def test_empty_pool_and_non_positive_k_select_nothing():
+    assert mmr_select(np.ones(4), np.zeros((0, 4)), k=4) == []
+    assert mmr_select(np.ones(4), np.eye(4), k=0) == []
+
+
+def test_one_pool_reranks_with_different_k_and_lambda():
+    rng = np.random.default_rng(7)
+    query, embeddings = rng.normal(size=16), rng.normal(size=(12, 16))
+    docs = [Document(page_content=f"doc {i}") for i in range(12)]
+    candidates = MMRCandidates(query, embeddings, docs)
+
+    for k, lambda_mult in [(3, 0.5), (5, 0.9)]:
+        picks = maximal_marginal_relevance(query, list(embeddings), lambda_mult=lambda_mult, k=k)
+        reranked = candidates.rerank(k=k, lambda_mult=lambda_mult)
+
+        assert [doc.page_content for doc, _ in reranked] == [f"doc {i}" for i in sorted(picks)]
+        for doc, similarity in reranked:
+            i = int(doc.page_content.split()[1])
+            cosine = embeddings[i] @ query / (np.linalg.norm(embeddings[i]) * np.linalg.norm(query))
+            assert similarity == pytest.approx(cosine, abs=1e-5)
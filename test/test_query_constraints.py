@@ -0,0 +1,63 @@
+"""
+QueryConstraints: price and rating bounds extracted from shopping queries,
+and the metadata filter / predicate built from them.
+"""
+import pytest
+
+from prod_assistant.retriever.query_constraints import QueryConstraints
+
+
+def _bounds(query: str) -> tuple:
+    return QueryConstraints.extract(query).key
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("phones under 50000", (None, 50000, None)),
+    ("budget of ₹25,000", (None, 25000, None)),
+    ("under rs. 1,00,000", (None, 100000, None)),
+    ("phones above 15000", (15000, None, None)),
+    ("phones over 20000 under 40000", (20000, 40000, None)),
+    ("between 20k and 30k", (20000, 30000, None)),
+    ("between 30k and 20k", (20000, 30000, None)),  # reversed bounds are sorted
+    ("20k to 30k", (20000, 30000, None)),
+    ("rs 20000 - 30000", (20000, 30000, None)),
+    ("₹20,000 - ₹30,000", (20000, 30000, None)),
+    ("around 1 lakh", (90000, 110000, None)),
+])
+def test_price_bounds(query, expected):
+    assert _bounds(query) == expected
+
+
+@pytest.mark.parametrize("query, rating_min", [
+    ("4+ rating", 4.0),
+    ("rated at least 4.5", 4.5),
+    ("rating 4 and above", 4.0),
+    ("phones with 4.5 stars", 4.5),
+    ("rating above 6", None),  # not a 5-star rating
+    ("10 star phone", None),
+])
+def test_rating_bounds(query, rating_min):
+    assert QueryConstraints.extract(query).rating_min == rating_min
+
+
+@pytest.mark.parametrize("query", ["iphone 15 256 gb", "8k video camera", "256 gb - 512 gb", "cheap phones"])
+def test_other_numbers_are_not_bounds(query):
+    assert not QueryConstraints.extract(query)
+    assert QueryConstraints.extract(query).to_filter() is None
+
+
+def test_around_tolerance_is_configurable():
+    assert _bounds("around 50000") == (45000, 55000, None)
+    assert QueryConstraints.extract("around 50000", around_tolerance=0.2).key == (40000, 60000, None)
+
+
+def test_filter_and_predicate_agree():
+    constraints = QueryConstraints.extract("at least 4 stars under 30000")
+
+    assert constraints.to_filter() == {"$and": [{"price_inr": {"$lte": 30000}}, {"rating": {"$gte": 4.0}}]}
+    assert constraints.kinds == ["price_max", "rating_min"]
+    assert constraints.matches({"price_inr": 29999, "rating": 4.2})
+    assert not constraints.matches({"price_inr": 30001, "rating": 4.2})
+    assert not constraints.matches({"price_inr": 20000, "rating": 3.9})
+    # Products without a parsed price or rating cannot satisfy a bound on it
+    assert not constraints.matches({"rating": 4.5})
@@ -0,0 +1,64 @@
+"""
+QueryNormalizer: rule-based rewrite (fillers, rupee amounts, catalog model
+aliases) and the search-ready decision; RewriteCache persistence.
+"""
+import asyncio
+from unittest import mock
+
+from prod_assistant.cache.sqlite_store import SQLiteStore
+from prod_assistant.workflow.query_normalizer import QueryNormalizer, RewriteCache
+
+TITLES = [
+    "Samsung Galaxy S25 Ultra 5G (Titanium Black, 256 GB)",
+    "Samsung Galaxy S25 Plus 5G (Navy, 256 GB)",
+    "Google Pixel 10 (Obsidian, 128 GB)",
+]
+
+
+def test_request_phrasing_and_punctuation_are_dropped():
+    normalizer = QueryNormalizer()
+
+    assert normalizer.normalize("Please suggest me some good phones?!") == "good phones"
+
+
+def test_rupee_amounts_become_plain_integers():
+    normalizer = QueryNormalizer()
+
+    assert normalizer.normalize("phones under 1 lakh") == "phones under 100000 inr"
+    assert normalizer.normalize("phones under ₹1,00,000") == "phones under 100000 inr"
+
+
+def test_model_aliases_expand_to_the_full_catalog_name():
+    normalizer = QueryNormalizer(TITLES)
+
+    assert normalizer.normalize("s25 ultra camera") == "samsung galaxy s25 ultra camera"
+    assert normalizer.normalize("S25+ battery") == "samsung galaxy s25 plus battery"
+    assert normalizer.normalize("pixel 10 review") == "google pixel 10 review"
+    # A bare number is not a model name
+    assert normalizer.normalize("top 10 phones") == "top 10 phones"
+
+
+def test_search_ready_needs_a_model_a_price_or_enough_content_words():
+    normalizer = QueryNormalizer(TITLES, min_content_tokens=2)
+
+    assert normalizer.search_ready(normalizer.normalize("s25 ultra"))
+    assert normalizer.search_ready(normalizer.normalize("under 30k"))
+    assert normalizer.search_ready(normalizer.normalize("long battery life"))
+    assert not normalizer.search_ready(normalizer.normalize("gaming phone"))  # "phone" is a stopword
+    assert not normalizer.search_ready("")
+
+
+def test_missing_catalog_disables_aliases(tmp_path):
+    assert QueryNormalizer.load_titles(str(tmp_path / "missing.csv")) == []
+
+
+def test_rewrite_cache_round_trip_and_ttl(tmp_path):
+    cache = RewriteCache(SQLiteStore(str(tmp_path / "rewrite_cache.sqlite")), ttl_seconds=60)
+
+    async def scenario():
+        await cache.aset("which one", "best phone under 30000 inr")
+        return await cache.aget("which one"), await cache.aget("something else")
+
+    assert asyncio.run(scenario()) == ("best phone under 30000 inr", None)
+    with mock.patch("prod_assistant.cache.sqlite_store.time.time", return_value=10 ** 11):
+        assert cache.get("which one") is None
@@ -0,0 +1,69 @@
+"""
+RelevanceGate: parsing of the formatted retriever context, the mixed vector
+and lexical score, and the accept / reject / defer-to-the-LLM-grader bands.
+"""
+import pytest
+
+from prod_assistant.workflow.relevance_gate import GRADER_SKIPPED, RelevanceGate, parse_context
+
+
+def _chunk(title: str, reviews: str, similarity=None) -> str:
+    return (
+        f"Title: {title}\nPrice: 69900\nRating: 4.6\n"
+        + (f"Similarity: {similarity:.3f}\n" if similarity is not None else "")
+        + f"Reviews:\n{reviews}"
+    )
+
+
+def _context(*chunks) -> str:
+    return "\n\n---\n\n".join(chunks)
+
+
+def test_parse_context_reads_the_similarity_line_when_present():
+    context = _context(_chunk("Apple iPhone 15", "Great battery", 0.812), _chunk("Pixel 9", "Sharp camera"))
+
+    chunks = parse_context(context)
+
+    assert [similarity for _, similarity in chunks] == [pytest.approx(0.812), None]
+    assert chunks[0][0].startswith("Title: Apple iPhone 15")
+
+
+def test_parse_context_skips_text_without_products():
+    assert parse_context("No local results found.") == []
+    assert parse_context("") == []
+
+
+def test_no_products_scores_zero_and_missing_similarities_defer_to_the_grader():
+    gate = RelevanceGate()
+
+    assert gate.score("iphone 15 price", "No local results found.") == 0.0
+    assert gate.score("iphone 15 price", _context(_chunk("Apple iPhone 15", "Great battery"))) is None
+    assert gate.decide("iphone 15 price", _context(_chunk("Apple iPhone 15", "Great battery"))) is None
+
+
+def test_score_mixes_the_best_similarity_with_the_best_word_overlap():
+    gate = RelevanceGate(vector_weight=0.7, lexical_weight=0.3)
+    context = _context(_chunk("Apple iPhone 15", "Great battery", 0.6),
+                       _chunk("Samsung Galaxy S24", "Bright screen", 0.9))
+
+    # "iphone" and "battery" are both in the first product, the best similarity is the second's
+    assert gate.score("iphone battery", context) == pytest.approx(0.7 * 0.9 + 0.3 * 1.0)
+
+
+def test_decide_accepts_rejects_and_defers_by_band():
+    gate = RelevanceGate(accept_above=0.75, reject_below=0.4)
+    relevant = _context(_chunk("Apple iPhone 15", "Great battery", 0.95))
+    unrelated = _context(_chunk("Dyson vacuum", "Strong suction", 0.1))
+    uncertain = _context(_chunk("Pixel 9", "Sharp camera", 0.7))
+
+    assert gate.decide("iphone battery", relevant) is True
+    assert gate.decide("iphone battery", unrelated) is False
+    assert gate.decide("iphone battery", uncertain) is None  # 0.7 * 0.7 = 0.49
+    assert gate.decide("iphone battery", "No local results found.") is False
+    assert GRADER_SKIPPED.value(verdict="relevant") >= 1
+
+
+def test_from_config_reads_the_relevance_gate_block():
+    gate = RelevanceGate.from_config({"relevance_gate": {"accept_above": 0.9, "vector_weight": 0.5}})
+
+    assert (gate.accept_above, gate.reject_below, gate.vector_weight, gate.lexical_weight) == (0.9, 0.4, 0.5, 0.3)
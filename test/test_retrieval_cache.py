@@ -0,0 +1,73 @@
+"""
+RetrievalCache: keys by normalized query and search parameters, TTL and LRU
+eviction, and invalidation when the collection version changes.
+"""
+from unittest import mock
+
+from prod_assistant.cache.retrieval_cache import RETRIEVAL_CACHE_EVICTIONS, RetrievalCache
+
+
+def test_key_normalizes_the_query_and_keeps_the_parameters():
+    assert RetrievalCache.key("  Best PHONE under 30k? ", "mmr", 3) == RetrievalCache.key("best phone under 30k", "mmr", 3)
+    assert RetrievalCache.key("best phone", "mmr", 3) != RetrievalCache.key("best phone", "mmr", 5)
+    assert RetrievalCache.key("best phone", "mmr", 3) != RetrievalCache.key("best phone", "scored", 3)
+
+
+def test_hits_return_a_copy_of_the_results():
+    cache = RetrievalCache()
+    key = RetrievalCache.key("best phone", "mmr", 3)
+    cache.set(key, ["a", "b"])
+
+    results = cache.get(key)
+    results.reverse()
+
+    assert cache.get(key) == ["a", "b"]
+    assert cache.get(RetrievalCache.key("other phone", "mmr", 3)) is None
+
+
+def test_entries_expire_after_the_ttl():
+    cache = RetrievalCache(ttl_seconds=60)
+    before = RETRIEVAL_CACHE_EVICTIONS.value(reason="ttl")
+    with mock.patch("prod_assistant.cache.retrieval_cache.time.time", return_value=1000):
+        cache.set(("q",), ["a"])
+    with mock.patch("prod_assistant.cache.retrieval_cache.time.time", return_value=1059):
+        assert cache.get(("q",)) == ["a"]
+    with mock.patch("prod_assistant.cache.retrieval_cache.time.time", return_value=1061):
+        assert cache.get(("q",)) is None
+
+    assert len(cache) == 0
+    assert RETRIEVAL_CACHE_EVICTIONS.value(reason="ttl") == before + 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RetrievalCache(max_entries=2)
+    cache.set(("a",), [1])
+    cache.set(("b",), [2])
+    cache.get(("a",))  # "b" is now the least recently used
+
+    cache.set(("c",), [3])
+
+    assert cache.get(("b",)) is None
+    assert (cache.get(("a",)), cache.get(("c",))) == ([1], [3])
+
+
+def test_a_new_collection_version_clears_the_cache():
+    version = [1]
+    cache = RetrievalCache(version_provider=lambda: version[0])
+    cache.set(("q",), ["stale"])
+    assert cache.get(("q",)) == ["stale"]
+
+    version[0] = 2  # DataIngestion bumped the collection version
+
+    assert cache.get(("q",)) is None
+    cache.set(("q",), ["fresh"])
+    assert cache.get(("q",)) == ["fresh"]
+
+
+def test_from_config_honours_enabled_and_limits():
+    assert RetrievalCache.from_config({"retriever": {"result_cache": {"enabled": False}}}) is None
+    assert RetrievalCache.from_config({}) is None
+
+    cache = RetrievalCache.from_config({"retriever": {"result_cache": {"enabled": True, "max_entries": 5,
+                                                                        "ttl_seconds": 30}}})
+    assert (cache.max_entries, cache.ttl_seconds) == (5, 30)
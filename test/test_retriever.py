@@ -0,0 +1,79 @@
+"""
+Retriever initialisation and index reloads under concurrent callers
+(get_product_info runs them in worker threads).
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from test.benchmark.run_benchmark import OFFLINE_ENV
+from test.benchmark.stubs import HashingEmbeddings
+
+
+@pytest.fixture
+def retriever():
+    with mock.patch.dict(os.environ, {k: os.environ.get(k, v) for k, v in OFFLINE_ENV.items()}):
+        from prod_assistant.retriever.retrieval import Retriever
+        yield Retriever()
+
+
+def test_concurrent_cold_callers_build_one_vector_store(retriever):
+    builds = []
+
+    def slow_load_vector_store(config, embeddings):
+        builds.append(threading.get_ident())
+        time.sleep(0.1)
+        return InMemoryVectorStore(embedding=embeddings)
+
+    with mock.patch("prod_assistant.retriever.retrieval.load_vector_store", slow_load_vector_store), \
+            mock.patch.object(retriever.model_loader, "load_embeddings", HashingEmbeddings):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            retrievers = list(pool.map(lambda _: retriever.load_retriever(), range(8)))
+
+    assert len(builds) == 1
+    assert all(r is retrievers[0] for r in retrievers)
+
+
+def test_concurrent_callers_load_the_lexical_index_once_per_version(retriever):
+    loads = []
+
+    def slow_from_config(config):
+        loads.append(threading.get_ident())
+        time.sleep(0.1)
+        return object()
+
+    with mock.patch("prod_assistant.retriever.retrieval.LexicalIndex.from_config", slow_from_config):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            indexes = list(pool.map(lambda _: retriever.lexical_index(), range(8)))
+
+    assert len(loads) == 1
+    assert all(index is indexes[0] for index in indexes)
+
+
+def test_local_index_is_reloaded_after_reingestion(retriever):
+    version = [1]
+    loads = []
+
+    def load(config, embeddings):
+        loads.append(version[0])
+        return InMemoryVectorStore(embedding=embeddings)
+
+    retriever._reloads_on_ingestion = True
+    with mock.patch("prod_assistant.retriever.retrieval.load_vector_store", load), \
+            mock.patch.object(retriever._collection_version, "current", lambda: version[0]), \
+            mock.patch.object(retriever.model_loader, "load_embeddings", HashingEmbeddings):
+        first = retriever.load_retriever()
+        assert retriever.load_retriever() is first
+
+        version[0] = 2  # DataIngestion rewrote the index files
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            reloaded = list(pool.map(lambda _: retriever.load_retriever(), range(8)))
+
+    assert loads == [1, 2]
+    assert all(r is reloaded[0] for r in reloaded) and reloaded[0] is not first
+    assert retriever.vstore is reloaded[0].vectorstore
@@ -0,0 +1,94 @@
+"""
+SemanticCache: similarity threshold, TTL, LRU eviction and invalidation when
+the collection is re-ingested, and price/rating bounds as an exact-match key.
+"""
+from unittest import mock
+
+import numpy as np
+
+from prod_assistant.cache.semantic_cache import SemanticCache
+from prod_assistant.retriever.query_constraints import QueryConstraints
+
+
+def _vector(*components) -> np.ndarray:
+    vec = np.zeros(8, dtype=np.float32)
+    vec[:len(components)] = components
+    return vec
+
+
+def _bounds(query: str) -> tuple:
+    return QueryConstraints.extract(query).key
+
+
+def test_hit_at_or_above_the_similarity_threshold_only():
+    cache = SemanticCache(similarity_threshold=0.95)
+    cache.store("price of pixel 9", _vector(1, 0), "Rs 79,999")
+
+    assert cache.lookup(_vector(2, 0)) == "Rs 79,999"  # same direction, any length
+    assert cache.lookup(_vector(1, 0.2)) == "Rs 79,999"  # cosine ~0.98
+    assert cache.lookup(_vector(1, 1)) is None  # cosine ~0.71
+
+
+def test_the_most_similar_entry_answers():
+    cache = SemanticCache(similarity_threshold=0.9)
+    cache.store("pixel 9", _vector(1, 0), "pixel answer")
+    cache.store("galaxy s24", _vector(0, 1), "galaxy answer")
+
+    assert cache.lookup(_vector(0.1, 1)) == "galaxy answer"
+
+
+def test_entries_expire_after_the_ttl():
+    cache = SemanticCache(ttl_seconds=60)
+    with mock.patch("prod_assistant.cache.semantic_cache.time.time", return_value=1000.0):
+        cache.store("pixel 9", _vector(1), "answer")
+    with mock.patch("prod_assistant.cache.semantic_cache.time.time", return_value=1059.0):
+        assert cache.lookup(_vector(1)) == "answer"
+    with mock.patch("prod_assistant.cache.semantic_cache.time.time", return_value=1061.0):
+        assert cache.lookup(_vector(1)) is None
+
+
+def test_least_recently_used_entry_is_evicted_beyond_max_entries():
+    cache = SemanticCache(max_entries=2)
+    cache.store("a", _vector(1, 0, 0), "A")
+    cache.store("b", _vector(0, 1, 0), "B")
+    assert cache.lookup(_vector(1, 0, 0)) == "A"  # "a" is now the most recently used
+    cache.store("c", _vector(0, 0, 1), "C")
+
+    assert cache.lookup(_vector(1, 0, 0)) == "A"
+    assert cache.lookup(_vector(0, 1, 0)) is None
+    assert cache.lookup(_vector(0, 0, 1)) == "C"
+
+
+def test_version_bump_drops_every_entry():
+    version = [1]
+    cache = SemanticCache(version_provider=lambda: version[0])
+    cache.store("pixel 9", _vector(1), "old catalog answer")
+    assert cache.lookup(_vector(1)) == "old catalog answer"
+
+    version[0] = 2
+
+    assert cache.lookup(_vector(1)) is None
+    cache.store("pixel 9", _vector(1), "new catalog answer")
+    assert cache.lookup(_vector(1)) == "new catalog answer"
+
+
+def test_queries_with_different_price_or_rating_bounds_never_share_an_answer():
+    cache = SemanticCache(similarity_threshold=0.9, key_fn=_bounds)
+    cache.store("phones under 30000", _vector(1, 0), "under 30k answer")
+    cache.store("phones rated 4+", _vector(0, 1), "4+ answer")
+
+    # Near-identical embeddings, different bounds
+    assert cache.lookup(_vector(1, 0.01), "phones under 50000") is None
+    assert cache.lookup(_vector(0.01, 1), "phones rated 3+") is None
+    assert cache.lookup(_vector(1, 0.01), "phones") is None
+    # Same bounds in other words
+    assert cache.lookup(_vector(1, 0.01), "mobiles below 30k") == "under 30k answer"
+    assert cache.lookup(_vector(0.01, 1), "phones with 4+ rating") == "4+ answer"
+
+
+def test_a_less_similar_entry_with_the_same_bounds_still_answers():
+    cache = SemanticCache(similarity_threshold=0.9, key_fn=_bounds)
+    cache.store("phones under 50000", _vector(1, 0), "under 50k answer")
+    cache.store("good phones under 30000", _vector(1, 0.3), "under 30k answer")
+
+    assert cache.lookup(_vector(1, 0), "phones under 30000") == "under 30k answer"
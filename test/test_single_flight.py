@@ -0,0 +1,124 @@
+"""
+SingleFlight: concurrent calls with the same key share one execution, and
+a caller that goes away does not cancel it for the others. AgenticRAG only
+shares first turns across sessions.
+"""
+import asyncio
+import os
+from unittest import mock
+
+import pytest
+from langchain_core.tools import StructuredTool
+
+from prod_assistant.utils.single_flight import SingleFlight
+from test.benchmark.run_benchmark import OFFLINE_ENV
+from test.benchmark.stubs import HashingEmbeddings, StubChatModel
+
+
+def test_concurrent_calls_with_one_key_share_one_execution():
+    group = SingleFlight("test-coalesce")
+    executions = []
+
+    async def work():
+        executions.append(1)
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def scenario():
+        return await asyncio.gather(*(group.do("pixel 9 price", work) for _ in range(5)),
+                                    group.do("galaxy s24 price", work))
+
+    results = asyncio.run(scenario())
+
+    assert results == ["answer"] * 6
+    assert len(executions) == 2
+    assert group.stats() == {"executions": 2, "saved": 4, "inflight": 0}
+
+
+def test_a_finished_key_runs_again():
+    group = SingleFlight("test-rerun")
+    executions = []
+
+    async def work():
+        executions.append(1)
+        return len(executions)
+
+    async def scenario():
+        return [await group.do("query", work), await group.do("query", work)]
+
+    assert asyncio.run(scenario()) == [1, 2]
+
+
+def test_followers_receive_the_leaders_exception():
+    group = SingleFlight("test-error")
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("graph failed")
+
+    async def scenario():
+        return await asyncio.gather(group.do("query", failing), group.do("query", failing),
+                                    return_exceptions=True)
+
+    errors = asyncio.run(scenario())
+
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert errors[0] is errors[1]
+
+
+def test_cancelled_leader_does_not_cancel_the_work_for_followers():
+    group = SingleFlight("test-leader-cancel")
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def scenario():
+        leader = asyncio.create_task(group.do("query", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(group.do("query", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()  # e.g. the leader's client disconnected
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "answer"
+    assert group.stats()["executions"] == 1
+
+
+async def _get_product_info(query: str) -> str:
+    return "Title: Apple iPhone 15\nPrice: 69900\nRating: 4.6\nReviews:\nGreat display and battery."
+
+
+@pytest.fixture
+def rag_agent():
+    with mock.patch.dict(os.environ, {k: os.environ.get(k, v) for k, v in OFFLINE_ENV.items()}):
+        from prod_assistant.utils.model_loader import ModelLoader
+        from prod_assistant.workflow.agentic_workflow_with_mcp_websearch import AgenticRAG
+
+        llm = StubChatModel(latency_ms=1)
+        with mock.patch.object(ModelLoader, "load_llm", lambda self: llm), \
+                mock.patch.object(ModelLoader, "load_embeddings", lambda self: HashingEmbeddings()):
+            agent = AgenticRAG()
+        agent.semantic_cache = None
+        agent.single_flight = SingleFlight("test-agentic-rag")
+        agent.mcp_tools = [StructuredTool.from_function(coroutine=_get_product_info, name="get_product_info",
+                                                        description="Product lookup")]
+        yield agent
+
+
+def test_only_first_turns_are_shared_across_sessions(rag_agent):
+    question = "What is the price of iPhone 15?"
+
+    async def scenario():
+        first_turn = await rag_agent._flight_key(question, "session-a")
+        await rag_agent.run(question, thread_id="session-a")
+        return first_turn, await rag_agent._flight_key(question, "session-a"), \
+            await rag_agent._flight_key(question, "session-b")
+
+    first_turn, follow_up, other_session = asyncio.run(scenario())
+
+    assert first_turn == other_session
+    # With history the answer depends on the thread, so another session must not receive it
+    assert follow_up != first_turn and follow_up.startswith("session-a")
@@ -0,0 +1,74 @@
+"""
+Speculation: speculative work is either adopted (use) or cancelled, and each
+path records its outcome.
+"""
+import asyncio
+
+import pytest
+
+from prod_assistant.workflow.speculation import OUTCOMES, SAVED_SECONDS, WASTED_SECONDS, Speculation
+
+
+def test_use_adopts_the_result_and_records_the_saved_latency():
+    async def scenario():
+        speculation = Speculation("test-use", "web_search", asyncio.sleep(0.05, result="web results"))
+        await asyncio.sleep(0.02)  # the deciding step (grader) runs meanwhile
+        return await speculation.use()
+
+    assert asyncio.run(scenario()) == "web results"
+    assert OUTCOMES.value(graph="test-use", speculation="web_search", outcome="used") == 1
+    assert SAVED_SECONDS.count(graph="test-use", speculation="web_search") == 1
+    assert SAVED_SECONDS.sum(graph="test-use", speculation="web_search") == pytest.approx(0.02, abs=0.015)
+
+
+def test_use_reraises_and_records_a_failure():
+    async def failing():
+        raise RuntimeError("search API down")
+
+    async def scenario():
+        await Speculation("test-fail", "web_search", failing()).use()
+
+    with pytest.raises(RuntimeError, match="search API down"):
+        asyncio.run(scenario())
+    assert OUTCOMES.value(graph="test-fail", speculation="web_search", outcome="failed") == 1
+    assert OUTCOMES.value(graph="test-fail", speculation="web_search", outcome="used") == 0
+
+
+def test_cancel_stops_running_work_and_records_it_as_wasted():
+    finished = []
+
+    async def slow_search():
+        await asyncio.sleep(1)
+        finished.append(True)
+
+    async def scenario():
+        speculation = Speculation("test-cancel", "web_search", slow_search())
+        await asyncio.sleep(0.01)
+        speculation.cancel()
+        await asyncio.sleep(0)
+        return speculation.task
+
+    task = asyncio.run(scenario())
+
+    assert task.cancelled() and not finished
+    assert OUTCOMES.value(graph="test-cancel", speculation="web_search", outcome="wasted") == 1
+    assert WASTED_SECONDS.count(graph="test-cancel", speculation="web_search") == 1
+
+
+def test_cancel_swallows_the_error_of_work_that_already_failed():
+    async def failing():
+        raise RuntimeError("cancelled by the client")
+
+    async def scenario(loop_errors):
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: loop_errors.append(context))
+        speculation = Speculation("test-cancel-failed", "web_search", failing())
+        await asyncio.sleep(0)
+        speculation.cancel()
+        del speculation
+        await asyncio.sleep(0)
+
+    loop_errors = []
+    asyncio.run(scenario(loop_errors))
+
+    assert not loop_errors
+    assert OUTCOMES.value(graph="test-cancel-failed", speculation="web_search", outcome="wasted") == 1